@@ -12,6 +12,10 @@ class DecoderDoesNotExist(DecodeError):
     pass
 
 
+class LimitExceeded(DecodeError):
+    pass
+
+
 class SchemaSyntaxError(ValueError):
     pass
 
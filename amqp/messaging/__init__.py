@@ -0,0 +1,18 @@
+from amqp.messaging.batch import BatchEncoder
+from amqp.messaging.batch import decode_batch
+from amqp.messaging.batch import split_batch
+from amqp.messaging.message import Message
+from amqp.messaging.peek import peek
+from amqp.messaging.peek import peek_many
+from amqp.messaging.template import MessageTemplate
+
+
+__all__ = [
+    'BatchEncoder',
+    'Message',
+    'MessageTemplate',
+    'decode_batch',
+    'peek',
+    'peek_many',
+    'split_batch'
+]
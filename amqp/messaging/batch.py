@@ -0,0 +1,128 @@
+import io
+
+from amqp.factory import create_factory
+from amqp.messaging.message import Message
+from amqp.messaging.message import iter_sections
+from amqp.typesystem.encoder import SchemaEncoder
+from amqp.typesystem.registry import get_by_type_name
+from amqp.typesystem.utils import get_type_length
+from amqp.utils import compat
+
+
+#: The ``message-format`` of a batch: the upper three octets hold the
+#: vendor code, the lowest octet the version (OASIS 2012: 2.7.5). The
+#: payload of a batch is a sequence of ``data`` sections, each holding
+#: an encoded message.
+BATCH_MESSAGE_FORMAT = 0x80013700
+
+
+class BatchEncoder(object):
+    """Accumulates messages and sends them as a single ``transfer``
+    with a vendor batch ``message-format``.
+
+    Messages are encoded as they are added; the payload is never
+    joined. A batch is sent when adding a message would exceed
+    `max_size` octets or `max_count` messages, or when :meth:`flush` is
+    invoked.
+
+    Args:
+        send: a callable that is invoked with the ``transfer``
+            :class:`.Composite` and a list of byte-sequences holding the
+            payload of the batch. The caller assigns the ``delivery-id``
+            and ``delivery-tag``.
+        handle: the link handle.
+        max_size: the maximum size of the payload, in octets.
+        max_count: the maximum number of messages in a batch.
+        message_format: the ``message-format`` of the ``transfer``.
+        encoder: the :class:`.Encoder` used to encode messages.
+    """
+    factory = create_factory('transfer')
+
+    def __init__(self, send, handle, max_size=256 * 1024, max_count=1024,
+        message_format=BATCH_MESSAGE_FORMAT, encoder=None):
+        self.send = send
+        self.handle = handle
+        self.max_size = max_size
+        self.max_count = max_count
+        self.message_format = message_format
+        self.encoder = encoder or SchemaEncoder()
+        self.data = get_by_type_name('data').create(b'')
+        self.chunks = []
+        self.size = 0
+        self.count = 0
+
+    def add(self, message):
+        """Add `message` to the batch. `message` is either a
+        :class:`.Message` or a byte-sequence holding an encoded message.
+        Return the number of batches sent.
+        """
+        encoded = message.encode(self.encoder)\
+            if isinstance(message, Message)\
+            else message
+        prefix = self.encoder.encode_prefix(self.data, encoded)
+        size = len(prefix) + len(encoded)
+        if size > self.max_size:
+            raise ValueError(
+                "Message exceeds the maximum batch size: {0}".format(size))
+
+        sent = 0
+        if self.count >= self.max_count\
+        or self.size + size > self.max_size:
+            sent = self.flush()
+        self.chunks.append(prefix)
+        self.chunks.append(encoded)
+        self.size += size
+        self.count += 1
+        if self.count >= self.max_count:
+            sent += self.flush()
+        return sent
+
+    def flush(self, **params):
+        """Send the pending messages, if any, as a single ``transfer``;
+        `params` are additional fields of the ``transfer``. Return the
+        number of batches sent.
+        """
+        if not self.count:
+            return 0
+        transfer = self.factory(handle=self.handle,
+            message_format=self.message_format, **params)
+        chunks = self.chunks
+        self.chunks = []
+        self.size = 0
+        self.count = 0
+        self.send(transfer, chunks)
+        return 1
+
+    def __len__(self):
+        return self.count
+
+
+def is_batch(transfer, message_format=BATCH_MESSAGE_FORMAT):
+    """Return ``True`` if the ``transfer`` performative `transfer` carries
+    a batch.
+    """
+    return transfer.get('message_format') == message_format
+
+
+def split_batch(payload):
+    """Split the payload of a batch into the encoded messages. Return a
+    list of :class:`memoryview` slices of `payload`; no message is
+    copied or decoded.
+    """
+    view = memoryview(payload)
+    messages = []
+    for type_name, start, end, offset in iter_sections(io.BytesIO(payload)):
+        if type_name != 'data':
+            raise ValueError(
+                "Batches may only hold data sections: {0}".format(type_name))
+        format_code = compat.octet(view[offset - 1:offset])
+        messages.append(view[offset + get_type_length(format_code):end])
+    return messages
+
+
+def decode_batch(payload):
+    """Return a list holding a :class:`.Message` for every message in the
+    batch `payload`. The messages are decoded lazily; see
+    :meth:`.Message.frombuf`.
+    """
+    return [Message.frombuf(x) for x in split_batch(payload)]
@@ -0,0 +1,302 @@
+import io
+import uuid
+
+from amqp.typesystem.basetypes import Encodable
+from amqp.typesystem.basetypes import Scalar
+from amqp.typesystem.basetypes import infer_encodable
+from amqp.typesystem.decoder import SchemaDecoder
+from amqp.typesystem.encoder import SchemaEncoder
+from amqp.typesystem.node import parse_buffer
+from amqp.typesystem.registry import get_by_constructor
+from amqp.typesystem.registry import get_by_type_name
+from amqp.typesystem.stream import decode_constructor
+from amqp.typesystem.stream import skip_value
+from amqp.typesystem.utils import get_type_length
+from amqp.utils import compat
+
+
+#: The sections of a message, in the order in which they must be
+#: encoded. The body is one or more data, amqp-sequence or amqp-value
+#: sections.
+SECTIONS = [
+    'header',
+    'delivery-annotations',
+    'message-annotations',
+    'properties',
+    'application-properties',
+    'body',
+    'footer'
+]
+
+#: The type names of the body sections.
+BODY_SECTIONS = ('data', 'amqp-sequence', 'amqp-value')
+
+#: The sections that are annotation maps, which are keyed by symbols.
+ANNOTATIONS = ('delivery-annotations', 'message-annotations', 'footer')
+
+#: The fields of the properties section that are polymorphic, mapped
+#: to the restricted type used for Python strings.
+POLYMORPHIC_PROPERTIES = {
+    'message_id': 'message-id-string',
+    'correlation_id': 'message-id-string',
+    'to': 'address-string',
+    'reply_to': 'address-string'
+}
+
+
+def iter_sections(buf):
+    """Iterate over the sections of an encoded message in file-like object
+    `buf` using the constructors and size indicators only. Yield tuples
+    holding the section type name, the start and end offset of the
+    section, and the offset at which its value starts.
+    """
+    while True:
+        start = buf.tell()
+        try:
+            ctr = decode_constructor(buf.read)
+        except EOFError:
+            break
+        offset = buf.tell()
+        skip_value(ctr.format_code, buf)
+        yield get_by_constructor(ctr).type_name, start, buf.tell(), offset
+
+
+def scan_sections(buf):
+    """Return a list holding the sections of an encoded message in
+    file-like object `buf`; see :func:`iter_sections`.
+    """
+    return list(iter_sections(buf))
+
+
+class SectionProperty(object):
+    """Exposes a message section as an attribute of :class:`Message`."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        return instance.get_section(self.name)
+
+    def __set__(self, instance, value):
+        instance.set_section(self.name, value)
+
+
+class Message(object):
+    """An AMQP message, consisting of the bare message and its
+    annotations.
+
+    A :class:`Message` decoded with :meth:`frombuf` only records the
+    boundaries of its sections. Each section is decoded the first time it
+    is accessed, and sections that were not modified are encoded by
+    copying their original bytes. The contents of ``data`` sections are
+    exposed as :class:`memoryview` slices of the original buffer and are
+    never decoded.
+
+    The header and properties are represented as Data Transfer Objects
+    (named tuples) when decoded, and may be provided as dictionaries.
+    The annotations and application properties are dictionaries.
+    """
+    header = SectionProperty('header')
+    delivery_annotations = SectionProperty('delivery-annotations')
+    message_annotations = SectionProperty('message-annotations')
+    properties = SectionProperty('properties')
+    application_properties = SectionProperty('application-properties')
+    footer = SectionProperty('footer')
+
+    @classmethod
+    def frombuf(cls, payload):
+        """Create a new :class:`Message` from the byte-sequence `payload`,
+        e.g. the payload of one or more ``transfer`` frames.
+        """
+        instance = cls()
+        instance.buf = memoryview(payload)
+        for type_name, start, end, offset in scan_sections(io.BytesIO(payload)):
+            if type_name in BODY_SECTIONS:
+                instance.body_type = type_name
+                instance.raw['body'].append((start, end, offset))
+            else:
+                instance.raw[type_name] = (start, end, offset)
+        return instance
+
+    def __init__(self, body=None, body_type=None, **sections):
+        """Initialize a new :class:`Message`. `body_type` is one of
+        ``data``, ``amqp-sequence`` or ``amqp-value``; if it is not
+        specified, byte-sequences are sent as ``data`` and all other
+        objects as ``amqp-value``.
+        """
+        self.buf = None
+        self.raw = {'body': []}
+        self.values = {}
+        self.body_type = body_type
+        if body is not None:
+            self.body = body
+        for name, value in sections.items():
+            setattr(self, name, value)
+
+    @property
+    def body(self):
+        """The message body. ``data`` sections are returned as
+        :class:`memoryview` instances, ``amqp-sequence`` sections as lists.
+        If the message holds more than one body section, a list holding
+        the value of each section is returned.
+        """
+        return self.get_section('body')
+
+    @body.setter
+    def body(self, value):
+        if self.body_type is None:
+            self.body_type = 'data'\
+                if isinstance(value, (bytes, bytearray, memoryview))\
+                else 'amqp-value'
+        self.set_section('body', value)
+
+    def get_section(self, name):
+        """Return the Python representation of section `name`, decoding
+        it if it was not accessed before.
+        """
+        if name in self.values:
+            return self.values[name]
+        if name == 'body':
+            value = self.decode_body()
+        elif name in self.raw:
+            start, end, offset = self.raw[name]
+            value = self.decode_section(self.buf[start:end])
+        else:
+            value = None
+        self.values[name] = value
+        return value
+
+    def set_section(self, name, value):
+        """Replace section `name` with `value`."""
+        self.values[name] = value
+        self.raw.pop(name, None)
+        if name == 'body':
+            self.raw['body'] = []
+
+    def decode_section(self, raw):
+        buf = io.BytesIO(raw)
+        return parse_buffer(buf).accept(SchemaDecoder(buf)).as_dto()
+
+    def decode_body(self):
+        spans = self.raw['body']
+        if not spans:
+            return None
+        if self.body_type == 'data':
+            values = [self.get_data(offset, end) for _, end, offset in spans]
+        else:
+            values = [self.decode_section(self.buf[start:end])
+                for start, end, _ in spans]
+        return values[0] if len(values) == 1 else values
+
+    def get_data(self, offset, end):
+        # The value starts with the size indicator of the binary, whose
+        # width is determined by the format code that precedes it; the
+        # remainder is the content of the data section.
+        format_code = compat.octet(self.buf[offset - 1:offset])
+        return self.buf[offset + get_type_length(format_code):end]
+
+    def encode(self, encoder=None):
+        """Encode the message. Return a byte-sequence."""
+        return compat.join_bytes(self.encode_sections(encoder))
+
+    def encode_sections(self, encoder=None):
+        """Return a list of byte-sequences holding the encoded sections.
+        Sections that were decoded but not modified are not re-encoded.
+        If `encoder` is a :class:`.ScatterEncoder`, the byte-sequences it
+        produces are included in the list as-is.
+        """
+        encoder = encoder or SchemaEncoder()
+        chunks = []
+        for name in SECTIONS:
+            if name != 'body' and name in self.raw:
+                start, end, _ = self.raw[name]
+                chunks.append(self.buf[start:end])
+            elif name == 'body' and self.raw['body']:
+                chunks.extend(self.buf[start:end]
+                    for start, end, _ in self.raw['body'])
+            elif self.values.get(name) is not None:
+                for section in self.create_sections(name, self.values[name]):
+                    encoded = section.accept(encoder)
+                    if isinstance(encoded, list):
+                        chunks.extend(encoded)
+                    else:
+                        chunks.append(encoded)
+        return chunks
+
+    def create_sections(self, name, value):
+        """Return a list of :class:`.Encodable` instances representing
+        section `name` holding `value`.
+        """
+        if isinstance(value, Encodable):
+            return [value]
+        if name == 'body':
+            # A list of byte-sequences is encoded as multiple data
+            # sections.
+            meta = get_by_type_name(self.body_type)
+            values = value\
+                if (self.body_type == 'data' and isinstance(value, list))\
+                else [value]
+            return [meta.create(self.prepare_body(x)) for x in values]
+        meta = get_by_type_name(name)
+        if name in ANNOTATIONS:
+            value = dict(
+                (annotation_key(k), infer_encodable(v))
+                for k, v in value.items()
+            )
+        elif name == 'application-properties':
+            value = dict(
+                (infer_encodable(k), infer_encodable(v))
+                for k, v in value.items()
+            )
+        elif name == 'properties':
+            value = self.prepare_properties(value)
+        elif hasattr(value, '_asdict'):
+            value = value._asdict()
+        return [meta.create(dict(value))]
+
+    def prepare_body(self, value):
+        if self.body_type == 'data':
+            return compat.tobytes(value)
+        if self.body_type == 'amqp-sequence':
+            return [infer_encodable(x) for x in value]
+        return value
+
+    def prepare_properties(self, value):
+        if hasattr(value, '_asdict'):
+            value = value._asdict()
+        value = dict(value)
+        for attname, type_name in POLYMORPHIC_PROPERTIES.items():
+            value[attname] = polymorphic_value(type_name, value.get(attname))
+        return value
+
+    def __repr__(self):
+        return "<Message: {0}>".format(self.body_type)
+
+
+def annotation_key(key):
+    """Return an :class:`.Encodable` for the annotation key `key`, which
+    must be either a symbol or an unsigned long.
+    """
+    if isinstance(key, Encodable):
+        return key
+    if isinstance(key, compat.integer_types):
+        return Scalar.create('ulong', key)
+    return Scalar.create('symbol', key)
+
+
+def polymorphic_value(type_name, value):
+    """Coerce the value of a polymorphic field of the properties section
+    to a ``(type_name, value)`` tuple.
+    """
+    if value is None or isinstance(value, (tuple, Encodable)):
+        return value
+    if type_name == 'message-id-string':
+        if isinstance(value, compat.integer_types):
+            type_name = 'message-id-ulong'
+        elif isinstance(value, uuid.UUID):
+            type_name = 'message-id-uuid'
+        elif isinstance(value, bytes):
+            type_name = 'message-id-binary'
+    return (type_name, value)
@@ -0,0 +1,145 @@
+"""Read individual keys from the annotations and application properties
+of an encoded message without decoding the message.
+"""
+import io
+
+from amqp.messaging.message import BODY_SECTIONS
+from amqp.messaging.message import SECTIONS
+from amqp.messaging.message import iter_sections
+from amqp.typesystem.decoder import RawDecoder
+from amqp.typesystem.decoder import SchemaDecoder
+from amqp.typesystem.node import parse_buffer
+from amqp.typesystem.stream import decode_constructor
+from amqp.typesystem.stream import is_collection
+from amqp.typesystem.stream import is_variable
+from amqp.typesystem.stream import read_stream
+from amqp.typesystem.stream import read_variable
+from amqp.typesystem.stream import skip_value
+from amqp.typesystem.utils import get_type_length
+from amqp.typesystem.utils import get_type_name
+from amqp.utils import compat
+
+
+def section_index(type_name):
+    return SECTIONS.index('body' if type_name in BODY_SECTIONS else type_name)
+
+
+#: The kinds of the variable-width keys that are compared in their
+#: encoded form.
+VARIABLE_KEY_TYPES = {
+    'string': 'text',
+    'symbol': 'text',
+    'binary': 'binary',
+}
+
+
+def get_key_type(value):
+    """Return the kind of the fixed-width key `value`, a Python object."""
+    if isinstance(value, bool):
+        return 'boolean'
+    if isinstance(value, compat.integer_types):
+        return 'integer'
+    return type(value).__name__
+
+
+def get_wanted_keys(key):
+    """Return the forms of the requested `key` that are compared to the
+    encoded keys, as tuples holding a kind and a value.
+    """
+    if isinstance(key, compat.unicode):
+        return [('text', key.encode('utf-8'))]
+    if isinstance(key, bytes):
+        # On Python 2, str keys are encoded as symbols in annotations
+        # and as binary elsewhere.
+        return [('text', key), ('binary', key)] if compat.PY2\
+            else [('binary', key)]
+    return [(get_key_type(key), key)]
+
+
+def peek(payload, section, key, default=None):
+    """Return the value of `key` in map section `section` (e.g.
+    ``message-annotations`` or ``application-properties``) of the
+    encoded message `payload`, or `default` if the section or key is not
+    present.
+    """
+    return peek_many(payload, section, [key]).get(key, default)
+
+
+def peek_many(payload, section, keys):
+    """Return a dictionary holding the values of the `keys` that are
+    present in map section `section` of the encoded message `payload`.
+
+    The sections are located using their constructors and size
+    indicators only, and the map is scanned key by key: keys are
+    compared in their encoded form and the values of other keys are
+    skipped without being decoded. Only the values of the requested keys
+    are decoded.
+
+    Keys only match encoded keys of the same kind: text keys match
+    ``string`` and ``symbol`` keys, :class:`bytes` keys match ``binary``
+    keys (and, on Python 2, text keys), and other keys match keys that
+    decode to an equal value of the same Python type, so that ``True``
+    does not match ``1``.
+    """
+    buf = io.BytesIO(payload)
+    target = section_index(section)
+    for type_name, start, end, offset in iter_sections(buf):
+        if type_name == section:
+            buf.seek(offset - 1)
+            return peek_map(buf, keys)
+        if section_index(type_name) > target:
+            # Sections are encoded in a fixed order, so the requested
+            # section is not present.
+            break
+    return {}
+
+
+def peek_map(buf, keys):
+    """Scan the map at the current position of file-like object `buf`,
+    which must be positioned at its format code, for `keys`.
+    """
+    found = {}
+    format_code = compat.octet(buf.read(1))
+    if get_type_name(format_code) != 'map':
+        return found
+    width = get_type_length(format_code)
+    buf.read(width)
+    count = compat.from_bytes(buf.read(width), 'big')
+
+    # Encode the requested string keys once, so they can be compared to
+    # the raw bytes of the encoded keys.
+    wanted = dict((form, key)
+        for key in keys for form in get_wanted_keys(key))
+    for _ in range(count // 2):
+        ctr = decode_constructor(buf.read)
+        if is_variable(ctr.format_code):
+            raw_key = (VARIABLE_KEY_TYPES.get(get_type_name(ctr.format_code)),
+                read_variable(ctr.format_code, buf.read))
+        else:
+            raw_key = RawDecoder.decode(ctr.format_code,
+                read_stream(ctr.format_code, buf.read))
+            raw_key = (get_key_type(raw_key), raw_key)
+        if raw_key not in wanted:
+            ctr = decode_constructor(buf.read)
+            skip_value(ctr.format_code, buf)
+            continue
+        key = wanted[raw_key]
+        for form in get_wanted_keys(key):
+            wanted.pop(form, None)
+        found[key] = decode_value(buf)
+        if not wanted:
+            break
+    return found
+
+
+def decode_value(buf):
+    """Decode the value at the current position of file-like object
+    `buf`.
+    """
+    start = buf.tell()
+    ctr = decode_constructor(buf.read)
+    if ctr.descriptor is None and not is_collection(ctr.format_code):
+        return RawDecoder.decode(ctr.format_code,
+            read_stream(ctr.format_code, buf.read))
+    buf.seek(start)
+    return parse_buffer(buf).accept(SchemaDecoder(buf)).as_dto()
@@ -0,0 +1,252 @@
+from collections import Mapping
+
+from amqp.messaging.message import POLYMORPHIC_PROPERTIES
+from amqp.messaging.message import Message
+from amqp.messaging.message import polymorphic_value
+from amqp.typesystem import const
+from amqp.typesystem.encoder import SchemaEncoder
+from amqp.typesystem.registry import get_by_type_name
+from amqp.utils import compat
+
+
+#: The source types that are encoded with a fixed width in a template
+#: slot, mapped to their format code, the width of the value and
+#: whether the value is signed.
+FIXED_WIDTH = {
+    'int'       : (const.INT, 4, True),
+    'long'      : (const.LONG, 8, True),
+    'uint'      : (const.UINT, 4, False),
+    'ulong'     : (const.ULONG, 8, False),
+    'timestamp' : (const.MS64, 8, True),
+    'uuid'      : (const.UUID, 16, False),
+}
+
+
+class Slot(object):
+    """A variable field of the ``properties`` section of a
+    :class:`MessageTemplate`.
+
+    Args:
+        field: the :class:`.Field` of the ``properties`` composite.
+        type_name: for polymorphic fields, the restricted type of the
+            values, e.g. ``message-id-ulong``. If `type_name` is
+            ``None``, it is inferred from each value.
+    """
+
+    def __init__(self, field, type_name=None):
+        self.field = field
+        self.type_name = type_name
+        self.fixed = None
+        if field.type_name != '*':
+            type_name = field.type_name
+        if type_name is not None:
+            source = get_by_type_name(type_name).get_source()
+            self.fixed = FIXED_WIDTH.get(source)
+
+    @property
+    def attname(self):
+        return self.field.attname
+
+    @property
+    def width(self):
+        """The width of the encoded slot, or ``None`` if it depends on the
+        value.
+        """
+        if self.fixed is not None:
+            return 1 + self.fixed[1]
+
+    def clean(self, value):
+        if value is not None and self.field.type_name == '*':
+            value = (self.type_name, value)\
+                if self.type_name is not None\
+                else polymorphic_value(POLYMORPHIC_PROPERTIES[self.attname],
+                    value)
+        return self.field.clean(value)
+
+    def encode(self, value, encoder):
+        """Encode `value`. Fixed-width slots always use the full-width
+        format code of their type, so that the encoded width does not
+        depend on the value.
+        """
+        encodable = self.clean(value)
+        if self.fixed is None:
+            return encodable.accept(encoder)
+        if encodable.is_empty():
+            raise ValueError(
+                "Fixed-width slot {0} requires a value.".format(self.attname))
+        format_code, width, signed = self.fixed
+        if format_code == const.UUID:
+            value = encodable.value.bytes
+        else:
+            value = compat.to_bytes(encodable.value, width, 'big',
+                signed=signed)
+        return compat.to_bytes(format_code, 1, 'big') + value
+
+    def __repr__(self):
+        return "<Slot: {0}>".format(self.attname)
+
+
+class MessageTemplate(object):
+    """Encodes the sections of a message that are identical for every
+    message once, and produces complete messages by splicing in the
+    body and the fields of the ``properties`` section that vary per
+    message (the slots).
+
+    If all slots have a fixed width (e.g. a ``message-id-ulong`` or
+    ``message-id-uuid`` message identifier), the ``properties`` section
+    is encoded once with placeholders and the slots are patched in
+    place. Otherwise only the slots are encoded and the size of the
+    section is computed from the lengths of the pre-encoded fields.
+
+    :meth:`render` returns a list of byte-sequences, suitable for
+    ``writelines()`` or ``socket.sendmsg()``; the body of ``data``
+    sections is included as-is, without being copied.
+
+    Args:
+        slots: the attribute names of the variable fields of the
+            ``properties`` section, or a dictionary mapping the attribute
+            names of polymorphic fields to the restricted type of their
+            values.
+        body_type: the type of the body sections, either ``data``,
+            ``amqp-sequence`` or ``amqp-value``.
+        encoder: the :class:`.Encoder` used to encode the sections.
+        **sections: the static sections, as accepted by
+            :class:`.Message`.
+    """
+
+    def __init__(self, slots=None, body_type='data', encoder=None,
+        **sections):
+        self.encoder = encoder or SchemaEncoder()
+        self.body_type = body_type
+        properties = sections.pop('properties', None) or {}
+        self.message = Message(body_type=body_type, **sections)
+        self.head = self.encode_static('header', 'delivery-annotations',
+            'message-annotations')
+        self.application_properties = self.encode_static(
+            'application-properties')
+        self.footer = self.encode_static('footer')
+
+        self.meta = get_by_type_name('properties')
+        self.composite = self.meta.create({})
+        self.data = get_by_type_name('data').create(b'')
+        self.segments, self.count = self.create_segments(
+            self.message.prepare_properties(properties),
+            slots if isinstance(slots, Mapping)
+            else dict.fromkeys(slots or []))
+        self.slots = [x for x in self.segments if isinstance(x, Slot)]
+
+        # If all slots have a fixed width, encode the properties section
+        # once and remember the offsets of the slots.
+        self.properties = None
+        self.offsets = []
+        if all(x.width is not None for x in self.slots):
+            length = sum(len(x) if isinstance(x, bytes) else x.width
+                for x in self.segments)
+            properties = bytearray(
+                self.encoder.encode_compound(self.composite, length, self.count))
+            for segment in self.segments:
+                if isinstance(segment, Slot):
+                    self.offsets.append((len(properties), segment))
+                    segment = b'\x00' * segment.width
+                properties.extend(segment)
+            self.properties = bytes(properties)
+
+    def encode_static(self, *names):
+        return b''.join([
+            x.accept(self.encoder)
+            for name in names if self.message.values.get(name) is not None
+            for x in self.message.create_sections(name,
+                self.message.values[name])
+        ])
+
+    def create_segments(self, properties, slots):
+        """Encode the static fields of the ``properties`` section. Return
+        a tuple holding a list of byte-sequences and :class:`Slot`
+        instances, in field order, and the number of fields.
+        """
+        names = self.meta.get_field_names()
+        unknown = set(slots) - set(names)
+        if unknown:
+            raise TypeError("Unknown slots: {0}".format(sorted(unknown)))
+        remaining = set(properties) - set(names)
+        if remaining:
+            raise TypeError(
+                "Fields remaining: {0}".format(sorted(remaining)))
+
+        # Trailing NULL fields are omitted, like the encoder does for
+        # composite types; slots are never omitted.
+        fields = self.meta.fields
+        count = 0
+        for field in fields:
+            if field.attname in slots\
+            or properties.get(field.attname) is not None:
+                count = field.index + 1
+
+        segments = []
+        for field in fields[:count]:
+            if field.attname in slots:
+                segments.append(Slot(field, slots[field.attname]))
+                continue
+            encoded = field.clean(properties.get(field.attname))\
+                .accept(self.encoder)
+            if segments and isinstance(segments[-1], bytes):
+                encoded = segments.pop() + encoded
+            segments.append(encoded)
+        return segments, count
+
+    def render(self, body, **values):
+        """Return a list of byte-sequences holding the encoded message with
+        body `body` and the slots set to `values`.
+        """
+        unknown = set(values) - set(x.attname for x in self.slots)
+        if unknown:
+            raise TypeError("Unknown slots: {0}".format(sorted(unknown)))
+
+        chunks = [self.head] if self.head else []
+        if self.segments:
+            chunks.extend(self.render_properties(values))
+        if self.application_properties:
+            chunks.append(self.application_properties)
+        chunks.extend(self.render_body(body))
+        if self.footer:
+            chunks.append(self.footer)
+        return chunks
+
+    def render_properties(self, values):
+        if self.properties is not None:
+            properties = bytearray(self.properties)
+            for offset, slot in self.offsets:
+                properties[offset:offset + slot.width] =\
+                    slot.encode(values.get(slot.attname), self.encoder)
+            return [properties]
+
+        members = [
+            x if isinstance(x, bytes)
+            else x.encode(values.get(x.attname), self.encoder)
+            for x in self.segments
+        ]
+        length = sum(len(x) for x in members)
+        return [self.encoder.encode_compound(self.composite, length,
+            self.count)] + members
+
+    def render_body(self, body):
+        if self.body_type != 'data':
+            return [x.accept(self.encoder)
+                for x in self.message.create_sections('body', body)]
+        if not isinstance(body, list):
+            body = [body]
+        chunks = []
+        for value in body:
+            chunks.append(self.encoder.encode_prefix(self.data, value))
+            chunks.append(value)
+        return chunks
+
+    def encode(self, body, **values):
+        """Encode the message with body `body` and the slots set to
+        `values`. Return a byte-sequence.
+        """
+        return compat.join_bytes(self.render(body, **values))
+
+    def __repr__(self):
+        return "<MessageTemplate: {0}>".format(
+            ', '.join(x.attname for x in self.slots))
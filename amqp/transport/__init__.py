@@ -0,0 +1,26 @@
+from amqp.transport.buffer import ReceiveBuffer
+from amqp.transport.flow import LinkFlow
+from amqp.transport.flow import SessionFlow
+from amqp.transport.frame import Frame
+from amqp.transport.frame import FrameSplitter
+from amqp.transport.heartbeat import HeartbeatMonitor
+from amqp.transport.settlement import IntervalSet
+from amqp.transport.settlement import SettlementTracker
+from amqp.transport.table import FrameRouter
+from amqp.transport.table import NumberTable
+from amqp.transport.timer import TimerWheel
+
+
+__all__ = [
+    'Frame',
+    'FrameRouter',
+    'FrameSplitter',
+    'HeartbeatMonitor',
+    'IntervalSet',
+    'LinkFlow',
+    'NumberTable',
+    'ReceiveBuffer',
+    'SessionFlow',
+    'SettlementTracker',
+    'TimerWheel'
+]
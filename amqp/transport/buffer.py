@@ -0,0 +1,104 @@
+"""A reusable receive buffer for AMQP byte streams.
+
+:class:`ReceiveBuffer` is filled in place with ``socket.recv_into()`` or
+``readinto()``, so no :class:`bytes` object is created per read, and the
+complete frames are returned as :class:`.Frame` instances over
+:class:`memoryview` slices of the buffer. The values in a frame may be
+decoded without copying with :func:`.stream.decode_constructor_at` and
+:func:`.stream.read_value_at`.
+"""
+from amqp.transport.frame import FRAME_HEADER
+from amqp.transport.frame import Frame
+from amqp.transport.frame import frame_size
+
+
+class ReceiveBuffer(object):
+    """A fixed-size buffer holding the unprocessed octets of a byte
+    stream. Protocol headers are skipped.
+
+    Instead of wrapping around, the incomplete frame at the end of the
+    buffer is moved to its start before the buffer is filled, so that
+    every frame is contiguous. The frames returned by :meth:`frames`
+    reference the buffer and are only valid until it is filled again;
+    copy a payload with ``tobytes()`` to keep it.
+
+    Args:
+        size: the capacity of the buffer in octets. It must be at least
+            the maximum frame size of the connection.
+    """
+
+    def __init__(self, size=65536):
+        self.buf = bytearray(size)
+        self.view = memoryview(self.buf)
+        self.start = 0
+        self.end = 0
+
+    @property
+    def capacity(self):
+        return len(self.buf)
+
+    def compact(self):
+        """Move the unprocessed octets to the start of the buffer and
+        return a :class:`memoryview` of the free space following them.
+        """
+        if self.start > 0:
+            n = self.end - self.start
+            if n:
+                self.view[:n] = self.view[self.start:self.end]
+            self.start, self.end = 0, n
+        if self.end == self.capacity:
+            raise ValueError("Receive buffer of {0} octets is full"
+                .format(self.capacity))
+        return self.view[self.end:]
+
+    def recv_into(self, sock, flags=0):
+        """Receive data from socket `sock` into the buffer. Return the
+        number of octets received; ``0`` if the peer closed the
+        connection.
+        """
+        n = sock.recv_into(self.compact(), 0, flags)
+        self.end += n
+        return n
+
+    def readinto(self, fp):
+        """Read data from the binary file-like object `fp` into the
+        buffer. Return the number of octets read, ``0`` at the end of the
+        file, or ``None`` if `fp` is non-blocking and has no data.
+        """
+        n = fp.readinto(self.compact())
+        if n:
+            self.end += n
+        return n
+
+    def frames(self):
+        """Return a list holding the complete :class:`.Frame` instances in
+        the buffer, and consume them.
+        """
+        frames = []
+        data = self.view[:self.end]
+        offset = self.start
+        while True:
+            size = frame_size(data, offset)
+            if size is None:
+                break
+            if size < FRAME_HEADER.size or size > self.capacity:
+                # Return the complete frames preceding the invalid
+                # header first; the error is raised by the next call.
+                if frames:
+                    break
+                self.start = offset
+                if size > self.capacity:
+                    raise ValueError("Frame of {0} octets exceeds the "
+                        "receive buffer".format(size))
+                raise ValueError("Malformed frame header: SIZE={0}"
+                    .format(size))
+            if self.end - offset < size:
+                break
+            if data[offset:offset + 4] != b'AMQP':
+                frames.append(Frame(data[offset:offset + size]))
+            offset += size
+        self.start = offset
+        return frames
+
+    def __len__(self):
+        return self.end - self.start
@@ -0,0 +1,188 @@
+from amqp.factory import create_factory
+from amqp.transport.serial import serial_add
+from amqp.transport.serial import serial_diff
+from amqp.transport.table import HANDLE_MAX
+from amqp.transport.table import NumberTable
+
+
+class LinkFlow(object):
+    """Tracks the flow state of a single link.
+
+    On a receiving link, credit is granted in batches: every incoming
+    transfer consumes one unit of ``link-credit`` and once the remaining
+    credit drops to `low_water` it is topped up to `max_credit`, and the
+    link is flagged as having a pending update. On a sending link, the
+    credit is computed from the ``flow`` frames received from the peer.
+
+    Args:
+        handle: the link handle.
+        max_credit: the credit granted when replenishing.
+        low_water: the remaining credit at which credit is replenished.
+            Defaults to half of `max_credit`.
+        delivery_count: the initial delivery count.
+    """
+
+    def __init__(self, handle, max_credit=1024, low_water=None,
+        delivery_count=0):
+        self.handle = handle
+        self.max_credit = max_credit
+        self.low_water = low_water if (low_water is not None)\
+            else max_credit // 2
+        self.delivery_count = delivery_count
+        self.link_credit = 0
+        self.available = None
+        self.drain = False
+        self.pending = False
+
+    def replenish(self):
+        """Grant :attr:`max_credit` to the sender."""
+        self.link_credit = self.max_credit
+        self.pending = True
+
+    def set_drain(self, drain=True):
+        """Ask the sender to use up or discard all outstanding credit."""
+        self.drain = drain
+        self.pending = True
+
+    def on_transfer(self):
+        """Account for a transfer received on the link. Return ``True``
+        if the credit was replenished.
+        """
+        self.delivery_count = serial_add(self.delivery_count, 1)
+        self.link_credit = max(self.link_credit - 1, 0)
+        if self.link_credit <= self.low_water:
+            self.replenish()
+            return True
+        return False
+
+    def on_send(self):
+        """Account for a transfer sent on the link. Return ``False`` if
+        no credit was available.
+        """
+        if self.link_credit <= 0:
+            return False
+        self.delivery_count = serial_add(self.delivery_count, 1)
+        self.link_credit -= 1
+        return True
+
+    def on_flow(self, delivery_count, link_credit, drain=False):
+        """Update the credit of a sending link from the ``delivery-count``
+        and ``link-credit`` fields of a ``flow`` received from the peer.
+        """
+        if delivery_count is None:
+            delivery_count = self.delivery_count
+        limit = serial_add(delivery_count, link_credit)
+        self.link_credit = max(serial_diff(limit, self.delivery_count), 0)
+        self.drain = bool(drain)
+
+    def __repr__(self):
+        return "<LinkFlow: handle={0} credit={1} delivery-count={2}>"\
+            .format(self.handle, self.link_credit, self.delivery_count)
+
+
+class SessionFlow(object):
+    """Tracks the session windows and the flow state of the links
+    attached to the session, and merges all pending updates into as
+    few ``flow`` frames as possible.
+
+    The incoming window is replenished in batches just like link credit:
+    once the remaining window drops to `low_water` it is reset to
+    `incoming_window`. Multiple updates of the same link between two
+    invocations of :meth:`flush` are sent as a single frame that carries
+    the latest state.
+
+    Args:
+        incoming_window: the maximum number of incoming transfers.
+        outgoing_window: the maximum number of outgoing transfers.
+        next_outgoing_id: the initial outgoing transfer-id.
+        low_water: the remaining incoming window at which it is
+            replenished. Defaults to half of `incoming_window`.
+    """
+    factory = create_factory('flow')
+
+    def __init__(self, incoming_window=2048, outgoing_window=2048,
+        next_outgoing_id=0, low_water=None):
+        self.max_incoming_window = incoming_window
+        self.incoming_window = incoming_window
+        self.outgoing_window = outgoing_window
+        self.next_incoming_id = None
+        self.next_outgoing_id = next_outgoing_id
+        self.low_water = low_water if (low_water is not None)\
+            else incoming_window // 2
+        self.links = NumberTable(HANDLE_MAX, capacity=64)
+        self.pending = False
+
+    def attach(self, link):
+        """Add :class:`LinkFlow` `link` to the session."""
+        self.links.bind(link.handle, link)
+        return link
+
+    def detach(self, handle):
+        """Remove the link identified by `handle` from the session."""
+        return self.links.release(handle)
+
+    def on_begin(self, next_outgoing_id):
+        """Initialize the incoming transfer-id using the
+        ``next-outgoing-id`` of the ``begin`` received from the peer.
+        """
+        self.next_incoming_id = next_outgoing_id
+
+    def on_transfer(self, handle):
+        """Account for an incoming transfer on link `handle`."""
+        if self.next_incoming_id is not None:
+            self.next_incoming_id = serial_add(self.next_incoming_id, 1)
+        self.incoming_window = max(self.incoming_window - 1, 0)
+        if self.incoming_window <= self.low_water:
+            self.incoming_window = self.max_incoming_window
+            self.pending = True
+        self.links[handle].on_transfer()
+
+    def on_send(self, handle):
+        """Account for an outgoing transfer on link `handle`. Return
+        ``False`` if the link has no credit.
+        """
+        if not self.links[handle].on_send():
+            return False
+        self.next_outgoing_id = serial_add(self.next_outgoing_id, 1)
+        return True
+
+    def has_pending(self):
+        """Return ``True`` if :meth:`flush` would produce a frame."""
+        return self.pending or any(x.pending for x in self.links.values())
+
+    def flush(self, send):
+        """Invoke `send` with a ``flow`` frame for every link with a
+        pending update, or with a single session-level ``flow`` frame if
+        only the session windows changed. Return the number of frames
+        sent.
+        """
+        links = [x for x in self.links.values() if x.pending]
+        frames = [self.create_flow(x) for x in links]
+        if self.pending and not frames:
+            frames.append(self.create_flow())
+        for link in links:
+            link.pending = False
+        self.pending = False
+        for frame in frames:
+            send(frame)
+        return len(frames)
+
+    def create_flow(self, link=None):
+        """Create a ``flow`` performative holding the current session
+        state and, if `link` is not ``None``, the state of the link.
+        """
+        params = {
+            'next_incoming_id': self.next_incoming_id,
+            'incoming_window': self.incoming_window,
+            'next_outgoing_id': self.next_outgoing_id,
+            'outgoing_window': self.outgoing_window,
+        }
+        if link is not None:
+            params.update({
+                'handle': link.handle,
+                'delivery_count': link.delivery_count,
+                'link_credit': link.link_credit,
+                'available': link.available,
+                'drain': link.drain or None
+            })
+        return self.factory(**params)
@@ -0,0 +1,146 @@
+import io
+import struct
+
+from amqp.typesystem.decoder import SchemaDecoder
+from amqp.typesystem.node import parse_buffer
+from amqp.typesystem.registry import get_by_constructor
+from amqp.typesystem.stream import decode_constructor_at
+from amqp.typesystem.stream import read_value_at
+
+
+#: The frame header: SIZE, DOFF, TYPE and the type-specific field, which
+#: is the channel for AMQP frames (OASIS 2012: 2.3.1).
+FRAME_HEADER = struct.Struct('!IBBH')
+
+#: The minimum value of DOFF, in 4-octet words.
+MIN_DOFF = 2
+
+#: The frame types.
+AMQP_FRAME = 0x00
+SASL_FRAME = 0x01
+
+#: The length of the protocol header that opens each direction of a
+#: connection (OASIS 2012: 2.2), e.g. ``AMQP\x00\x01\x00\x00``.
+PROTOCOL_HEADER_SIZE = 8
+
+
+class Frame(object):
+    """A frame in a buffer. The header is decoded eagerly; the
+    performative is decoded the first time it is accessed, and the
+    payload is a :class:`memoryview` slice of the buffer.
+
+    Args:
+        buf: an object supporting the buffer protocol, holding exactly
+            one frame.
+    """
+
+    def __init__(self, buf):
+        self.buf = memoryview(buf)
+        self.size, self.doff, self.type, self.channel =\
+            FRAME_HEADER.unpack_from(self.buf)
+        if self.size != len(self.buf) or self.doff < MIN_DOFF:
+            raise ValueError("Malformed frame header: SIZE={0} DOFF={1}"
+                .format(self.size, self.doff))
+        self.body = self.buf[self.doff * 4:]
+        self.end = None
+        self.__performative = None
+
+    @property
+    def extended_header(self):
+        """The extended header, as a :class:`memoryview`."""
+        return self.buf[FRAME_HEADER.size:self.doff * 4]
+
+    @property
+    def performative_name(self):
+        """The type name of the performative, determined from its
+        constructor only, or ``None`` for an empty frame.
+        """
+        if not len(self.body):
+            return None
+        constructor, _ = decode_constructor_at(self.body)
+        return get_by_constructor(constructor).type_name
+
+    @property
+    def performative(self):
+        """The performative, as a :class:`.Composite`, or ``None`` for an
+        empty frame.
+        """
+        if self.__performative is None and len(self.body):
+            # Only the performative is copied, not the payload.
+            buf = io.BytesIO(self.body[:self.get_end()])
+            self.__performative = parse_buffer(buf)\
+                .accept(SchemaDecoder(buf))
+        return self.__performative
+
+    @property
+    def payload(self):
+        """The octets following the performative, as a
+        :class:`memoryview`.
+        """
+        if not len(self.body):
+            return self.body
+        return self.body[self.get_end():]
+
+    def get_end(self):
+        """Return the offset in :attr:`body` of the first octet following
+        the performative, determined from its constructor and size.
+        """
+        if self.end is None:
+            constructor, offset = decode_constructor_at(self.body)
+            _, self.end = read_value_at(constructor.format_code, self.body,
+                offset)
+        return self.end
+
+    def __len__(self):
+        return self.size
+
+    def __repr__(self):
+        return "<Frame: channel={0} size={1} performative={2}>".format(
+            self.channel, self.size, self.performative_name)
+
+
+def frame_size(buf, offset=0):
+    """Return the SIZE of the frame at `offset` in `buf`, or ``None`` if
+    `buf` does not hold the SIZE field. For a protocol header, return
+    :data:`PROTOCOL_HEADER_SIZE`.
+    """
+    if len(buf) - offset < 4:
+        return None
+    if buf[offset:offset + 4] == b'AMQP':
+        return PROTOCOL_HEADER_SIZE
+    return struct.unpack_from('!I', buf, offset)[0]
+
+
+class FrameSplitter(object):
+    """Splits a byte stream, received in chunks of arbitrary size, into
+    frames. Protocol headers are skipped.
+    """
+
+    def __init__(self):
+        self.buf = bytearray()
+
+    def is_protocol_header(self, offset):
+        return self.buf[offset:offset + 4] == b'AMQP'
+
+    def feed(self, data):
+        """Append `data` to the stream. Return a list holding the
+        complete frames, as byte-sequences.
+        """
+        self.buf.extend(data)
+        frames = []
+        offset = 0
+        while True:
+            size = frame_size(self.buf, offset)
+            if size is None or len(self.buf) - offset < size:
+                break
+            if size < FRAME_HEADER.size:
+                raise ValueError("Malformed frame header: SIZE={0}"
+                    .format(size))
+            if not self.is_protocol_header(offset):
+                frames.append(bytes(self.buf[offset:offset + size]))
+            offset += size
+        del self.buf[:offset]
+        return frames
+
+    def __len__(self):
+        return len(self.buf)
@@ -0,0 +1,136 @@
+from amqp import defaults
+from amqp.transport.timer import TimerWheel
+
+
+#: An empty AMQP frame (SIZE=8, DOFF=2, TYPE=0, channel 0), used as
+#: keepalive (OASIS 2012: 2.4.5).
+EMPTY_FRAME = b'\x00\x00\x00\x08\x02\x00\x00\x00'
+
+
+class Heartbeat(object):
+    """Holds the idle-timeout state of a single connection.
+
+    The connection invokes :meth:`received` and :meth:`sent` for every
+    frame; these only store a timestamp, so the timers on the wheel are
+    never rescheduled per frame. When a timer fires, it compares the
+    elapsed time against the timestamps and either acts or places
+    itself back on the wheel for the remaining interval.
+    """
+
+    def __init__(self, monitor, connection, idle_timeout, remote_idle_timeout):
+        self.monitor = monitor
+        self.connection = connection
+        self.idle_timeout = idle_timeout
+        self.remote_idle_timeout = remote_idle_timeout
+        self.last_received = self.last_sent = monitor.wheel.clock()
+        self.timers = []
+        self.closed = False
+
+    @property
+    def keepalive_interval(self):
+        """The interval, in seconds, at which empty frames are sent. The
+        specification recommends half of the idle timeout advertised by
+        the peer.
+        """
+        if self.remote_idle_timeout:
+            return self.remote_idle_timeout / 2000.0
+
+    @property
+    def idle_interval(self):
+        """The local idle timeout, in seconds."""
+        if self.idle_timeout:
+            return self.idle_timeout / 1000.0
+
+    def received(self):
+        """Record that a frame was received from the peer."""
+        self.last_received = self.monitor.wheel.clock()
+
+    def sent(self):
+        """Record that a frame was sent to the peer."""
+        self.last_sent = self.monitor.wheel.clock()
+
+    def start(self):
+        if self.idle_interval:
+            self.timers.append(self.monitor.wheel.schedule(
+                self.idle_interval, self.check_idle))
+        if self.keepalive_interval:
+            self.timers.append(self.monitor.wheel.schedule(
+                self.keepalive_interval, self.check_keepalive))
+
+    def stop(self):
+        """Cancel all timers of the connection."""
+        self.closed = True
+        for timer in self.timers:
+            timer.cancel()
+        del self.timers[:]
+
+    def check_idle(self):
+        if self.closed:
+            return
+        now = self.monitor.wheel.clock()
+        remaining = (self.last_received + self.idle_interval) - now
+        if remaining > 0:
+            self.reschedule(remaining, self.check_idle)
+        else:
+            self.stop()
+            self.monitor.on_idle(self.connection)
+
+    def check_keepalive(self):
+        if self.closed:
+            return
+        now = self.monitor.wheel.clock()
+        remaining = (self.last_sent + self.keepalive_interval) - now
+        if remaining <= 0:
+            self.monitor.send(self.connection, EMPTY_FRAME)
+            self.last_sent = now
+            remaining = self.keepalive_interval
+        self.reschedule(remaining, self.check_keepalive)
+
+    def reschedule(self, delay, callback):
+        self.timers = [x for x in self.timers if x.callback != callback]
+        self.timers.append(self.monitor.wheel.schedule(delay, callback))
+
+
+class HeartbeatMonitor(object):
+    """Sends keepalive frames and detects idle peers for any number of
+    connections using a single :class:`.TimerWheel`.
+
+    Args:
+        send: a callable that is invoked with the connection and the
+            bytes of an empty frame when a keepalive must be sent.
+        on_idle: a callable that is invoked with the connection if no
+            frames were received within the local idle timeout.
+        wheel: a :class:`.TimerWheel` instance. If `wheel` is ``None``,
+            a new instance is created.
+    """
+
+    def __init__(self, send, on_idle, wheel=None):
+        self.send = send
+        self.on_idle = on_idle
+        self.wheel = wheel if (wheel is not None) else TimerWheel()
+        self.connections = {}
+
+    def register(self, connection, idle_timeout=defaults.IDLE_TIMEOUT,
+        remote_idle_timeout=None):
+        """Start monitoring `connection`. The timeouts are specified in
+        milliseconds, like the ``idle-time-out`` field of the ``open``
+        performative; a value of ``None`` or ``0`` disables the
+        respective check. Return the :class:`Heartbeat` for the
+        connection.
+        """
+        heartbeat = Heartbeat(self, connection, idle_timeout,
+            remote_idle_timeout)
+        self.connections[connection] = heartbeat
+        heartbeat.start()
+        return heartbeat
+
+    def unregister(self, connection):
+        """Stop monitoring `connection`."""
+        self.connections.pop(connection).stop()
+
+    def advance(self, now=None):
+        """Advance the underlying :class:`.TimerWheel`."""
+        return self.wheel.advance(now)
+
+    def __len__(self):
+        return len(self.connections)
@@ -0,0 +1,262 @@
+"""Decode large captures of AMQP frames in parallel.
+
+Frames are independent once their boundaries are known. The boundaries
+are found with a single scan that only reads the frame headers (or, for
+traces written by :class:`.TraceWriter`, read from the index). The
+offsets are split into shards that are decoded by a pool of processes;
+each process maps the capture into memory, so the operating system
+shares the pages between them. The results of the shards are merged by
+the collector.
+
+Usage::
+
+    python -m amqp.transport.parallel FILE [--raw] [--workers N]
+        [--columns FILE]
+"""
+import argparse
+import array
+import collections
+import csv
+import functools
+import json
+import mmap
+import multiprocessing
+import sys
+
+from amqp.transport.frame import FRAME_HEADER
+from amqp.transport.frame import Frame
+from amqp.transport.frame import frame_size
+from amqp.transport.trace import TraceReader
+from amqp.utils import compat
+
+
+#: The :mod:`array` typecode of the frame offsets. Python 2 has no
+#: ``Q`` typecode; where its longs are 32 bits, captures of 4GB or more
+#: can not be indexed.
+OFFSET_TYPECODE = 'Q' if 'Q' in getattr(array, 'typecodes', '') else 'L'
+
+
+def index_frames(buf, offset=0):
+    """Scan the raw AMQP byte stream in `buf`, starting at `offset`, and
+    return an :class:`array.array` holding the offset of every complete
+    frame. Only the frame headers are read; protocol headers are skipped.
+    """
+    offsets = array.array(OFFSET_TYPECODE)
+    end = len(buf)
+    while True:
+        size = frame_size(buf, offset)
+        if size is None or end - offset < size:
+            break
+        if size < FRAME_HEADER.size:
+            raise ValueError("Malformed frame header at offset {0}: SIZE={1}"
+                .format(offset, size))
+        if buf[offset:offset + 4] != b'AMQP':
+            offsets.append(offset)
+        offset += size
+    return offsets
+
+
+def index_trace(filepath):
+    """Return an :class:`array.array` holding the offsets of the frames
+    in the frame log of a trace, read from its index.
+    """
+    offsets = array.array(OFFSET_TYPECODE)
+    with TraceReader(filepath) as reader:
+        for i in range(len(reader)):
+            offsets.append(reader.entry(i)[0])
+    return offsets
+
+
+def split(offsets, shards):
+    """Split `offsets` into at most `shards` contiguous slices of equal
+    length.
+    """
+    size = max(1, -(-len(offsets) // max(1, shards)))
+    return [offsets[i:i + size] for i in range(0, len(offsets), size)]
+
+
+class FrameStats(object):
+    """Aggregates the number of frames and octets per performative and
+    the number of frames per channel.
+    """
+
+    def __init__(self):
+        self.frames = collections.Counter()
+        self.octets = collections.Counter()
+        self.payload = collections.Counter()
+        self.channels = collections.Counter()
+        self.errors = 0
+
+    def add(self, offset, frame):
+        performative = frame.performative
+        name = performative.meta.type_name\
+            if performative is not None else 'empty'
+        self.frames[name] += 1
+        self.octets[name] += frame.size
+        self.payload[name] += len(frame.payload)
+        self.channels[frame.channel] += 1
+
+    def error(self, offset, exception):
+        self.errors += 1
+
+    def merge(self, other):
+        """Add the counters of :class:`FrameStats` `other`."""
+        self.frames.update(other.frames)
+        self.octets.update(other.octets)
+        self.payload.update(other.payload)
+        self.channels.update(other.channels)
+        self.errors += other.errors
+        return self
+
+    def as_dict(self):
+        return {
+            'frames': dict(self.frames),
+            'octets': dict(self.octets),
+            'payload': dict(self.payload),
+            'channels': dict((str(k), v) for k, v in self.channels.items()),
+            'errors': self.errors
+        }
+
+
+class FrameColumns(object):
+    """Collects one row per frame, stored as columns: the offset, channel,
+    performative, size and payload size of the frame, followed by the
+    fields in `fields` of the performative (``None`` if the performative
+    has no such field).
+
+    Args:
+        fields: the attribute names of the performative fields to
+            collect.
+    """
+    base_columns = ('offset', 'channel', 'performative', 'size', 'payload')
+
+    def __init__(self, fields=()):
+        self.fields = tuple(fields)
+        self.columns = collections.OrderedDict(
+            (name, []) for name in self.base_columns + self.fields)
+
+    def add(self, offset, frame):
+        performative = frame.performative
+        dto = performative.as_dto() if performative is not None else None
+        row = (offset, frame.channel,
+            performative.meta.type_name if performative is not None else None,
+            frame.size, len(frame.payload))
+        row += tuple(getattr(dto, name, None) for name in self.fields)
+        for column, value in zip(self.columns.values(), row):
+            column.append(value)
+
+    def error(self, offset, exception):
+        pass
+
+    def merge(self, other):
+        """Append the rows of :class:`FrameColumns` `other`."""
+        for name, column in self.columns.items():
+            column.extend(other.columns[name])
+        return self
+
+    def __len__(self):
+        return len(self.columns['offset'])
+
+
+def decode_shard(filepath, offsets, collector):
+    """Decode the frames at `offsets` in the file at `filepath` and return
+    `collector`, a :class:`FrameStats` or :class:`FrameColumns` instance,
+    holding the results. Frames that can not be decoded are reported to
+    the collector with ``error()``.
+
+    The frames passed to the collector reference the mapped file, which
+    is closed before returning; collectors must copy what they keep.
+    """
+    with open(filepath, 'rb') as f:
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = compat.buffer_view(buf)
+    try:
+        for offset in offsets:
+            size = frame_size(view, offset)
+            try:
+                collector.add(offset, Frame(view[offset:offset + size]))
+            except Exception as e:
+                collector.error(offset, e)
+    finally:
+        del view
+        buf.close()
+    return collector
+
+
+def decode_parallel(filepath, collector_factory=FrameStats, raw=False,
+    workers=None, shards=None):
+    """Decode all frames in the file at `filepath` in parallel and return
+    the merged collector.
+
+    Args:
+        filepath: the path of a trace written by :class:`.TraceWriter`,
+            or of a raw AMQP byte stream if `raw` is ``True``.
+        collector_factory: a picklable callable returning the collector
+            of each shard, e.g. :class:`FrameStats` or
+            ``functools.partial(FrameColumns, ['handle'])``.
+        workers: the number of processes; defaults to the number of CPUs.
+            If `workers` is ``0``, the shards are decoded in the current
+            process.
+        shards: the number of shards; defaults to four per worker, so
+            that uneven shards do not leave workers idle.
+    """
+    if raw:
+        with open(filepath, 'rb') as f:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            offsets = index_frames(buf)
+        finally:
+            buf.close()
+    else:
+        offsets = index_trace(filepath)
+
+    if workers == 0:
+        return decode_shard(filepath, offsets, collector_factory())
+
+    workers = workers or multiprocessing.cpu_count()
+    shards = split(offsets, shards or (workers * 4))
+    # concurrent.futures is not available on Python 2.
+    pool = multiprocessing.Pool(workers)
+    try:
+        results = [
+            pool.apply_async(decode_shard,
+                (filepath, x, collector_factory()))
+            for x in shards
+        ]
+        results = [x.get() for x in results]
+    finally:
+        pool.terminate()
+        pool.join()
+    return functools.reduce(lambda a, b: a.merge(b), results,
+        collector_factory())
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog='python -m amqp.transport.parallel')
+    parser.add_argument('filepath')
+    parser.add_argument('--raw', action='store_true',
+        help="the file holds a raw AMQP byte stream instead of a trace")
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--columns', metavar='FILE',
+        help="write one row per frame to FILE, as CSV")
+    parser.add_argument('--field', action='append', default=[],
+        help="add this performative field to the columns")
+    args = parser.parse_args(argv)
+
+    if args.columns is None:
+        stats = decode_parallel(args.filepath, FrameStats, args.raw,
+            args.workers)
+        print(json.dumps(stats.as_dict(), indent=2, sort_keys=True))
+        return 1 if stats.errors else 0
+
+    columns = decode_parallel(args.filepath,
+        functools.partial(FrameColumns, args.field), args.raw, args.workers)
+    with open(args.columns, 'w') as f:
+        writer = csv.writer(f)
+        writer.writerow(list(columns.columns))
+        writer.writerows(zip(*columns.columns.values()))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
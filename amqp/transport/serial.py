@@ -0,0 +1,32 @@
+"""Serial number arithmetic for the AMQP ``sequence-no`` type, as
+defined in RFC 1982 with ``SERIAL_BITS`` set to 32.
+"""
+SERIAL_BITS = 32
+SERIAL_MODULO = 1 << SERIAL_BITS
+SERIAL_HALF = 1 << (SERIAL_BITS - 1)
+
+
+def serial_add(s, n):
+    """Add the non-negative integer `n` to serial number `s`."""
+    if not (0 <= n < SERIAL_HALF):
+        raise ValueError("Serial addend out of range: " + repr(n))
+    return (s + n) % SERIAL_MODULO
+
+
+def serial_diff(a, b):
+    """Return the signed distance from serial number `b` to `a`, i.e.
+    the integer `n` such that ``serial_add(b, n) == a`` for positive
+    distances.
+    """
+    d = (a - b) % SERIAL_MODULO
+    return d - SERIAL_MODULO if d >= SERIAL_HALF else d
+
+
+def serial_lt(a, b):
+    """Return ``True`` if serial number `a` precedes `b`."""
+    return serial_diff(a, b) < 0
+
+
+def serial_le(a, b):
+    """Return ``True`` if serial number `a` precedes or equals `b`."""
+    return serial_diff(a, b) <= 0
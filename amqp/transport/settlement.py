@@ -0,0 +1,178 @@
+import bisect
+
+from amqp.factory import create_factory
+from amqp.transport.serial import SERIAL_MODULO
+from amqp.transport.serial import serial_diff
+from amqp.utils import compat
+
+
+class IntervalSet(object):
+    """A set of serial numbers (see :mod:`.serial`) stored as sorted,
+    non-overlapping and non-adjacent closed ranges ``[first, last]``.
+
+    The members are ordered by serial number arithmetic relative to the
+    first member added since the set was last cleared, so a run of
+    members that wraps around ``2**32 - 1`` is a single range. All
+    members must be within ``2**31 - 1`` of that first member.
+    """
+
+    def __init__(self):
+        self.base = None
+        self.starts = []
+        self.ends = []
+        self.count = 0
+
+    def get_key(self, n):
+        # The signed distance from the first member; keys are ordered
+        # like the serial numbers they represent.
+        if self.base is None:
+            self.base = n
+        return serial_diff(n, self.base)
+
+    def get_serial(self, key):
+        return (self.base + key) % SERIAL_MODULO
+
+    def add(self, n):
+        """Add serial number `n` to the set. Return ``True`` if `n` was
+        not already a member.
+        """
+        starts, ends = self.starts, self.ends
+        n = self.get_key(n)
+        i = bisect.bisect_right(starts, n)
+
+        # The range at i - 1 is the only range that may contain n or
+        # end right before it.
+        if i > 0 and ends[i - 1] >= n:
+            return False
+        joins_left = i > 0 and ends[i - 1] == n - 1
+        joins_right = i < len(starts) and starts[i] == n + 1
+        if joins_left and joins_right:
+            ends[i - 1] = ends[i]
+            del starts[i]
+            del ends[i]
+        elif joins_left:
+            ends[i - 1] = n
+        elif joins_right:
+            starts[i] = n
+        else:
+            starts.insert(i, n)
+            ends.insert(i, n)
+        self.count += 1
+        return True
+
+    def clear(self):
+        """Remove all members from the set."""
+        del self.starts[:]
+        del self.ends[:]
+        self.count = 0
+        self.base = None
+
+    def ranges(self):
+        """Return a list of ``(first, last)`` tuples, in serial number
+        order. `last` is smaller than `first` if the range wraps.
+        """
+        return [(self.get_serial(first), self.get_serial(last))
+            for first, last in zip(self.starts, self.ends)]
+
+    def __contains__(self, n):
+        if self.base is None:
+            return False
+        n = serial_diff(n, self.base)
+        i = bisect.bisect_right(self.starts, n)
+        return i > 0 and self.ends[i - 1] >= n
+
+    def __len__(self):
+        return self.count
+
+    def __repr__(self):
+        return "<IntervalSet: {0}>".format(self.ranges())
+
+
+class SettlementTracker(object):
+    """Collects delivery ids that share the same settlement outcome and
+    settles them with as few ``disposition`` performatives as possible.
+
+    Each contiguous run of pending delivery ids is flushed as a single
+    ``disposition`` with its ``first`` and ``last`` fields set. A flush
+    happens when the number of pending deliveries reaches `max_count`,
+    when the number of ranges (and thus the number of frames a flush
+    would produce) reaches `max_ranges`, or when the oldest pending
+    delivery has waited `max_delay` seconds.
+
+    Args:
+        send: a callable that is invoked with each ``disposition``
+            :class:`.Composite` produced by a flush.
+        role: the role of the link endpoint; ``sender`` or ``receiver``.
+        settled: the value of the ``settled`` field.
+        state: a :class:`.Provider` satisfying ``delivery-state``, or
+            ``None``.
+        max_count: the maximum number of pending deliveries.
+        max_ranges: the maximum number of pending ranges.
+        max_delay: the maximum number of seconds a delivery may remain
+            pending, or ``None`` to disable the time threshold.
+        clock: a callable returning the current time in seconds.
+    """
+    factory = create_factory('disposition')
+
+    def __init__(self, send, role='receiver', settled=True, state=None,
+        max_count=1024, max_ranges=64, max_delay=0.05,
+        clock=compat.monotonic):
+        self.send = send
+        self.role = role
+        self.settled = settled
+        self.state = state
+        self.max_count = max_count
+        self.max_ranges = max_ranges
+        self.max_delay = max_delay
+        self.clock = clock
+        self.pending = IntervalSet()
+        self.since = None
+
+    def settle(self, delivery_id):
+        """Mark `delivery_id` as settled. Return the number of
+        ``disposition`` frames sent as a result.
+        """
+        if not self.pending.add(delivery_id):
+            return 0
+        if self.since is None:
+            self.since = self.clock()
+        if len(self.pending) >= self.max_count\
+        or len(self.pending.starts) >= self.max_ranges:
+            return self.flush()
+        return 0
+
+    def poll(self):
+        """Flush the pending deliveries if the oldest has exceeded
+        :attr:`max_delay`. Return the number of frames sent.
+        """
+        if self.since is None or self.max_delay is None:
+            return 0
+        if (self.clock() - self.since) < self.max_delay:
+            return 0
+        return self.flush()
+
+    def flush(self):
+        """Send a ``disposition`` for every pending range and reset the
+        tracker. Return the number of frames sent.
+        """
+        ranges = self.pending.ranges()
+        self.pending.clear()
+        self.since = None
+        for first, last in ranges:
+            self.send(self.create_disposition(first, last))
+        return len(ranges)
+
+    def create_disposition(self, first, last):
+        """Create a ``disposition`` performative settling the deliveries
+        `first` through `last`.
+        """
+        return self.factory(
+            role=self.role,
+            first=first,
+            last=last if (last != first) else None,
+            settled=self.settled,
+            state=self.state
+        )
+
+    def __len__(self):
+        return len(self.pending)
@@ -0,0 +1,177 @@
+from amqp import defaults
+
+
+#: The maximum value of the ``handle-max`` field of the ``begin``
+#: performative.
+HANDLE_MAX = (1 << 32) - 1
+
+
+class NumberTable(object):
+    """Maps small integers (channel numbers, link handles) to objects
+    using a dense list indexed by number. Numbers released by
+    :meth:`release` are kept on a free list and are handed out again by
+    :meth:`allocate` before any new number is used, so the table stays
+    dense.
+
+    Numbers chosen by the peer may be sparse; numbers that do not fit
+    in `dense_max` slots are stored in a dictionary instead, so that a
+    single large number does not allocate a list of that size.
+
+    Args:
+        maximum: the highest number that may be used.
+        capacity: the initial number of preallocated slots. The list
+            grows by doubling, up to `dense_max` slots.
+        dense_max: the maximum number of slots in the list.
+    """
+
+    def __init__(self, maximum, capacity=None, dense_max=4096):
+        self.maximum = maximum
+        self.dense_max = min(dense_max, maximum + 1)
+        capacity = min(capacity or self.dense_max, self.dense_max)
+        self.slots = [None] * capacity
+        self.sparse = {}
+        self.free = []
+        self.next = 0
+        self.count = 0
+
+    def allocate(self, obj):
+        """Store `obj` under an unused number, preferring numbers that
+        were released earlier. Return the number.
+        """
+        while self.free:
+            number = self.free.pop()
+            if self.slots[number] is None:
+                break
+        else:
+            while self.next <= self.maximum and self.next in self:
+                self.next += 1
+            if self.next > self.maximum:
+                raise OverflowError("No numbers available.")
+            number = self.next
+            self.next += 1
+        self.bind(number, obj)
+        return number
+
+    def bind(self, number, obj):
+        """Store `obj` under the number chosen by the peer."""
+        if not (0 <= number <= self.maximum):
+            raise ValueError("Number out of range: " + repr(number))
+        if number in self:
+            raise KeyError("Number in use: " + repr(number))
+        if number >= self.dense_max:
+            self.sparse[number] = obj
+        else:
+            if number >= len(self.slots):
+                self.grow(number)
+            self.slots[number] = obj
+        self.count += 1
+
+    def release(self, number):
+        """Remove and return the object stored under `number`."""
+        obj = self[number]
+        if number >= self.dense_max:
+            del self.sparse[number]
+        else:
+            self.slots[number] = None
+            self.free.append(number)
+        self.count -= 1
+        return obj
+
+    def grow(self, number):
+        size = len(self.slots) or 1
+        while size <= number:
+            size *= 2
+        size = min(size, self.dense_max)
+        self.slots.extend([None] * (size - len(self.slots)))
+
+    def get(self, number, default=None):
+        """Return the object stored under `number`, or `default`."""
+        if number < 0:
+            return default
+        if number >= self.dense_max:
+            return self.sparse.get(number, default)
+        try:
+            obj = self.slots[number]
+        except IndexError:
+            return default
+        return default if obj is None else obj
+
+    def values(self):
+        """Return a list holding all stored objects, ordered by number."""
+        return [x for x in self.slots if x is not None]\
+            + [self.sparse[x] for x in sorted(self.sparse)]
+
+    def __getitem__(self, number):
+        obj = self.get(number)
+        if obj is None:
+            raise LookupError("Unknown number: " + repr(number))
+        return obj
+
+    def __contains__(self, number):
+        return self.get(number) is not None
+
+    def __len__(self):
+        return self.count
+
+
+class FrameRouter(object):
+    """Routes incoming performatives to the session bound to their
+    channel and, for link-level performatives, to the link bound to
+    their ``handle``, using a :class:`NumberTable` per channel.
+
+    Args:
+        channel_max: the highest channel number.
+        handle_max: the highest link handle.
+        handle_capacity: the number of handle slots preallocated for
+            every session.
+    """
+
+    #: The performatives that are routed to a link, if they carry a
+    #: handle.
+    link_performatives = frozenset(['attach', 'flow', 'transfer', 'detach'])
+
+    def __init__(self, channel_max=defaults.MAX_SESSIONS - 1,
+        handle_max=HANDLE_MAX, handle_capacity=64):
+        self.sessions = NumberTable(channel_max)
+        self.links = [None] * (channel_max + 1)
+        self.handle_max = handle_max
+        self.handle_capacity = handle_capacity
+
+    def begin(self, channel, session):
+        """Bind `session` to the incoming `channel`."""
+        self.sessions.bind(channel, session)
+        self.links[channel] = NumberTable(self.handle_max,
+            capacity=self.handle_capacity)
+
+    def end(self, channel):
+        """Unbind and return the session bound to `channel`."""
+        session = self.sessions.release(channel)
+        self.links[channel] = None
+        return session
+
+    def attach(self, channel, handle, link):
+        """Bind `link` to `handle` on the session bound to `channel`."""
+        self.get_links(channel).bind(handle, link)
+
+    def detach(self, channel, handle):
+        """Unbind and return the link bound to `handle` on `channel`."""
+        return self.get_links(channel).release(handle)
+
+    def get_links(self, channel):
+        links = self.links[channel] if channel in self.sessions else None
+        if links is None:
+            raise LookupError("Unknown channel: " + repr(channel))
+        return links
+
+    def route(self, channel, performative):
+        """Return a tuple holding the session and the link to which
+        `performative`, received on `channel`, must be dispatched. The
+        link is ``None`` for session-level performatives.
+        """
+        session = self.sessions[channel]
+        link = None
+        if performative.meta.type_name in self.link_performatives:
+            handle = performative.get('handle')
+            if handle is not None:
+                link = self.get_links(channel)[handle]
+        return session, link
@@ -0,0 +1,98 @@
+import math
+
+from amqp.utils import compat
+
+
+class Timer(object):
+    """A callback scheduled on a :class:`TimerWheel`."""
+
+    def __init__(self, deadline, callback, args):
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        """Prevent the timer from firing."""
+        self.cancelled = True
+
+    def __repr__(self):
+        return "<Timer: deadline={0} cancelled={1}>"\
+            .format(self.deadline, self.cancelled)
+
+
+class TimerWheel(object):
+    """A hashed timing wheel. Timers are placed in the slot that matches
+    their expiry tick, so scheduling and cancelling are O(1) and each
+    tick only visits the timers in a single slot, regardless of the total
+    number of timers. Timers that expire more than one revolution ahead
+    stay in their slot until the wheel has turned far enough.
+
+    The wheel does not run by itself; :meth:`advance` must be invoked
+    periodically (e.g. from a single event loop callback per process)
+    with the current time.
+
+    Args:
+        resolution: the duration of a tick, in seconds.
+        slots: the number of slots on the wheel.
+        clock: a callable returning the current time in seconds.
+    """
+
+    def __init__(self, resolution=0.1, slots=512, clock=compat.monotonic):
+        self.resolution = resolution
+        self.clock = clock
+        self.slots = [[] for _ in range(slots)]
+        self.tick = int(self.clock() / resolution)
+        self.count = 0
+
+    def schedule(self, delay, callback, *args):
+        """Invoke `callback` with `args` after `delay` seconds. Return a
+        :class:`Timer` that may be used to cancel the callback.
+        """
+        timer = Timer(self.clock() + delay, callback, args)
+        self.add(timer)
+        return timer
+
+    def add(self, timer):
+        """Place :class:`Timer` `timer` on the wheel."""
+        # A timer never fires before its deadline, so round up and
+        # never schedule it in the current (already processed) tick.
+        expires = max(
+            int(math.ceil(timer.deadline / self.resolution)), self.tick + 1)
+        self.slots[expires % len(self.slots)].append(timer)
+        self.count += 1
+
+    def advance(self, now=None):
+        """Advance the wheel to `now` and run all expired timers. Return
+        the number of timers that fired.
+        """
+        if now is None:
+            now = self.clock()
+        fired = 0
+        target = int(now / self.resolution)
+        while self.tick < target:
+            self.tick += 1
+            fired += self.expire(self.tick, now)
+        return fired
+
+    def expire(self, tick, now):
+        slot = self.slots[tick % len(self.slots)]
+        if not slot:
+            return 0
+        due = []
+        remaining = []
+        for timer in slot:
+            if timer.cancelled:
+                self.count -= 1
+            elif timer.deadline <= now:
+                due.append(timer)
+            else:
+                remaining.append(timer)
+        slot[:] = remaining
+        for timer in due:
+            self.count -= 1
+            timer.callback(*timer.args)
+        return len(due)
+
+    def __len__(self):
+        return self.count
@@ -0,0 +1,266 @@
+"""Capture AMQP frames to a trace file and replay them through the
+decoder.
+
+A trace consists of two files. The frame log (`filepath`) holds the
+frames, each prefixed by its length. The index (`filepath` + ``.idx``)
+holds a fixed-size entry for every frame with its offset in the log,
+its timestamp, the channel, the direction and the frame type, so that
+frames can be located and filtered without reading the log. Both files
+start with a magic number; all integers are big-endian.
+
+:class:`TraceWriter` is invoked by the transport for every frame sent
+or received (or fed the raw byte stream). :class:`TraceReader` maps both
+files into memory and returns :class:`TracedFrame` instances holding
+:class:`memoryview` slices of the log; frames are only decoded when
+their performative is accessed. A mapping stays alive as long as frames
+reference it, also after the reader is closed; copy the frames that are
+kept with ``frame.buf.tobytes()`` so that the file can be unmapped.
+
+Usage::
+
+    python -m amqp.transport.trace FILE [--channel N]
+        [--performative NAME] [--speed FACTOR] [--quiet]
+"""
+import argparse
+import mmap
+import struct
+import sys
+import time
+
+from amqp.transport.frame import Frame
+from amqp.transport.frame import FrameSplitter
+from amqp.utils import compat
+
+
+#: The magic numbers of the frame log and the index.
+LOG_MAGIC = b'AMQPTRC\x01'
+INDEX_MAGIC = b'AMQPIDX\x01'
+
+#: The length prefix of a frame in the log.
+RECORD_HEADER = struct.Struct('!I')
+
+#: An index entry: the offset of the frame in the log (after the length
+#: prefix), the timestamp in seconds since the epoch, the channel, the
+#: direction and the frame type.
+INDEX_ENTRY = struct.Struct('!QdHBB')
+
+#: The direction of a frame.
+RECEIVED = 0
+SENT = 1
+
+
+class TraceWriter(object):
+    """Appends frames to a trace.
+
+    Args:
+        filepath: the path of the frame log; the index is written to
+            `filepath` + ``.idx``.
+        clock: returns the current time, in seconds since the epoch.
+    """
+
+    def __init__(self, filepath, clock=time.time):
+        self.filepath = filepath
+        self.clock = clock
+        self.log = open(filepath, 'wb')
+        self.index = open(filepath + '.idx', 'wb')
+        self.log.write(LOG_MAGIC)
+        self.index.write(INDEX_MAGIC)
+        self.offset = len(LOG_MAGIC)
+        self.count = 0
+        self.splitters = {RECEIVED: FrameSplitter(), SENT: FrameSplitter()}
+
+    def write(self, frame, direction=RECEIVED, timestamp=None):
+        """Append `frame`, an object supporting the buffer protocol that
+        holds a complete frame, to the trace.
+        """
+        frame = Frame(frame)
+        if timestamp is None:
+            timestamp = self.clock()
+        self.log.write(RECORD_HEADER.pack(frame.size))
+        self.log.write(frame.buf)
+        self.index.write(INDEX_ENTRY.pack(self.offset + RECORD_HEADER.size,
+            timestamp, frame.channel, direction, frame.type))
+        self.offset += RECORD_HEADER.size + frame.size
+        self.count += 1
+
+    def received(self, frame):
+        """Append `frame`, which was received from the peer."""
+        self.write(frame, RECEIVED)
+
+    def sent(self, frame):
+        """Append `frame`, which was sent to the peer."""
+        self.write(frame, SENT)
+
+    def feed(self, data, direction=RECEIVED):
+        """Append the frames in `data`, a chunk of the byte stream read
+        from or written to the socket. Incomplete frames are buffered
+        until the next invocation; protocol headers are not traced.
+        """
+        for frame in self.splitters[direction].feed(data):
+            self.write(frame, direction)
+
+    def flush(self):
+        self.log.flush()
+        self.index.flush()
+
+    def close(self):
+        self.log.close()
+        self.index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class TracedFrame(Frame):
+    """A :class:`.Frame` read from a trace."""
+
+    def __init__(self, buf, timestamp, direction):
+        Frame.__init__(self, buf)
+        self.timestamp = timestamp
+        self.direction = direction
+
+
+class TraceReader(object):
+    """Reads a trace written by :class:`TraceWriter`. The frame log and
+    the index are memory-mapped; frames are read on access.
+
+    Args:
+        filepath: the path of the frame log.
+    """
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.log = self.map(filepath, LOG_MAGIC)
+        self.index = self.map(filepath + '.idx', INDEX_MAGIC)
+        self.count = (len(self.index) - len(INDEX_MAGIC)) // INDEX_ENTRY.size
+
+    def map(self, filepath, magic):
+        with open(filepath, 'rb') as f:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if buf[:len(magic)] != magic:
+            buf.close()
+            raise ValueError("Not a trace file: {0}".format(filepath))
+        return buf
+
+    def entry(self, i):
+        """Return the index entry of frame `i` as a tuple holding the
+        offset, timestamp, channel, direction and frame type.
+        """
+        if not (0 <= i < self.count):
+            raise IndexError(i)
+        return INDEX_ENTRY.unpack_from(self.index,
+            len(INDEX_MAGIC) + i * INDEX_ENTRY.size)
+
+    def frame(self, entry):
+        offset, timestamp, _, direction, _ = entry
+        size, = RECORD_HEADER.unpack_from(self.log, offset - RECORD_HEADER.size)
+        return TracedFrame(compat.buffer_view(self.log)[offset:offset + size],
+            timestamp, direction)
+
+    def frames(self, channel=None, performatives=None, direction=None):
+        """Iterate over the frames, optionally only those on `channel`,
+        those sent in `direction` and those carrying one of the
+        performatives named in `performatives`. The channel and direction
+        are matched using the index; performatives are matched by their
+        constructor, without decoding the frame.
+        """
+        for i in range(self.count):
+            entry = self.entry(i)
+            if channel is not None and entry[2] != channel:
+                continue
+            if direction is not None and entry[3] != direction:
+                continue
+            frame = self.frame(entry)
+            if performatives is not None\
+            and frame.performative_name not in performatives:
+                continue
+            yield frame
+
+    def close(self):
+        """Unmap the trace. If frames returned by the reader are still
+        referenced, the frame log is unmapped when the last of them is
+        released.
+        """
+        for buf in (self.log, self.index):
+            try:
+                buf.close()
+            except BufferError:
+                # The mmap can not be closed while memoryviews of it
+                # exist; it is closed when it is garbage-collected.
+                pass
+
+    def __getitem__(self, i):
+        return self.frame(self.entry(i))
+
+    def __iter__(self):
+        return self.frames()
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def replay(frames, handler, speed=None, clock=time.time, sleep=time.sleep):
+    """Invoke `handler` with each frame in `frames`. If `speed` is
+    ``None``, frames are replayed as fast as possible; otherwise the
+    recorded intervals between the frames are divided by `speed`.
+    Return the number of frames replayed.
+    """
+    count = 0
+    started = first = None
+    for frame in frames:
+        if speed is not None:
+            if started is None:
+                started, first = clock(), frame.timestamp
+            delay = (frame.timestamp - first) / speed - (clock() - started)
+            if delay > 0:
+                sleep(delay)
+        handler(frame)
+        count += 1
+    return count
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog='python -m amqp.transport.trace')
+    parser.add_argument('filepath')
+    parser.add_argument('--channel', type=int)
+    parser.add_argument('--performative', action='append',
+        help="only replay frames carrying this performative")
+    parser.add_argument('--direction', choices=['received', 'sent'])
+    parser.add_argument('--speed', type=float,
+        help="replay at the recorded speed multiplied by this factor; by "
+             "default, frames are replayed as fast as possible")
+    parser.add_argument('--quiet', action='store_true',
+        help="only print the number of frames and the throughput")
+    args = parser.parse_args(argv)
+    direction = None if args.direction is None\
+        else (RECEIVED if args.direction == 'received' else SENT)
+
+    def handler(frame):
+        performative = frame.performative
+        if not args.quiet:
+            sys.stdout.write("{0:.6f} {1} {2} {3!r}\n".format(
+                frame.timestamp, '<' if frame.direction == RECEIVED else '>',
+                frame.channel,
+                performative.as_dto() if performative is not None else None))
+
+    with TraceReader(args.filepath) as reader:
+        started = time.time()
+        count = replay(reader.frames(args.channel, args.performative,
+            direction), handler, args.speed)
+        elapsed = time.time() - started
+    sys.stderr.write("{0} frames in {1:.3f}s ({2:.0f} frames/s)\n".format(
+        count, elapsed, count / elapsed if elapsed else 0))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -1,17 +1,29 @@
 import os
 
 from amqp.typesystem.basetypes import encodable_factory
+from amqp.typesystem.cache import EncodingCache
+from amqp.typesystem.columnar import ColumnDecoder
 from amqp.typesystem.decoder import RawDecoder
 from amqp.typesystem.decoder import SchemaDecoder
 from amqp.typesystem.encoder import Encoder
+from amqp.typesystem.encoder import ScatterEncoder
 from amqp.typesystem.encoder import SchemaEncoder
+from amqp.typesystem.encoder import SizeVisitor
+from amqp.typesystem.encoder import encoded_size
+from amqp.typesystem.events import EventReader
+from amqp.typesystem.instrument import CallbackInstrumentation
+from amqp.typesystem.instrument import CodecStats
+from amqp.typesystem.instrument import Instrumentation
+from amqp.typesystem.limits import DecodeLimits
 from amqp.typesystem.loader import SchemaLoader
 from amqp.typesystem.node import parse_buffer
+from amqp.typesystem.profiler import SamplingProfiler
 from amqp.typesystem import registry
 
 
 __all__ = [
     'encodable_factory',
+    'encoded_size',
     'parse_buffer',
     'load_schema',
     'load_xml'
@@ -24,6 +36,7 @@ load_schema = default_loader.load_file
 load_xml = default_loader.load_xml
 load_schema(os.path.join(os.path.dirname(__file__), 'types.xml'))
 load_schema(os.path.join(os.path.dirname(__file__), 'transport.xml'))
+load_schema(os.path.join(os.path.dirname(__file__), 'messaging.xml'))
 
 
 def encodable(type_name, value):
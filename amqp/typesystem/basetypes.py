@@ -1,13 +1,29 @@
 from collections import Iterable
 from collections import Mapping
 import collections
+import decimal
+import uuid
 
 from amqp.const import NOT_PROVIDED
 from amqp.typesystem.datastructures import TypeIdentifier
 from amqp.typesystem.provider import Provider
+from amqp.utils import compat
 
 
 class Encodable(object):
+    #: The encoded representation of a scalar value, cached by
+    #: :class:`.SizeVisitor` as a tuple holding the cache key of the
+    #: encoder and the encoded bytes.
+    encoded = None
+
+    #: ``True`` if the :class:`Encodable` can not be modified. Frozen
+    #: instances may be cached by an :class:`.EncodingCache`, keyed on
+    #: :meth:`get_key`.
+    frozen = False
+
+    #: The number of nested collections in a frozen :class:`Encodable`,
+    #: set by :meth:`freeze`; ``0`` for scalar values.
+    depth = 0
 
     @property
     def value(self):
@@ -17,6 +33,29 @@ class Encodable(object):
         self.__value = value
         self.__in_array = False
 
+    def freeze(self):
+        """Prevent further modification of the :class:`Encodable`. Return
+        the instance.
+        """
+        self.frozen = True
+        return self
+
+    def get_key(self):
+        """Return a hashable object that is equal for :class:`Encodable`
+        instances with the same encoded representation.
+
+        The keys of collections are nested tuples. They are built without
+        recursion, but Python compares and hashes them recursively, so
+        the keys of values nested deeper than the recursion limit can
+        not be compared.
+        """
+        raise NotImplementedError
+
+    def check_frozen(self):
+        if self.frozen:
+            raise TypeError(
+                "Frozen {0} can not be modified.".format(type(self).__name__))
+
     def accept(self, encoder):
         """Accepts a visitor."""
         return encoder.visit(self)
@@ -39,6 +78,12 @@ class Encodable(object):
         """Return ``True`` if the :class:`AMQPType` is a ``list``."""
         return self.get_source() == 'list'
 
+    def is_composite(self):
+        """Return ``True`` if the :class:`Encodable` is an instance of a
+        composite type.
+        """
+        return False
+
     def add_to_array(self, array):
         """Add the :class:`.Encodable` to an ``array``."""
         self.__in_array = True
@@ -80,15 +125,65 @@ class AMQPType(Encodable):
     def __init__(self, type_identifier, value, **kwargs):
         assert isinstance(type_identifier, TypeIdentifier), value
         self.type_identifier = type_identifier
+        self.__key = None
         Encodable.__init__(self, value)
 
+    def as_dto(self):
+        """Project the :class:`Encodable` as a Data Transfer Object (DTO)."""
+        return fold(self, lambda x: x.is_scalar(), lambda x: x.as_dto(),
+            lambda x, members, values: x.build_dto(values))
+
+    def build_dto(self, values):
+        """Return the Data Transfer Object (DTO) of the collection, given
+        the DTOs of its members.
+        """
+        return values
+
+    def get_key(self):
+        if self.__key is not None:
+            return self.__key
+        return fold(self, lambda x: x.frozen, lambda x: x.get_key(),
+            lambda x, members, keys: x.build_key(keys))
+
+    def build_key(self, keys):
+        """Return the key of the collection, given the keys of its
+        members.
+        """
+        return (self.type_identifier, tuple(keys))
+
+    def freeze(self):
+        """Prevent further modification of the :class:`Encodable` and its
+        members. Return the instance.
+        """
+        if not self.frozen:
+            fold(self, lambda x: x.frozen, lambda x: x.get_key(),
+                lambda x, members, keys: x.freeze_members(members, keys))
+        return self
+
+    def freeze_members(self, members, keys):
+        """Freeze the collection, whose `members` are already frozen and
+        have `keys`. Return the key of the collection.
+        """
+        Encodable.freeze(self)
+        self.depth = 1 + max([x.depth for x in members] or [0])
+        self.__key = self.build_key(keys)
+        return self.__key
+
 
 class Null(AMQPType):
     # A special type representing the NULL value.
 
+    frozen = True
+
     def __init__(self, *args, **kwargs):
         AMQPType.__init__(self, TypeIdentifier('null', None, None, None), None)
 
+    def get_key(self):
+        return (self.type_identifier,)
+
+    def freeze(self):
+        return self
+
     def as_dto(self):
         """Project the :class:`Encodable` as a Data Transfer Object (DTO)."""
         return None
@@ -108,10 +203,22 @@ class Null(AMQPType):
 
 
 class Scalar(AMQPType):
+    # The value of a Scalar is immutable.
+    frozen = True
 
     def __init__(self, *args, **kwargs):
         super(Scalar, self).__init__(*args, **kwargs)
 
+    def get_key(self):
+        # Values that compare equal may have a different encoding, e.g.
+        # 0.0 and -0.0, or Decimal('1.0') and Decimal('1.00').
+        if isinstance(self.value, (float, decimal.Decimal)):
+            return (self.type_identifier, repr(self.value))
+        return (self.type_identifier, self.value)
+
+    def freeze(self):
+        return self
+
     def as_dto(self):
         """Project the :class:`Encodable` as a Data Transfer Object (DTO)."""
         return self.value
@@ -133,16 +240,13 @@ class Array(AMQPType):
         for member in members:
             member.add_to_array(self)
 
-    def as_dto(self):
-        """Project the :class:`Encodable` as a Data Transfer Object (DTO)."""
-        return [x.as_dto() for x in self.value]
-
     def is_empty(self):
         """Return ``True`` if the :class:`Encodable` is empty."""
         return len(self) == 0
 
     def append(self, value):
         """Append a value to the array."""
+        self.check_frozen()
         source = value.get_source()
         if self.__member_type is None:
             self.__member_type = source
@@ -166,6 +270,7 @@ class List(AMQPType):
         super(List, self).__init__(type_identifier, members, **kwargs)
 
     def pop(self, *args):
+        self.check_frozen()
         return self.value.pop(*args)
 
     def is_empty(self):
@@ -183,11 +288,42 @@ class List(AMQPType):
 
 
 class Map(AMQPType):
+    __members = None
+
+    def build_dto(self, values):
+        """Return the Data Transfer Object (DTO) of the map, given the
+        DTOs of its alternating keys and values.
+        """
+        return dict(zip(values[::2], values[1::2]))
 
     def is_empty(self):
         """Return ``True`` if the :class:`Encodable` is empty."""
         return len(self) == 0
 
+    def freeze_members(self, members, keys):
+        """Freeze the :class:`Map`. The members are created and frozen
+        once, and are reused by all iterations.
+        """
+        self.__members = members
+        return AMQPType.freeze_members(self, members, keys)
+
+    def __iter__(self):
+        # Decoded maps hold their keys and values as a flat list of
+        # Encodable instances, maps created from Python code hold a
+        # dictionary. Both are iterated as alternating keys and values,
+        # which is the order in which they are encoded.
+        if self.__members is not None:
+            for member in self.__members:
+                yield member
+            return
+        if not isinstance(self.value, Mapping):
+            for member in self.value:
+                yield member
+            return
+        for key, value in self.value.items():
+            yield infer_encodable(key)
+            yield infer_encodable(value)
+
     def __len__(self):
         return len(self.value)
 
@@ -230,15 +366,12 @@ class Composite(List, Provider):
         assert self.meta is not None
         Provider.__init__(self, self.meta.provides)
         List.__init__(self, *args, **kwargs)
+        self.__count = 0
 
-    def as_dto(self):
-        """Project the :class:`Composite` as a Data Transfer Object
-        (DTO).
+    def build_dto(self, values):
+        """Return the Data Transfer Object (DTO) of the
+        :class:`Composite`, given the DTOs of its fields.
         """
-        values = []
-        for field in self.meta.fields:
-            values.append(
-                self.value[field.index].as_dto())
         return self.meta.dto_class(*values)
 
     def get(self, field_name, encodable=False):
@@ -252,8 +385,20 @@ class Composite(List, Provider):
 
     def set(self, field_name, value):
         """Set field `field_name` of the composite type to `value`."""
+        self.check_frozen()
         field = self.meta.get_field(field_name)
-        self.value[field.index] = field.clean(value)
+        value = self.value[field.index] = field.clean(value)
+        if not value.is_empty():
+            self.__count = max(self.__count, field.index + 1)
+        elif field.index + 1 == self.__count:
+            while self.__count > 0 and self.value[self.__count - 1].is_empty():
+                self.__count -= 1
+
+    def get_field_count(self):
+        """Return the number of fields up to and including the last
+        non-NULL field. Trailing NULL fields may be omitted when encoding.
+        """
+        return self.__count
 
     def get_source(self):
         """Return a string representing the source (primitive) AMQP type
@@ -267,15 +412,24 @@ class Composite(List, Provider):
         # provided as Null objects.
         return False
 
+    def is_composite(self):
+        """Return ``True`` if the :class:`Encodable` is an instance of a
+        composite type.
+        """
+        return True
+
     def append(self, value):
         """Appends a value to the Composite type instance. The clean()
         method of the declared fields is invoked if the input value is
         not a :class:`.Encodable` instance.
         """
+        self.check_frozen()
         if not isinstance(value, Encodable):
             field = self.meta.fields[len(self.value)]
             value = field.clean(value)
         self.value.append(value)
+        if not value.is_empty():
+            self.__count = len(self.value)
 
     def __repr__(self):
         return "<Composite: {0}>".format(repr(self.value))
@@ -296,6 +450,10 @@ class RestrictedArray(Array, Provider):
 
 class Restricted(Encodable, Provider):
 
+    @property
+    def type_name(self):
+        return self.__meta.type_name
+
     @property
     def descriptor(self):
         """Return a :class:`Scalar` instance representing the descriptor."""
@@ -314,10 +472,35 @@ class Restricted(Encodable, Provider):
         Provider.__init__(self, meta.provides)
         Encodable.__init__(self, encodable.value)
 
+    @property
+    def frozen(self):
+        return self.__encodable.frozen
+
+    @property
+    def depth(self):
+        return self.__encodable.depth
+
+    def freeze(self):
+        self.__encodable.freeze()
+        return self
+
+    def get_key(self):
+        return (self.__meta.type_name, self.__encodable.get_key())
+
+    def build_key(self, keys):
+        return (self.__meta.type_name, self.__encodable.build_key(keys))
+
+    def freeze_members(self, members, keys):
+        self.__encodable.freeze_members(members, keys)
+        return self.get_key()
+
     def as_dto(self):
         """Project the :class:`Encodable` as a Data Transfer Object (DTO)."""
         return self.__encodable.as_dto()
 
+    def build_dto(self, values):
+        return self.__encodable.build_dto(values)
+
     def is_empty(self):
         """Return ``True`` if the :class:`Encodable` is empty."""
         # Restricted types are always scalar values, so never
@@ -328,12 +511,54 @@ class Restricted(Encodable, Provider):
         """Return a string representing the source (primitive) AMQP type
         of the :class:`Encodable`.
         """
-        return self.__meta.get_source()
+        return self.__encodable.get_source()
+
+    def __iter__(self):
+        # Restricted types may restrict a collection type (e.g. the
+        # fields type restricts map), in which case the members are
+        # those of the wrapped Encodable.
+        return iter(self.__encodable)
+
+    def __getitem__(self, key):
+        return self.__encodable[key]
 
     def __repr__(self):
         return repr(self.value)
 
 
+def fold(encodable, is_leaf, leaf, combine):
+    """Compute a value for the collection `encodable` from the values of
+    its members, bottom-up. Nested collections are visited using an
+    explicit stack instead of recursion, so the nesting depth is not
+    limited by the recursion limit.
+
+    Args:
+        is_leaf: returns ``True`` for the members whose value is computed
+            by `leaf` instead of from their own members. Must return
+            ``True`` for scalar values.
+        leaf: computes the value of a member.
+        combine: computes the value of a collection, given the
+            collection, the list of its members and the list of their
+            values.
+    """
+    stack = [(encodable, iter(encodable), [], [])]
+    while True:
+        parent, iterator, members, values = stack[-1]
+        for member in iterator:
+            members.append(member)
+            if is_leaf(member):
+                values.append(leaf(member))
+                continue
+            stack.append((member, iter(member), [], []))
+            break
+        else:
+            stack.pop()
+            value = combine(parent, members, values)
+            if not stack:
+                return value
+            stack[-1][3].append(value)
+
+
 TYPE_MAP = collections.defaultdict(lambda: Scalar, {
     'map': Map,
     'list': List,
@@ -341,6 +566,38 @@ TYPE_MAP = collections.defaultdict(lambda: Scalar, {
 })
 
 
+def infer_encodable(value):
+    """Return an :class:`.Encodable` holding the Python object `value`,
+    with the AMQP type inferred from the Python type. :class:`.Encodable`
+    instances are returned unchanged.
+    """
+    if isinstance(value, Encodable):
+        return value
+    if value is None:
+        return Null()
+    if isinstance(value, bool):
+        type_name = 'boolean'
+    elif isinstance(value, compat.integer_types):
+        type_name = 'long'
+    elif isinstance(value, float):
+        type_name = 'double'
+    elif isinstance(value, bytes):
+        type_name = 'binary'
+    elif isinstance(value, compat.unicode):
+        type_name = 'string'
+    elif isinstance(value, uuid.UUID):
+        type_name = 'uuid'
+    elif isinstance(value, Mapping):
+        type_name = 'map'
+    elif isinstance(value, (list, tuple)):
+        type_name = 'list'
+        value = [infer_encodable(x) for x in value]
+    else:
+        raise TypeError(
+            "Can not infer AMQP type of " + type(value).__name__)
+    return encodable_factory(type_name, value)
+
+
 def encodable_factory(type_name, value, nd=None, sd=None, _in_array=False):
     """Create a new :class:`.Encodable` instance of the specified `type_name`
     containing `value`.
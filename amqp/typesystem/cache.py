@@ -0,0 +1,101 @@
+import collections
+
+
+class EncodingCache(object):
+    """A bounded least-recently-used cache of encoded byte-sequences,
+    keyed by the :meth:`~.Encodable.get_key` of frozen :class:`.Encodable`
+    instances.
+
+    The cache is bounded by the number of entries and by the total
+    length of the cached byte-sequences; the least recently used entries
+    are evicted first. Encoded values longer than `max_item_size` are
+    not cached, and neither are scalar values of types that are
+    typically unique per frame (integers, binaries), so that
+    high-cardinality input does not evict the values that repeat.
+    Collections nested deeper than `max_depth` are not cached either,
+    because their keys are compared recursively.
+
+    Args:
+        max_entries: the maximum number of cached values.
+        max_bytes: the maximum total length of the cached values.
+        max_item_size: the maximum length of a single cached value.
+        max_depth: the maximum number of nested collections in a
+            cached value.
+    """
+
+    #: The source types of the scalar (and restricted scalar) values that
+    #: are cached. Collections are cached regardless of their members.
+    scalar_types = frozenset(['string', 'symbol'])
+
+    def __init__(self, max_entries=1024, max_bytes=1 << 20,
+        max_item_size=4096, max_depth=32):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.max_item_size = min(max_item_size, max_bytes)
+        self.max_depth = max_depth
+        self.entries = collections.OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def accepts(self, encodable):
+        """Return ``True`` if the encoded representation of `encodable`
+        may be cached.
+        """
+        if not encodable.frozen or encodable.depth > self.max_depth:
+            return False
+        return not encodable.is_scalar()\
+            or encodable.get_source() in self.scalar_types
+
+    def get(self, key):
+        """Return the byte-sequence cached for `key`, or ``None``."""
+        try:
+            encoded = self.entries.pop(key)
+        except KeyError:
+            self.misses += 1
+            return None
+        except TypeError:
+            # The value of the Encodable is not hashable.
+            return None
+
+        # Re-insert the entry to mark it as the most recently used.
+        self.entries[key] = encoded
+        self.hits += 1
+        return encoded
+
+    def put(self, key, encoded):
+        """Cache byte-sequence `encoded` for `key`."""
+        if len(encoded) > self.max_item_size:
+            return
+        try:
+            previous = self.entries.pop(key, None)
+        except TypeError:
+            return
+        if previous is not None:
+            self.size -= len(previous)
+        self.entries[key] = encoded
+        self.size += len(encoded)
+        while len(self.entries) > self.max_entries\
+        or self.size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+            self.evictions += 1
+
+    def clear(self):
+        """Remove all entries and reset the counters."""
+        self.entries.clear()
+        self.size = self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """Return a dictionary holding the counters of the cache."""
+        return {
+            'entries': len(self.entries),
+            'size': self.size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
+
+    def __len__(self):
+        return len(self.entries)
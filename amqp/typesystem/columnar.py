@@ -0,0 +1,229 @@
+"""Decode many encoded values of the same composite type into columns.
+
+:class:`ColumnDecoder` reads the fields of each encoded composite
+directly from the byte-sequence, using the field layout of its
+:class:`.Meta`; no :class:`.Node`, :class:`.Composite` or
+:class:`.Scalar` instances are created for fields of primitive types.
+Numeric fields are stored in :class:`array.array` columns, other fields
+in lists.
+"""
+import array
+import io
+
+from amqp.exc import DecodeError
+from amqp.typesystem import const
+from amqp.typesystem.decoder import RawDecoder
+from amqp.typesystem.decoder import SchemaDecoder
+from amqp.typesystem.node import parse_buffer
+from amqp.typesystem.registry import get_by_constructor
+from amqp.typesystem.registry import get_by_type_name
+from amqp.typesystem.stream import decode_constructor_at
+from amqp.typesystem.stream import read_uint
+from amqp.typesystem.stream import read_value_at
+from amqp.typesystem.utils import get_type_length
+from amqp.typesystem.utils import is_collection
+from amqp.utils import compat
+
+
+#: The primitive types that are stored in an :class:`array.array`,
+#: mapped to their width in octets and whether they are signed. Floating
+#: point types are mapped to their typecode instead.
+NUMERIC_TYPES = {
+    'boolean'   : (1, False),
+    'ubyte'     : (1, False),
+    'ushort'    : (2, False),
+    'uint'      : (4, False),
+    'ulong'     : (8, False),
+    'byte'      : (1, True),
+    'short'     : (2, True),
+    'int'       : (4, True),
+    'long'      : (8, True),
+    'timestamp' : (8, True),
+    'float'     : 'f',
+    'double'    : 'd',
+}
+
+
+def get_typecode(source):
+    """Return the :mod:`array` typecode of the smallest item type that
+    holds values of primitive type `source`, or ``None`` if the values
+    can not be stored in an :class:`array.array`.
+    """
+    spec = NUMERIC_TYPES.get(source)
+    if spec is None or isinstance(spec, str):
+        return spec
+    width, signed = spec
+    for typecode in ('bhilq' if signed else 'BHILQ'):
+        try:
+            if array.array(typecode).itemsize >= width:
+                return typecode
+        except ValueError:
+            # The q and Q typecodes are not available on Python 2.
+            continue
+
+
+class Column(object):
+    """The values of a single field. Values of numeric fields are stored
+    in :attr:`values`, an :class:`array.array`; NULL values are stored as
+    zero and flagged in :attr:`nulls`. Other values are stored in a list,
+    with NULL values as ``None``.
+    """
+
+    def __init__(self, field, source, typecode):
+        self.field = field
+        self.source = source
+        self.typecode = typecode
+        self.values = array.array(typecode) if typecode else []
+        self.nulls = array.array('B') if typecode else None
+
+    @property
+    def attname(self):
+        return self.field.attname
+
+    def append(self, value):
+        if self.typecode is None:
+            self.values.append(value)
+            return
+        if value is None:
+            self.values.append(0)
+            self.nulls.append(1)
+            return
+        try:
+            self.values.append(value)
+        except (TypeError, OverflowError):
+            raise DecodeError("Invalid value for {0}: {1!r}".format(
+                self.attname, value))
+        self.nulls.append(0)
+
+    def pop(self):
+        """Remove the last value."""
+        self.values.pop()
+        if self.nulls is not None:
+            self.nulls.pop()
+
+    def tolist(self):
+        """Return the values as a list, with NULL values as ``None``."""
+        if self.typecode is None:
+            return list(self.values)
+        return [None if null else value
+            for value, null in zip(self.values, self.nulls)]
+
+    def __len__(self):
+        return len(self.values)
+
+    def __repr__(self):
+        return "<Column: {0}>".format(self.attname)
+
+
+class ColumnDecoder(object):
+    """Decodes encoded values of composite type `type_name` into columns.
+
+    Values of restricted types are stored as their source value, e.g. the
+    ``role`` field of a ``disposition`` as a boolean. Fields that are not
+    of a primitive type (e.g. the ``state`` of a ``transfer``) are decoded
+    with a :class:`.SchemaDecoder` and stored as Data Transfer Objects.
+
+    Args:
+        type_name: the name of the composite type.
+        fields: the attribute names of the fields to decode; the other
+            fields are skipped without being decoded. Defaults to all
+            fields.
+    """
+
+    def __init__(self, type_name, fields=None):
+        self.meta = get_by_type_name(type_name)
+        if self.meta.type_class != 'composite':
+            raise TypeError("Not a composite type: {0}".format(type_name))
+        names = self.meta.get_field_names()
+        unknown = set(fields or []) - set(names)
+        if unknown:
+            raise TypeError("Unknown fields: {0}".format(sorted(unknown)))
+        self.columns = []
+        self.slots = [None] * len(names)
+        for field in self.meta.fields:
+            if fields is not None and field.attname not in fields:
+                continue
+            source = None
+            if field.type_name != '*' and not field.multiple:
+                source = get_by_type_name(field.type_name).get_source()
+            column = Column(field, source, get_typecode(source))
+            self.columns.append(column)
+            self.slots[names.index(field.attname)] = column
+        self.count = 0
+
+    def __getitem__(self, attname):
+        for column in self.columns:
+            if column.attname == attname:
+                return column
+        raise KeyError(attname)
+
+    def decode(self, encoded):
+        """Decode `encoded`, an object supporting the buffer protocol
+        holding a single value of the composite type, and append its
+        fields to the columns.
+        """
+        view = memoryview(encoded)
+        ctr, offset = decode_constructor_at(view)
+        if get_by_constructor(ctr) is not self.meta:
+            raise DecodeError("Expected {0}, got {1}".format(
+                self.meta.type_name, get_by_constructor(ctr).type_name))
+
+        count = 0
+        if ctr.format_code != const.LIST0:
+            width = get_type_length(ctr.format_code)
+            count = read_uint(view, offset + width, width)
+            offset += 2 * width
+
+        # The row is decoded before it is appended, so that a malformed
+        # value does not leave the columns with different lengths.
+        # Trailing NULL fields may be omitted by the encoder.
+        slots = self.slots
+        row = [None] * len(slots)
+        for i in range(count):
+            column = slots[i] if i < len(slots) else None
+            if column is None:
+                member, offset = decode_constructor_at(view, offset)
+                offset = read_value_at(member.format_code, view, offset)[1]
+                continue
+            row[i], offset = self.decode_member(view, offset, column)
+
+        appended = []
+        try:
+            for column, value in zip(slots, row):
+                if column is not None:
+                    column.append(value)
+                    appended.append(column)
+        except DecodeError:
+            for column in appended:
+                column.pop()
+            raise
+        self.count += 1
+
+    def decode_member(self, view, offset, column):
+        ctr, start = decode_constructor_at(view, offset)
+        if ctr.format_code == const.NULL and ctr.descriptor is None:
+            return None, start
+        value, end = read_value_at(ctr.format_code, view, start)
+        if column.source is None or ctr.descriptor is not None\
+        or is_collection(ctr.format_code):
+            buf = io.BytesIO(view[offset:end])
+            return parse_buffer(buf).accept(SchemaDecoder(buf)).as_dto(), end
+        return RawDecoder.decode(ctr.format_code, compat.tobytes(value)),\
+            end
+
+    def decode_many(self, values):
+        """Decode every encoded value in iterable `values`. Return the
+        :class:`ColumnDecoder`.
+        """
+        for encoded in values:
+            self.decode(encoded)
+        return self
+
+    def as_dict(self):
+        """Return a dictionary mapping the attribute names of the fields to
+        their :class:`Column`.
+        """
+        return dict((x.attname, x) for x in self.columns)
+
+    def __len__(self):
+        return self.count
@@ -30,12 +30,19 @@ TypeIdentifier = collections.namedtuple(
 
 
 BaseConstructor = collections.namedtuple('Constructor',
-    ['format_code','symbolic','numeric']
+    ['format_code','symbolic','numeric','descriptor']
 )
 
 
 class Constructor(BaseConstructor):
 
+    def __new__(cls, format_code, symbolic=None, numeric=None,
+        descriptor=None):
+        # descriptor holds the raw bytes of the descriptor, including the
+        # leading 0x00, for described types.
+        return BaseConstructor.__new__(cls, format_code, symbolic, numeric,
+            descriptor)
+
     @property
     def width(self):
         return get_type_length(self.format_code)
@@ -7,7 +7,10 @@ import uuid
 from amqp.exc import DecodeError
 from amqp.typesystem import const
 from amqp.typesystem import basetypes
+from amqp.typesystem.instrument import timer
 from amqp.typesystem.registry import get_by_constructor
+from amqp.typesystem.registry import get_by_format_code
+from amqp.typesystem.stream import SYMBOLS
 from amqp.utils import compat
 
 
@@ -20,6 +23,10 @@ def decode_string(encoding, format_code, value):
     return value.decode(encoding)
 
 
+def decode_symbol(format_code, value):
+    return SYMBOLS.decode(value)
+
+
 def decode_integer(signed, format_code, value):
     return compat.from_bytes(value, 'big', signed=signed)
 
@@ -43,6 +50,17 @@ def decode_uuid(format_code, value):
 
 
 class RawDecoder(object):
+    """Decodes a tree of :class:`.Node` instances into :class:`.Encodable`
+    instances.
+
+    Args:
+        buf: the file-like object holding the encoded values.
+        instrumentation: an :class:`.Instrumentation` that is notified of
+            every decoded value. If `instrumentation` is ``None``, the
+            instrumentation installed with :func:`.instrument.install` is
+            used, if any.
+    """
+    instrumentation = None
     __decoders = {
         const.NULL      : decode_null,
         const.BOOLEAN   : decode_boolean,
@@ -71,8 +89,8 @@ class RawDecoder(object):
         const.VBIN8     : decode_binary,
         const.STR8      : functools.partial(decode_string, 'utf-8'),
         const.STR32     : functools.partial(decode_string, 'utf-8'),
-        const.SYM8      : functools.partial(decode_string, 'ascii'),
-        const.SYM32     : functools.partial(decode_string, 'ascii'),
+        const.SYM8      : decode_symbol,
+        const.SYM32     : decode_symbol,
     }
     __encodables = collections.defaultdict(lambda: basetypes.Scalar, {
         'null'  : basetypes.Null,
@@ -90,9 +108,11 @@ class RawDecoder(object):
             raise DecodeError(format_code, raw_value)
         return cls.__decoders[format_code](format_code, raw_value)
 
-    def __init__(self, buf):
+    def __init__(self, buf, instrumentation=None):
         self.buf = buf
         self.current = None
+        if instrumentation is not None:
+            self.instrumentation = instrumentation
 
     def value_from_node(self, node):
         """Extract the AMQP-encoded value from the buffer and coerce it to the
@@ -102,19 +122,48 @@ class RawDecoder(object):
         return self.encodable_factory(node, value)
 
     def visit(self, node):
+        if self.instrumentation is not None:
+            return self.visit_instrumented(node)
         return self.visit_scalar(node)\
             if node.is_scalar()\
             else self.visit_collection(node)
 
+    def visit_instrumented(self, node):
+        start = timer()
+        encodable = self.visit_scalar(node)\
+            if node.is_scalar()\
+            else self.visit_collection(node)
+        self.instrumentation.decoded(encodable, node.end - node.start,
+            timer() - start)
+        return encodable
+
     def visit_scalar(self, node):
         """Visit a node representing a scalar value."""
         return self.value_from_node(node)
 
     def visit_collection(self, node):
-        """Visit a :class:`.Node` representing a collection type."""
+        """Visit a :class:`.Node` representing a collection type. Nested
+        collections are decoded using an explicit stack instead of
+        recursion.
+        """
         assert any([node.is_list(), node.is_map(), node.is_array()])
-        value = self.encodable_factory(node, [x.accept(self) for x in node])
-        return value
+        stack = [(node, iter(node.children), [])]
+        while True:
+            parent, children, values = stack[-1]
+            for child in children:
+                # Instrumented decoders visit every member, so that
+                # each collection is timed.
+                if child.is_scalar() or self.instrumentation is not None:
+                    values.append(child.accept(self))
+                    continue
+                stack.append((child, iter(child.children), []))
+                break
+            else:
+                stack.pop()
+                value = self.encodable_factory(parent, values)
+                if not stack:
+                    return value
+                stack[-1][2].append(value)
 
     def encodable_factory(self, node, value):
         """Return the appropriate :class:`.Encodable` instance for the given
@@ -132,4 +181,8 @@ class SchemaDecoder(RawDecoder):
         :class:`.Node` `node`.
         """
         meta = get_by_constructor(node.ctr)
+        if meta.is_polymorphic():
+            # The type of the value is not known from the schema, so
+            # derive it from the format code before restricting it.
+            value = get_by_format_code(node.format_code).create(value)
         return meta.create(value)
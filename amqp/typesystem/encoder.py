@@ -2,6 +2,7 @@ import functools
 import struct
 
 from amqp.typesystem import const
+from amqp.typesystem.instrument import timer
 from amqp.utils import compat
 
 
@@ -22,7 +23,7 @@ def encode_int(signed, length, small, zero, value):
     if zero and value == 0:
         return b''
 
-    if ((signed and value < 128) or (not signed and value < 256))\
+    if ((signed and -128 <= value < 128) or (not signed and value < 256))\
     and small:
         length = 1
     return compat.to_bytes(value, length, 'big', signed=signed)
@@ -68,6 +69,11 @@ def encode_constructor(default, short, zero, length, n=None, descriptor=None):
     format_code = default
     if length == 0 and zero:
         format_code = zero
+    elif short and (short >> 4) <= 0x9:
+        # The short encoding of a fixed-width type (e.g. smalluint) is
+        # only applicable if the value was encoded as a single octet.
+        if length == 1:
+            format_code = short
     elif max(length + 1, count) < 256 and short:
         format_code = short
 
@@ -81,18 +87,34 @@ def encode_constructor(default, short, zero, length, n=None, descriptor=None):
 
 
 class Encoder(object):
+    """Encodes :class:`.Encodable` instances.
+
+    Args:
+        compact: if ``True``, use the smallest legal encoding for every
+            value: ``true`` and ``false`` for booleans and ``list0`` for
+            empty lists. If ``False``, booleans are encoded with the
+            ``boolean`` format code and empty lists as ``list8``.
+        cache: an :class:`.EncodingCache` holding the encoded
+            representation of frozen values, or ``None``.
+        instrumentation: an :class:`.Instrumentation` that is notified of
+            every encoded value. If `instrumentation` is ``None``, the
+            instrumentation installed with :func:`.instrument.install` is
+            used, if any.
+    """
+    instrumentation = None
+
     __encoders = {
         'null'      : lambda *a, **k: b'\x40',
         'boolean'   : encode_boolean,
         'byte'      : functools.partial(encode_int, True, 1, False, False),
         'short'     : functools.partial(encode_int, True, 2, False, False),
-        'int'       : functools.partial(encode_int, True, 4, True, True),
-        'long'      : functools.partial(encode_int, True, 8, True, True),
+        'int'       : functools.partial(encode_int, True, 4, True, False),
+        'long'      : functools.partial(encode_int, True, 8, True, False),
         'ubyte'     : functools.partial(encode_int, False, 1, False, False),
         'ushort'    : functools.partial(encode_int, False, 2, False, False),
         'uint'      : functools.partial(encode_int, False, 4, True, True),
         'ulong'     : functools.partial(encode_int, False, 8, True, True),
-        'timestamp' : functools.partial(encode_int, False, 8, True, True),
+        'timestamp' : functools.partial(encode_int, True, 8, False, False),
         'float'     : functools.partial(encode_ieee754_binary, 'f'),
         'double'    : functools.partial(encode_ieee754_binary, 'd'),
         'uuid'      : encode_uuid,
@@ -119,9 +141,23 @@ class Encoder(object):
         'string'    : functools.partial(encode_constructor, const.STR32, const.STR8, None),
         'symbol'    : functools.partial(encode_constructor, const.SYM32, const.SYM8, None),
         'list'      : functools.partial(encode_constructor, const.LIST32, const.LIST8, const.LIST0),
+        'map'       : functools.partial(encode_constructor, const.MAP32, const.MAP8, None),
         'array'     : functools.partial(encode_constructor, const.ARRAY32, const.ARRAY8, None),
     }
 
+    def __init__(self, compact=True, cache=None, instrumentation=None):
+        self.compact = compact
+        self.cache = cache
+        if instrumentation is not None:
+            self.instrumentation = instrumentation
+
+    @property
+    def cache_key(self):
+        """Identifies the encoded bytes produced by this encoder in the
+        cache of scalar values populated by :class:`SizeVisitor`.
+        """
+        return 'compact' if self.compact else 'default'
+
     def encode(self, encodable, with_constructor):
         """Encodes an encodable object.
 
@@ -134,22 +170,46 @@ class Encoder(object):
             bytes
         """
         constructor = b''
+        if with_constructor and self.compact\
+        and encodable.get_source() == 'boolean':
+            # The true and false format codes have an empty value.
+            format_code = const.TRUE if encodable.value else const.FALSE
+            descriptor = self.encode_descriptor(encodable)
+            format_code = compat.to_bytes(format_code, 1, 'big')
+            return format_code if (descriptor is None)\
+                else b'\x00' + descriptor + format_code
+
         value = self.get_encoder(encodable)(encodable.value)
         if with_constructor:
-            sub, constructor = self.encode_constructor(encodable, value)
-
-            # Prepend the length for variable length types, and the length
-            # and count for collection types.
-            if sub <= 0x9: # Empty or not variable, nothing to do
-                pass
-            elif sub == 0xA: # variable-one
-                constructor += compat.to_bytes(len(value), 1, 'big')
-            elif sub == 0xB: # variable-four
-                constructor += compat.to_bytes(len(value), 4, 'big')
-            else:
-                raise NotImplementedError(hex(sub), value, encodable)
+            constructor = self.encode_prefix(encodable, value)
         return constructor + value
 
+    def encode_prefix(self, encodable, value):
+        """Encode the constructor of `encodable` and, for variable length
+        types, the length of the encoded `value`.
+
+        Args:
+            encodable: an :class:`.Encodable` instance.
+            value: a byte-sequence representing the AMQP-encoded
+                presentation of `encodable`.
+
+        Returns:
+            bytes
+        """
+        sub, constructor = self.encode_constructor(encodable, value)
+
+        # Prepend the length for variable length types, and the length
+        # and count for collection types.
+        if sub <= 0x9: # Empty or not variable, nothing to do
+            pass
+        elif sub == 0xA: # variable-one
+            constructor += compat.to_bytes(len(value), 1, 'big')
+        elif sub == 0xB: # variable-four
+            constructor += compat.to_bytes(len(value), 4, 'big')
+        else:
+            raise NotImplementedError(hex(sub), value, encodable)
+        return constructor
+
     def encode_constructor(self, encodable, value, count=None):
         """Encode the constructor for the given `value`.
 
@@ -163,13 +223,18 @@ class Encoder(object):
             bytes
         """
         size = len(value)
-        descriptor = None
-        if encodable.descriptor:
-            descriptor = encodable.descriptor.accept(self)
         return self._encode_constructor(
-            encodable.get_source(), size, count, descriptor
+            encodable.get_source(), size, count,
+            self.encode_descriptor(encodable)
         )
 
+    def encode_descriptor(self, encodable):
+        """Return the encoded descriptor of `encodable`, or ``None`` if it
+        is not described.
+        """
+        if encodable.descriptor:
+            return encodable.descriptor.accept(self)
+
     def _encode_constructor(self, type_name, size, count, descriptor):
         return self.__constructors[type_name]\
             (size, count, descriptor)
@@ -180,27 +245,90 @@ class Encoder(object):
 
     def visit(self, encodable):
         """Visits a :class:`.Encodable`."""
+        if self.instrumentation is not None:
+            return self.visit_instrumented(encodable)
+        if self.cache is not None and self.cache.accepts(encodable):
+            return self.visit_cached(encodable)
         return self.visit_scalar(encodable)\
             if encodable.is_scalar()\
             else self.visit_collection(encodable)
 
+    def visit_instrumented(self, encodable):
+        start = timer()
+        if self.cache is not None and self.cache.accepts(encodable):
+            encoded = self.visit_cached(encodable)
+        elif encodable.is_scalar():
+            encoded = self.visit_scalar(encodable)
+        else:
+            encoded = self.visit_collection(encodable)
+        self.instrumentation.encoded(encodable, self.get_length(encoded),
+            timer() - start)
+        return encoded
+
+    def get_length(self, encoded):
+        """Return the number of octets in the result of :meth:`visit`."""
+        return len(encoded)
+
+    def visit_cached(self, encodable):
+        # Members of an array are encoded without constructor.
+        key = (self.cache_key, encodable.is_array_member(),
+            encodable.get_key())
+        encoded = self.cache.get(key)
+        if encoded is None:
+            encoded = self.visit_scalar(encodable)\
+                if encodable.is_scalar()\
+                else self.visit_collection(encodable)
+            self.cache.put(key, encoded)
+        return encoded
+
     def visit_scalar(self, encodable):
-        return self.encode(encodable, not encodable.is_array_member())
+        if encodable.is_array_member():
+            return self.encode(encodable, False)
+        if encodable.encoded is not None\
+        and encodable.encoded[0] == self.cache_key:
+            return encodable.encoded[1]
+        return self.encode(encodable, True)
 
     def visit_collection(self, encodable):
-        """Encode all members of the collection and calculate the length and
-        count. For ``array`` instances, back-calculate the format codes for
-        its members.
+        """Encode all members of the collection with
+        :meth:`encode_collection`. Nested collections are encoded using
+        an explicit stack instead of recursion. If the encoder is
+        instrumented, nested collections are timed from the moment they
+        are pushed until they are popped.
         """
-        if encodable.is_list() and len(encodable) > 0:
-            # For composite instances, NULL members after the mandatory fields
-            # may be omitted. At this point, the composite is considered
-            # validated so the trailing NULL members can be safely removed.
-
-            while encodable[-1].is_empty():
-                encodable.pop()
-            pass
+        stack = [(encodable, iter(self.get_members(encodable)), [], None)]
+        while True:
+            parent, members, encoded, start = stack[-1]
+            for member in members:
+                if member.is_scalar() or not self.encodes_inline(member):
+                    encoded.append(member.accept(self))
+                    continue
+                stack.append((member, iter(self.get_members(member)), [],
+                    timer() if self.instrumentation is not None else None))
+                break
+            else:
+                stack.pop()
+                value = self.encode_collection(parent, encoded)
+                if not stack:
+                    return value
+                if start is not None:
+                    self.instrumentation.encoded(parent,
+                        self.get_length(value), timer() - start)
+                stack[-1][2].append(value)
+
+    def encodes_inline(self, encodable):
+        """Return ``True`` if the collection `encodable`, a member of
+        another collection, is encoded on the stack of
+        :meth:`visit_collection` instead of being visited. Cached values
+        are visited.
+        """
+        return self.cache is None or not self.cache.accepts(encodable)
 
+    def encode_collection(self, encodable, members):
+        """Calculate the length and count of the collection `encodable`,
+        whose members are encoded as `members`. For ``array`` instances,
+        back-calculate the format codes for its members.
+        """
         # If the encodable is an array and it has no members, retur NULL. This
         # is a quick fix to prevent undecodable byte-sequences. Since the logic
         # below determines the member constructor based on the largest member,
@@ -211,49 +339,94 @@ class Encoder(object):
         if encodable.is_array() and len(encodable) == 0:
             return b'\x40'
 
-        members = [x.accept(self) for x in encodable]
         count = len(members)
         body = b''
         if encodable.is_array() and count > 0:
             # For array types, calculate the constructor based on the length
             # of the largest member.
-            largest = max(members)
+            largest = max(members, key=len)
             ref_member = encodable[members.index(largest)]
+            if not largest and not ref_member.is_empty():
+                # Array members can not have a zero-width encoding (e.g.
+                # uint0), use the single-octet encoding instead.
+                largest = b'\x00'
             sub, ref_ctr = self.encode_constructor(
                 ref_member, largest
             )
 
-            # For variable types, encode the length for each member.
+            # For variable types, encode the length for each member. Fixed
+            # width members (e.g. smalluint and uint) are widened to the
+            # width of the largest member.
             if sub in (0xA, 0xB):
                 body = b''.join([self._encode_length(sub, x) for x in members])
             else:
-                body = b''.join(members)
+                body = b''.join([
+                    self._widen(ref_member, x, len(largest)) for x in members
+                ])
             body = ref_ctr + body
 
         else:
             body = b''.join(members)
 
-        # The size is the length of the body, plus one octed for the format
-        # code. If the size exceeds 255, an unsigned integer (4 octets) is
-        # used to indicate the size and count.
-        size = len(body) + 1
+        return self.encode_compound(encodable, len(body), count) + body
+
+    def get_members(self, encodable):
+        """Return the members of the collection `encodable` that must be
+        encoded.
+        """
+        if encodable.is_composite():
+            # For composite instances, NULL members after the mandatory fields
+            # may be omitted. The composite keeps track of its last non-NULL
+            # field, so it is not modified and may be encoded again.
+            count = encodable.get_field_count()
+            if count < len(encodable):
+                return encodable.value[:count]
+        return encodable
+
+    def encode_compound(self, encodable, length, count):
+        """Encode the constructor, size and count of the compound type
+        `encodable`, whose encoded members (and, for arrays, the member
+        constructor) are `length` octets long.
+
+        Args:
+            encodable: an :class:`.Encodable` instance.
+            length: the length of the encoded members.
+            count: the number of members.
+
+        Returns:
+            bytes
+        """
+        # The size is the length of the body, plus one octet for the count.
+        # If the size or count exceeds 255, an unsigned integer (4 octets)
+        # is used to indicate the size and count, and the format code
+        # must be the four-octet variant.
+        if self.compact and count == 0 and encodable.get_source() == 'list':
+            return self._encode_constructor('list', 0, None,
+                self.encode_descriptor(encodable))[1]
+
+        size = length + 1
         width = 1
-        if size > 255:
+        if size > 255 or count > 255:
             size += 3
             width = 4
 
-        # Get the subcategory and the constructor for the collection. The size and
-        # count are now known. The width of the length and count indicators is
-        # determined by the size.
-        body = compat.to_bytes(size, width, 'big')\
-            + compat.to_bytes(count, width, 'big')\
-            + body
-
-        # Finally, encode the constructor. The format code is automatically
-        # chosen based on the length of the body.
-        sub, ctr = self.encode_constructor(encodable, body)
-
-        return ctr + body
+        # The constructor encoder derives the format code from a length;
+        # pass a nominal length that selects the variant matching `width`.
+        sub, ctr = self._encode_constructor(encodable.get_source(),
+            1 if width == 1 else 256, None, self.encode_descriptor(encodable))
+        return ctr\
+            + compat.to_bytes(size, width, 'big')\
+            + compat.to_bytes(count, width, 'big')
+
+    def _widen(self, encodable, value, width):
+        # Sign-extend or zero-extend a big-endian integer to `width` octets.
+        if len(value) == width:
+            return value
+        pad = b'\x00'
+        if encodable.get_source() in ('byte', 'short', 'int', 'long', 'timestamp')\
+        and value and compat.octet(value[:1]) >= 0x80:
+            pad = b'\xff'
+        return pad * (width - len(value)) + value
 
     def _encode_length(self, sub, value):
         # Encode the length for variable-one and variable-four
@@ -264,3 +437,174 @@ class Encoder(object):
 
 class SchemaEncoder(Encoder):
     pass
+
+
+class SizeVisitor(object):
+    """Computes the length of the encoded representation of an
+    :class:`.Encodable` using the format code selection rules and the
+    trailing-NULL trimming of `encoder`, without joining the encoded
+    members of collections.
+
+    The encoded bytes of scalar values are cached on the (immutable)
+    :class:`.Encodable`, so that encoding it after computing its size
+    does not encode the scalar values again. ``binary`` values are
+    measured without being copied, and are not cached.
+
+    Args:
+        encoder: the :class:`Encoder` whose output is measured.
+    """
+
+    def __init__(self, encoder=None):
+        self.encoder = encoder or SchemaEncoder()
+
+    def visit(self, encodable):
+        """Visits a :class:`.Encodable`. Return its encoded length."""
+        return self.visit_scalar(encodable)\
+            if encodable.is_scalar()\
+            else self.visit_collection(encodable)
+
+    def visit_scalar(self, encodable):
+        cache_key = self.encoder.cache_key
+        if encodable.encoded is not None and encodable.encoded[0] == cache_key:
+            return len(encodable.encoded[1])
+        if encodable.get_source() == 'binary':
+            return len(self.encoder.encode_prefix(encodable, encodable.value))\
+                + len(encodable.value)
+        encoded = self.encoder.visit_scalar(encodable)
+        if isinstance(encoded, bytes):
+            # Encoders such as ScatterEncoder do not return a
+            # byte-sequence, which can not be reused by other encoders.
+            encodable.encoded = (cache_key, encoded)
+        return self.encoder.get_length(encoded)
+
+    def visit_collection(self, encodable):
+        """Return the encoded length of the collection `encodable`. Nested
+        collections are measured using an explicit stack instead of
+        recursion.
+        """
+        if encodable.is_array():
+            # The width of the members of an array depends on all members,
+            # so arrays are measured by encoding them.
+            return self.encoder.get_length(
+                self.encoder.visit_collection(encodable))
+        get_members = self.encoder.get_members
+        stack = [(encodable, iter(get_members(encodable)), [])]
+        while True:
+            parent, members, sizes = stack[-1]
+            for member in members:
+                if member.is_scalar() or member.is_array():
+                    sizes.append(member.accept(self))
+                    continue
+                stack.append((member, iter(get_members(member)), []))
+                break
+            else:
+                stack.pop()
+                length = sum(sizes)
+                size = len(self.encoder.encode_compound(parent, length,
+                    len(sizes))) + length
+                if not stack:
+                    return size
+                stack[-1][2].append(size)
+
+
+def encoded_size(encodable, encoder=None):
+    """Return the length of the encoded representation of `encodable`;
+    see :class:`SizeVisitor`.
+    """
+    return encodable.accept(SizeVisitor(encoder))
+
+
+class BufferList(list):
+    """A list of byte-sequences that together hold an encoded value,
+    ready for ``socket.sendmsg()`` or ``writelines()``.
+
+    Small byte-sequences are copied into a shared :class:`bytearray`,
+    large ones are referenced as-is. :attr:`size` holds the total
+    number of octets.
+    """
+
+    def __init__(self):
+        list.__init__(self)
+        self.size = 0
+        self.packed = set()
+
+    def add(self, buf, copy=True):
+        """Append byte-sequence `buf`. If `copy` is ``True``, `buf` is
+        packed together with the preceding small byte-sequences.
+        """
+        if not copy:
+            self.append(buf)
+        elif self and id(self[-1]) in self.packed:
+            self[-1].extend(buf)
+        else:
+            self.append(bytearray(buf))
+            self.packed.add(id(self[-1]))
+        self.size += len(buf)
+
+    def merge(self, other):
+        """Append the byte-sequences of :class:`BufferList` `other`."""
+        for buf in other:
+            self.add(buf, copy=id(buf) in other.packed)
+
+    def tobytes(self):
+        return compat.join_bytes(self)
+
+
+class ScatterEncoder(SchemaEncoder):
+    """An :class:`Encoder` that returns a :class:`BufferList` instead of
+    a byte-sequence.
+
+    ``binary`` and ``string`` values of at least `threshold` octets are
+    referenced by the list instead of being copied into the encoded
+    representation of their constructor and the enclosing collections;
+    the sizes and counts of the collections are computed from the
+    lengths of the members.
+
+    Args:
+        threshold: the minimum length of the values that are not
+            copied.
+    """
+
+    def __init__(self, threshold=1024, compact=True, instrumentation=None):
+        SchemaEncoder.__init__(self, compact, instrumentation=instrumentation)
+        self.threshold = threshold
+
+    def get_length(self, encoded):
+        return encoded.size
+
+    def visit_scalar(self, encodable):
+        buffers = BufferList()
+        if encodable.get_source() in ('binary', 'string')\
+        and not encodable.is_array_member():
+            value = self.get_encoder(encodable)(encodable.value)
+            if len(value) >= self.threshold:
+                buffers.add(self.encode_prefix(encodable, value))
+                buffers.add(value, copy=False)
+                return buffers
+        buffers.add(SchemaEncoder.visit_scalar(self, encodable))
+        return buffers
+
+    def visit_collection(self, encodable):
+        if encodable.is_array():
+            # Array members share a constructor that depends on the
+            # encoded members, so arrays are always packed.
+            buffers = BufferList()
+            buffers.add(SchemaEncoder(self.compact).visit(encodable))
+            return buffers
+        return SchemaEncoder.visit_collection(self, encodable)
+
+    def encodes_inline(self, encodable):
+        return not encodable.is_array()\
+            and SchemaEncoder.encodes_inline(self, encodable)
+
+    def encode_collection(self, encodable, members):
+        buffers = BufferList()
+        buffers.add(self.encode_compound(encodable,
+            sum(x.size for x in members), len(members)))
+        for member in members:
+            buffers.merge(member)
+        return buffers
+
+    def encode_descriptor(self, encodable):
+        if encodable.descriptor:
+            return encodable.descriptor.accept(SchemaEncoder(self.compact))
@@ -0,0 +1,187 @@
+"""An event-driven decoder for AMQP-encoded data streams.
+
+:class:`EventReader` reads the encoded values in a file-like object one
+constructor at a time and emits an event for each, without building a
+tree of :class:`.Node` instances. Only the sizes and counts of the
+enclosing collections are kept, so memory use does not depend on the
+size of the data. After a ``start_*`` event, the consumer may invoke
+:meth:`EventReader.skip` to move past the collection using its size
+indicator, without decoding its members.
+
+The events are tuples whose first item is the event name:
+
+``('described', descriptor)``
+    The next value is described by `descriptor` (a symbol or an
+    unsigned long).
+``('scalar', type_name, value)``
+    A value of primitive type `type_name`.
+``('start_list', count)``
+    A list of `count` members.
+``('start_map', count)``
+    A map of `count` key/value pairs; keys and values alternate.
+``('start_array', count, member_ctr)``
+    An array of `count` members, which are all encoded with the
+    :class:`.Constructor` `member_ctr`.
+``('end',)``
+    The end of the innermost collection.
+"""
+import io
+
+from amqp.typesystem import const
+from amqp.typesystem.decoder import RawDecoder
+from amqp.typesystem.stream import decode_constructor
+from amqp.typesystem.stream import read_stream
+from amqp.typesystem.utils import get_type_length
+from amqp.typesystem.utils import get_type_name
+from amqp.typesystem.utils import is_collection
+from amqp.utils import compat
+
+
+DESCRIBED = 'described'
+SCALAR = 'scalar'
+START_LIST = 'start_list'
+START_MAP = 'start_map'
+START_ARRAY = 'start_array'
+END = 'end'
+
+#: The size of the chunks in which skipped values are read from streams
+#: that do not support seeking.
+CHUNK_SIZE = 64 * 1024
+
+
+class EventReader(object):
+    """Emits decoding events for the values in file-like object `buf`,
+    from its current position until the end of the stream.
+
+    Args:
+        buf: a file-like object; it must support ``read()``, and should
+            support ``seek()`` for efficient skipping.
+    """
+
+    def __init__(self, buf):
+        self.buf = buf
+        self.position = 0
+        self.stack = []
+        self.started = False
+        self.skipping = False
+        try:
+            self.seekable = buf.seekable()
+        except AttributeError:
+            self.seekable = hasattr(buf, 'seek')
+
+    def read(self, n):
+        data = self.buf.read(n)
+        if len(data) != n:
+            raise EOFError("End of AMQP-encoded datastream")
+        self.position += n
+        return data
+
+    def skip(self):
+        """Skip the members of the collection whose ``start_*`` event was
+        emitted last. No ``end`` event is emitted for it.
+        """
+        if not self.started:
+            raise RuntimeError("No collection to skip.")
+        self.skipping = True
+
+    def seek(self, end):
+        """Advance the stream to position `end`.
+
+        Raises:
+            EOFError: the stream ends before `end`.
+        """
+        n = end - self.position
+        if n > 0 and self.seekable:
+            # Seeking past the end of a file succeeds; read the last
+            # octet to detect a truncated stream.
+            self.buf.seek(n - 1, io.SEEK_CUR)
+            if len(self.buf.read(1)) != 1:
+                raise EOFError("End of AMQP-encoded datastream")
+        else:
+            while n > 0:
+                chunk = min(n, CHUNK_SIZE)
+                if len(self.buf.read(chunk)) != chunk:
+                    raise EOFError("End of AMQP-encoded datastream")
+                n -= chunk
+        self.position = end
+
+    def __iter__(self):
+        while True:
+            self.started = False
+            ctr = None
+            if self.stack:
+                frame = self.stack[-1]
+                if self.skipping:
+                    self.skipping = False
+                    self.stack.pop()
+                    self.seek(frame[0])
+                    continue
+                if frame[1] == 0:
+                    self.stack.pop()
+                    yield (END,)
+                    continue
+                frame[1] -= 1
+                ctr = frame[2]
+
+            if ctr is None:
+                start = self.position
+                try:
+                    ctr = decode_constructor(self.read)
+                except EOFError:
+                    # The stream may only end between top-level values.
+                    if self.stack or self.position != start:
+                        raise
+                    return
+                if ctr.descriptor is not None:
+                    yield (DESCRIBED, ctr.symbolic or ctr.numeric)
+            events = self.read_value(ctr.format_code)
+            self.started = events[0][0] != SCALAR
+            for event in events:
+                yield event
+
+    def read_value(self, format_code):
+        if not is_collection(format_code):
+            value = RawDecoder.decode(format_code,
+                read_stream(format_code, self.read))
+            return [(SCALAR, get_type_name(format_code), value)]
+
+        size = count = 0
+        end = self.position
+        if format_code != const.LIST0:
+            width = get_type_length(format_code)
+            size = compat.from_bytes(self.read(width), 'big')
+            count = compat.from_bytes(self.read(width), 'big')
+            end = self.position - width + size
+        type_name = get_type_name(format_code)
+        if type_name == 'array':
+            member_ctr = decode_constructor(self.read)
+            events = [(START_ARRAY, count, member_ctr)]
+            if member_ctr.descriptor is not None:
+                events.append((DESCRIBED, member_ctr.symbolic
+                    or member_ctr.numeric))
+            self.stack.append([end, count, member_ctr])
+            return events
+        self.stack.append([end, count, None])
+        if type_name == 'map':
+            return [(START_MAP, count // 2)]
+        return [(START_LIST, count)]
+
+
+def iter_events(buf):
+    """Return an iterator over the decoding events of the values in
+    file-like object `buf`; see :class:`EventReader`.
+    """
+    return iter(EventReader(buf))
+
+
+def parse_events(buf, handler):
+    """Invoke, for every decoding event of the values in file-like object
+    `buf`, the method of `handler` named after the event with the items
+    of the event as positional arguments, e.g.
+    ``handler.start_list(count)``. Events for which `handler` has no
+    method are ignored.
+    """
+    for event in EventReader(buf):
+        method = getattr(handler, event[0], None)
+        if method is not None:
+            method(*event[1:])
@@ -0,0 +1,212 @@
+"""Optional instrumentation of the codec.
+
+An :class:`Instrumentation` is notified of every value encoded by an
+:class:`.Encoder`, decoded by a :class:`.RawDecoder` and of every tree
+parsed by :func:`.parse_buffer`. Instrumentation is enabled per instance
+(the `instrumentation` argument of the encoder, decoder and
+:func:`.parse_buffer`) or for all instances with :func:`install`. When it
+is disabled, the codec only checks whether the `instrumentation`
+attribute is ``None``.
+
+Values are reported at every level of nesting: the size and time of a
+composite include those of its fields.
+"""
+import bisect
+import collections
+import timeit
+
+from amqp.typesystem.basetypes import Restricted
+from amqp.typesystem.registry import get_by_descriptor
+from amqp.utils import compat
+
+
+#: The clock used to time the codec.
+timer = timeit.default_timer
+
+#: The default upper bounds of the histogram buckets, in seconds.
+BUCKETS = (
+    1e-06, 2.5e-06, 5e-06, 1e-05, 2.5e-05, 5e-05,
+    0.0001, 0.00025, 0.0005, 0.001, 0.01, 0.1
+)
+
+
+def get_type_key(encodable):
+    """Return the name under which `encodable` is reported: the name of
+    its type definition, or the primitive type name for values that are
+    neither described nor restricted.
+    """
+    if isinstance(encodable, Restricted):
+        return encodable.type_name
+    return describe(encodable.type_identifier)
+
+
+def describe(type_identifier):
+    """Return the name of the type identified by the
+    :class:`.TypeIdentifier` `type_identifier`. Described types are
+    reported by the name of their definition, so that values decoded
+    without schema are reported like their schema counterparts.
+    """
+    descriptor = type_identifier.numeric or type_identifier.symbolic
+    if not descriptor:
+        return type_identifier.type_name
+    try:
+        return get_by_descriptor(descriptor).type_name
+    except KeyError:
+        return descriptor if not isinstance(descriptor, compat.integer_types)\
+            else '0x{0:016x}'.format(descriptor)
+
+
+def install(instrumentation):
+    """Enable `instrumentation` for all encoders, decoders and
+    :func:`.parse_buffer`, except those that were created with their own
+    instrumentation. Invoke with ``None`` to disable it.
+    """
+    from amqp.typesystem.decoder import RawDecoder
+    from amqp.typesystem.encoder import Encoder
+    from amqp.typesystem.node import Node
+    Encoder.instrumentation = instrumentation
+    RawDecoder.instrumentation = instrumentation
+    Node.instrumentation = instrumentation
+
+
+class Instrumentation(object):
+    """Receives the events of the codec. The base class ignores all
+    events; subclasses override the methods they are interested in.
+    """
+
+    def encoded(self, encodable, size, elapsed):
+        """Invoked when :class:`.Encodable` `encodable` was encoded into
+        `size` octets in `elapsed` seconds.
+        """
+        pass
+
+    def decoded(self, encodable, size, elapsed):
+        """Invoked when :class:`.Encodable` `encodable` was decoded from
+        `size` octets in `elapsed` seconds.
+        """
+        pass
+
+    def parsed(self, node, elapsed):
+        """Invoked when the tree of :class:`.Node` instances `node` was
+        parsed in `elapsed` seconds.
+        """
+        pass
+
+
+class CallbackInstrumentation(Instrumentation):
+    """Invokes `callback` with the operation (``encode``, ``decode`` or
+    ``parse``), the type name, the size in octets and the elapsed time in
+    seconds of every event. Use it to feed the counters and histograms of
+    a metrics library.
+
+    Args:
+        callback: the callable that is invoked for every event.
+    """
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    def encoded(self, encodable, size, elapsed):
+        self.callback('encode', get_type_key(encodable), size, elapsed)
+
+    def decoded(self, encodable, size, elapsed):
+        self.callback('decode', get_type_key(encodable), size, elapsed)
+
+    def parsed(self, node, elapsed):
+        self.callback('parse', describe(node.type_identifier),
+            node.end - node.start, elapsed)
+
+
+class Histogram(object):
+    """A histogram of durations with fixed bucket boundaries.
+
+    Args:
+        buckets: the upper bounds of the buckets, in seconds, in
+            ascending order.
+    """
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        """Record duration `value`."""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def as_dict(self):
+        """Return a dictionary holding the number of observations, their
+        sum and the cumulative count of each bucket.
+        """
+        cumulative = []
+        total = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            cumulative.append((bound, total))
+        return {'count': self.count, 'sum': self.sum, 'buckets': cumulative}
+
+
+class CodecStats(Instrumentation):
+    """Counts the values and octets encoded and decoded per type, and
+    records a histogram of the time per call for each composite type (and
+    other collections of a defined type) and for :func:`.parse_buffer`.
+
+    Args:
+        buckets: the upper bounds of the histogram buckets, in seconds.
+    """
+    operations = ('encode', 'decode', 'parse')
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.reset()
+
+    def reset(self):
+        """Discard all counters and histograms."""
+        self.values = dict((x, collections.Counter()) for x in self.operations)
+        self.octets = dict((x, collections.Counter()) for x in self.operations)
+        self.histograms = dict((x, {}) for x in self.operations)
+
+    def record(self, operation, key, size, elapsed, timed):
+        self.values[operation][key] += 1
+        self.octets[operation][key] += size
+        if timed:
+            histograms = self.histograms[operation]
+            if key not in histograms:
+                histograms[key] = Histogram(self.buckets)
+            histograms[key].observe(elapsed)
+
+    def encoded(self, encodable, size, elapsed):
+        self.record_value('encode', encodable, size, elapsed)
+
+    def decoded(self, encodable, size, elapsed):
+        self.record_value('decode', encodable, size, elapsed)
+
+    def record_value(self, operation, encodable, size, elapsed):
+        # Only collections of a defined type (composites and restricted
+        # collections) are timed; scalars are too fast to time reliably.
+        key = get_type_key(encodable)
+        self.record(operation, key, size, elapsed,
+            not encodable.is_scalar() and key != encodable.get_source())
+
+    def parsed(self, node, elapsed):
+        self.record('parse', describe(node.type_identifier),
+            node.end - node.start, elapsed, True)
+
+    def snapshot(self):
+        """Return a dictionary holding the counters and histograms of each
+        operation, keyed by type name.
+        """
+        return dict(
+            (operation, {
+                'values': dict(self.values[operation]),
+                'octets': dict(self.octets[operation]),
+                'histograms': dict(
+                    (key, histogram.as_dict())
+                    for key, histogram in self.histograms[operation].items()
+                )
+            })
+            for operation in self.operations
+        )
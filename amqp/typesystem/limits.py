@@ -0,0 +1,60 @@
+"""Limits on the resources used to decode untrusted input.
+
+The sizes and counts in the headers of collections and variable-width
+values are checked by :meth:`.Node.frombuf` when the header is read,
+before the members or the value are read or decoded. Independent of
+the configured limits, a header that declares more octets than remain
+in the buffer (or in the enclosing collection), or more members than
+fit in the declared size, is rejected with a :exc:`.DecodeError`.
+"""
+from amqp.exc import LimitExceeded
+
+
+class DecodeLimits(object):
+    """The limits enforced on a decoded value; ``None`` means no limit.
+
+    Args:
+        max_size: the maximum size in octets of the top-level value.
+        max_count: the maximum number of members of a single collection;
+            for maps, keys and values are counted separately.
+        max_depth: the maximum number of nested collections.
+        max_length: the maximum length in octets of a ``binary``,
+            ``string`` or ``symbol`` value.
+    """
+
+    def __init__(self, max_size=None, max_count=None, max_depth=None,
+        max_length=None):
+        self.max_size = max_size
+        self.max_count = max_count
+        self.max_depth = max_depth
+        self.max_length = max_length
+
+    def check_size(self, size):
+        if self.max_size is not None and size > self.max_size:
+            raise LimitExceeded(
+                "Size of {0} octets exceeds {1}".format(size, self.max_size))
+
+    def check_collection(self, node):
+        """Check the member count and the nesting depth of the collection
+        represented by :class:`.Node` `node`.
+        """
+        if self.max_count is not None and node.member_count > self.max_count:
+            raise LimitExceeded("Member count {0} exceeds {1}".format(
+                node.member_count, self.max_count))
+        if self.max_depth is not None and node.depth >= self.max_depth:
+            raise LimitExceeded("Nesting depth exceeds {0} collections"
+                .format(self.max_depth))
+
+    def check_length(self, length):
+        if self.max_length is not None and length > self.max_length:
+            raise LimitExceeded("Length of {0} octets exceeds {1}".format(
+                length, self.max_length))
+
+    def __repr__(self):
+        return ("<DecodeLimits: max_size={0} max_count={1} max_depth={2} "
+            "max_length={3}>").format(self.max_size, self.max_count,
+                self.max_depth, self.max_length)
+
+
+#: The limits used if none are configured.
+UNLIMITED = DecodeLimits()
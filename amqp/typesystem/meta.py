@@ -11,6 +11,7 @@ from amqp.typesystem.basetypes import Composite
 from amqp.typesystem.basetypes import Scalar
 from amqp.typesystem.basetypes import Restricted
 from amqp.typesystem import basetypes
+from amqp.typesystem.basetypes import infer_encodable
 from amqp.typesystem.field import Field
 from amqp.typesystem.registry import get_by_type_name
 from amqp.typesystem.utils import get_prep_value
@@ -171,6 +172,10 @@ class Meta(object):
             return basetypes.encodable_factory(self.type_name, value)
 
         elif self.type_class == 'restricted':
+            if self.is_polymorphic():
+                # The source of the restricted type is any AMQP type
+                # (e.g. amqp-value), so infer it from the Python type.
+                return Restricted.frommeta(self, infer_encodable(value))
             source =  get_by_type_name(self.source)
             return Restricted.frommeta(self, source.create(value))
         else:
@@ -204,9 +209,9 @@ class Meta(object):
         of a described type.
         """
         if any([self.symbolic, self.numeric]):
-            return Scalar.create('symbol', self.symbolic)\
-                if self.symbolic\
-                else Scalar.create('uint', self.numeric) 
+            return Scalar.create('ulong', self.numeric)\
+                if self.numeric\
+                else Scalar.create('symbol', self.symbolic)
 
     def clean(self, value):
         """Cleans a Python object prior to creating an :class:`.Encodable`."""
@@ -220,8 +225,19 @@ class Meta(object):
         """
         return self.type_class == 'restricted'
 
+    def is_polymorphic(self):
+        """Return ``True`` if the :class:`Meta` instance represents a
+        restricted AMQP type that may hold any AMQP type.
+        """
+        return self.is_restricted() and self.source == '*'
+
     def get_source(self):
         """Return the primitive AMQP type name."""
+        # Restricted types may be restricted from other restricted types
+        # (e.g. delivery-number -> sequence-no -> uint), so resolve the
+        # source until a primitive type is found.
+        if self.is_restricted() and not self.is_polymorphic():
+            return get_by_type_name(self.source).get_source()
         return self.source or self.type_name
 
     def __repr__(self):
@@ -1,7 +1,10 @@
 import os
 
+from amqp.exc import DecodeError
 from amqp.utils import compat
 from amqp.typesystem.datastructures import TypeIdentifier
+from amqp.typesystem.instrument import timer
+from amqp.typesystem.limits import UNLIMITED
 from amqp.typesystem.stream import decode_constructor
 from amqp.typesystem.stream import is_collection
 from amqp.typesystem.stream import is_variable
@@ -14,6 +17,14 @@ class Node(object):
     represent collection types, the leafs represent scalar types.
     """
 
+    #: The :class:`.Instrumentation` notified by :func:`parse_buffer`;
+    #: see :func:`.instrument.install`.
+    instrumentation = None
+
+    #: The :class:`.DecodeLimits` enforced by :meth:`frombuf` if none are
+    #: specified, or ``None`` for no limits.
+    limits = None
+
     @property
     def format_code(self):
         return self.ctr.format_code
@@ -33,7 +44,56 @@ class Node(object):
         )
 
     @classmethod
-    def frombuf(cls, buf, parent=None, ctr=None, depth=-1):
+    def frombuf(cls, buf, parent=None, ctr=None, depth=-1, limits=None):
+        """Read the encoded value at the current position of file-like
+        object `buf` and return the :class:`Node` representing it.
+
+        Nested collections are read using an explicit stack instead of
+        recursion, so the nesting depth is not bounded by the recursion
+        limit of the interpreter. The header of every value is checked
+        against the end of `buf` and of its enclosing collection, and
+        against `limits`, before its members are read.
+
+        Args:
+            limits: the :class:`.DecodeLimits` to enforce. Defaults to
+                :attr:`limits`.
+        """
+        limits = limits or cls.limits or UNLIMITED
+        start = buf.tell()
+        buf.seek(0, os.SEEK_END)
+        bound = buf.tell()
+        buf.seek(start)
+
+        root = cls.read_header(buf, parent, ctr, depth, bound, limits)
+        limits.check_size((root.end or root.members_end) - start)
+        stack = [root] if root.end is None else []
+        while stack:
+            node = stack[-1]
+            if buf.tell() < node.members_end:
+                if len(node.children) == node.member_count:
+                    raise DecodeError("Collection at offset {0} holds more "
+                        "than {1} members".format(node.start,
+                            node.member_count))
+                child = cls.read_header(buf, node, node.member_ctr,
+                    node.depth, node.members_end, limits)
+                node.children.append(child)
+                if child.end is None:
+                    stack.append(child)
+                continue
+            assert buf.tell() == node.members_end,\
+                "{0}!={1}".format(buf.tell(), node.members_end)
+            node.end = buf.tell()
+            stack.pop()
+        return root
+
+    @classmethod
+    def read_header(cls, buf, parent, ctr, depth, bound, limits=UNLIMITED):
+        """Read the constructor of the encoded value at the current
+        position of `buf`. For collections, the size and count are read
+        and the position of `buf` is left at the first member; for
+        other values, the position is moved past the value. Raise
+        :exc:`.DecodeError` if the value extends beyond position `bound`.
+        """
         start = buf.tell()
         if ctr is None:
             ctr = decode_constructor(buf.read)
@@ -43,20 +103,26 @@ class Node(object):
             parent=parent,
             depth=depth
         )
-        if is_collection(ctr.format_code):
+        collection = is_collection(ctr.format_code)
+        if buf.tell() + instance.width * (2 if collection else 1) > bound:
+            raise DecodeError("Truncated header at offset {0}".format(start))
+        if collection:
             instance.set_members(buf)
-        elif is_variable(ctr.format_code):
-            instance.set_length(buf)
+            end = instance.members_end
+            limits.check_collection(instance)
         else:
-            instance.length = instance.width
-            buf.seek(instance.width, os.SEEK_CUR)
-
-        # If parent is None, this is the top-level node so reset
-        # the buffer.
-        #if parent is None:
-        #    buf.seek(0)
-
-        instance.end = buf.tell()
+            if is_variable(ctr.format_code):
+                instance.set_length(buf)
+                limits.check_length(instance.length)
+            else:
+                instance.length = instance.width
+            end = buf.tell() + instance.length
+        if end > bound:
+            raise DecodeError("Value at offset {0} exceeds the buffer: "
+                "{1} > {2}".format(start, end, bound))
+        if instance.members_end is None:
+            buf.seek(end)
+            instance.end = end
         return instance
 
     def __init__(self, start, ctr, offset=None, parent=None, depth=-1):
@@ -68,6 +134,7 @@ class Node(object):
         self.member_size = None
         self.member_count = None
         self.member_ctr = None
+        self.members_end = None
         self.parent = parent
         self.children = []
         self.length = None
@@ -90,9 +157,10 @@ class Node(object):
         return self.format_code in (0xC1, 0xD1)
 
     def set_length(self, buf):
-        """Set the length of the variable-width encoding."""
+        """Read the length of the variable-width encoding from the
+        buffer.
+        """
         self.length = compat.from_bytes(buf.read(self.width), 'big')
-        buf.seek(self.length, os.SEEK_CUR)
 
         # Update the offset with the length indicator.
         self.offset += self.width
@@ -102,29 +170,35 @@ class Node(object):
         self.member_size = compat.from_bytes(buf.read(self.width), 'big')
         self.member_count = compat.from_bytes(buf.read(self.width), 'big')
 
-        start = buf.tell() - self.width
-        if self.is_array():
+        # The size includes the count indicator, so the members end at
+        # the position of the count plus the size.
+        self.members_end = buf.tell() - self.width + self.member_size
+        if not self.is_array():
+            # Members of lists and maps take at least one octet.
+            valid = self.member_count <= self.members_end - buf.tell()
+        else:
             self.member_ctr = decode_constructor(buf.read)
-
-        # Set the start of the members to the current buffer position
-        # minus the width of the type length, because the total length
-        # includes.
-        end = start + self.member_size
-        while buf.tell() < end:
-            node = type(self).frombuf(
-                buf,
-                parent=self,
-                ctr=self.member_ctr,
-                depth=self.depth
-            )
-            self.children.append(node)
-        assert buf.tell() == end, "{0}!={1}".format(buf.tell(), end)
+            remaining = self.members_end - buf.tell()
+            format_code = self.member_ctr.format_code
+            if is_variable(format_code):
+                # Each member has a length or size indicator.
+                valid = self.member_count <= remaining
+            else:
+                # Fixed-width members, including zero-width members such
+                # as null or true, fill the array exactly.
+                valid = self.member_count * get_type_length(format_code)\
+                    == remaining
+        if not valid:
+            raise DecodeError("Collection at offset {0} declares {1} "
+                "members in {2} octets".format(self.start, self.member_count,
+                    self.member_size))
 
     def is_scalar(self):
         """Return ``True`` if the :class:`Node` represents a scalar value
-        i.e. it has no children.
+        i.e. it is not a collection. Note that empty collections have no
+        children but are not scalar.
         """
-        return not bool(self.children)
+        return not is_collection(self.format_code)
 
     def value_from_buf(self, buf):
         """Return the AMQP-encoded value from the buffer."""
@@ -145,8 +219,23 @@ class Node(object):
         )
 
 
-def parse_buffer(buf):
+def parse_buffer(buf, instrumentation=None, limits=None):
     """Parse file-like object `buf` into a :class:`.Node` repressenting
     the AMQP-encoded tree in the datastream.
+
+    Args:
+        buf: the file-like object holding the encoded value.
+        instrumentation: an :class:`.Instrumentation` that is notified of
+            the parsed tree. If `instrumentation` is ``None``, the
+            instrumentation installed with :func:`.instrument.install` is
+            used, if any.
+        limits: the :class:`.DecodeLimits` to enforce; defaults to
+            :attr:`Node.limits`.
     """
-    return Node.frombuf(buf)
+    instrumentation = instrumentation or Node.instrumentation
+    if instrumentation is None:
+        return Node.frombuf(buf, limits=limits)
+    start = timer()
+    node = Node.frombuf(buf, limits=limits)
+    instrumentation.parsed(node, timer() - start)
+    return node
@@ -0,0 +1,158 @@
+"""A sampling profiler for the codec.
+
+:class:`SamplingProfiler` runs one in every `interval` calls under a
+profile function (see :func:`sys.setprofile`) and aggregates the time
+spent in a fixed set of codec functions by call stack. The other calls
+only increment a counter. The aggregated stacks are written in the
+collapsed format read by ``flamegraph.pl`` and compatible tools: one line
+per stack, holding the semicolon-separated function names and the time
+spent in the innermost function, in microseconds.
+
+Time spent in functions that are not profiled is attributed to the
+nearest profiled caller. The profile function itself slows down the
+sampled calls; compare stacks relative to each other rather than to
+unsampled timings.
+"""
+import collections
+import io
+import signal
+import sys
+
+from amqp.typesystem.decoder import SchemaDecoder
+from amqp.typesystem.encoder import Encoder
+from amqp.typesystem.encoder import SchemaEncoder
+from amqp.typesystem.field import Field
+from amqp.typesystem.instrument import timer
+from amqp.typesystem.meta import Meta
+from amqp.typesystem.node import Node
+from amqp.typesystem.node import parse_buffer
+
+
+#: The functions that are profiled by default, as ``(class, attname)``
+#: tuples.
+FUNCTIONS = [
+    (Meta, 'create'),
+    (Field, 'clean'),
+    (Encoder, 'visit_collection'),
+    (Node, 'frombuf'),
+    (SchemaDecoder, 'encodable_factory'),
+]
+
+
+def get_code(owner, attname):
+    """Return the code object of function `attname` of class `owner`."""
+    func = owner.__dict__[attname]
+    func = getattr(func, '__func__', func)
+    return func.__code__
+
+
+class SamplingProfiler(object):
+    """Profiles one in every `interval` calls of :meth:`call`.
+
+    Args:
+        interval: profile one call in every `interval` calls.
+        functions: the functions to profile, as ``(class, attname)``
+            tuples. Defaults to :data:`FUNCTIONS`.
+    """
+
+    def __init__(self, interval=100, functions=None):
+        self.interval = interval
+        self.names = dict(
+            (get_code(owner, attname), '{0}.{1}'.format(owner.__name__,
+                attname))
+            for owner, attname in (functions or FUNCTIONS)
+        )
+        self.calls = 0
+        self.samples = 0
+        self.stacks = collections.Counter()
+        self.stack = []
+
+    def call(self, func, *args, **kwargs):
+        """Invoke `func` with the positional arguments `args` and the
+        keyword arguments `kwargs`, and return its result. The invocation
+        is profiled if it is the `interval`-th since the last profiled
+        call.
+        """
+        self.calls += 1
+        if self.calls % self.interval:
+            return func(*args, **kwargs)
+        return self.sample(func, *args, **kwargs)
+
+    def encode(self, encodable, encoder=None):
+        """Encode :class:`.Encodable` `encodable`; see :meth:`call`."""
+        return self.call(encodable.accept, encoder or SchemaEncoder())
+
+    def decode(self, buf, decoder_class=SchemaDecoder):
+        """Decode the value at the current position of file-like object
+        `buf`; see :meth:`call`.
+        """
+        return self.call(decode, buf, decoder_class)
+
+    def sample(self, func, *args, **kwargs):
+        """Invoke `func` under the profile function."""
+        name = getattr(func, '__name__', None) or type(func).__name__
+        self.samples += 1
+        self.stack = [[None, name, timer(), 0.0]]
+        previous = sys.getprofile()
+        sys.setprofile(self.trace)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            sys.setprofile(previous)
+            self.pop()
+            self.stack = []
+
+    def trace(self, frame, event, arg):
+        if event == 'call':
+            name = self.names.get(frame.f_code)
+            if name is not None:
+                self.stack.append([frame, name, timer(), 0.0])
+        elif event == 'return':
+            if len(self.stack) > 1 and self.stack[-1][0] is frame:
+                self.pop()
+
+    def pop(self):
+        now = timer()
+        key = ';'.join([x[1] for x in self.stack])
+        _, _, start, children = self.stack.pop()
+        elapsed = now - start
+        self.stacks[key] += elapsed - children
+        if self.stack:
+            self.stack[-1][3] += elapsed
+
+    def collapse(self):
+        """Return a list of strings holding the profiled stacks in the
+        collapsed format.
+        """
+        # Round half up; round() rounds half to even on Python 3 only.
+        return [
+            '{0} {1}'.format(key, int(seconds * 1000000 + 0.5))
+            for key, seconds in sorted(self.stacks.items())
+            if seconds >= 0.0000005
+        ]
+
+    def dump(self, filepath):
+        """Write the profiled stacks to `filepath` in the collapsed
+        format.
+        """
+        with io.open(filepath, 'w', encoding='ascii') as f:
+            for line in self.collapse():
+                f.write(line + u'\n')
+
+    def dump_on_signal(self, filepath, signum=None):
+        """Write the profiled stacks to `filepath` when the process
+        receives signal `signum`, which defaults to ``SIGUSR1``. Must be
+        invoked from the main thread.
+        """
+        if signum is None:
+            signum = signal.SIGUSR1
+        signal.signal(signum, lambda *args: self.dump(filepath))
+
+    def reset(self):
+        """Discard the profiled stacks and reset the counters."""
+        self.stacks.clear()
+        self.calls = self.samples = 0
+
+
+def decode(buf, decoder_class):
+    return parse_buffer(buf).accept(decoder_class(buf))
@@ -1,10 +1,18 @@
 import functools
 
 from amqp.exc import DecodeError
+from amqp.utils import compat
 
 
 REGISTRY = {}
 
+#: Maps the raw bytes of an encoded descriptor (including the leading
+#: 0x00) to the type definition it identifies.
+DESCRIPTORS = {}
+
+#: Maps format codes to the primitive type definitions.
+FORMAT_CODES = {}
+
 
 def register(type_class, type_name, meta):
     REGISTRY[(type_class, type_name)] = meta
@@ -17,9 +25,35 @@ def get(type_class, identifier):
     return REGISTRY[(type_class, identifier)]
 
 
+def encode_descriptor(identifier):
+    """Return a list holding all valid encodings of the descriptor
+    `identifier`, which is either an integer (numeric descriptor) or a
+    string (symbolic descriptor).
+    """
+    if isinstance(identifier, compat.integer_types):
+        encoded = [b'\x00\x80' + compat.to_bytes(identifier, 8, 'big')]
+        if identifier < 256:
+            encoded.append(b'\x00\x53' + compat.to_bytes(identifier, 1, 'big'))
+    else:
+        raw = identifier.encode('ascii')
+        encoded = [b'\x00\xb3' + compat.to_bytes(len(raw), 4, 'big') + raw]
+        if len(raw) < 256:
+            encoded.append(b'\x00\xa3' + compat.to_bytes(len(raw), 1, 'big') + raw)
+    return encoded
+
+
+def register_descriptor(identifier, meta):
+    register('descriptor', identifier, meta)
+    for descriptor in encode_descriptor(identifier):
+        DESCRIPTORS[descriptor] = meta
+
+
+def register_format_code(format_code, meta):
+    register('format_code', format_code, meta)
+    FORMAT_CODES[format_code] = meta
+
+
 register_type_name      = functools.partial(register, 'type_name')
-register_format_code    = functools.partial(register, 'format_code')
-register_descriptor     = functools.partial(register, 'descriptor')
 get_by_type_name        = functools.partial(get, 'type_name')
 get_by_descriptor       = functools.partial(get, 'descriptor')
 get_by_format_code      = functools.partial(get, 'format_code')
@@ -29,6 +63,15 @@ def get_by_constructor(ctr):
     """Return an AMQP type definition using the constructor decoded from
     an incoming datastream.
     """
+    # Fast path: the raw descriptor bytes or the format code identify
+    # the type definition with a single lookup.
+    meta = None
+    if ctr.descriptor is not None:
+        meta = DESCRIPTORS.get(ctr.descriptor)
+    elif not (ctr.numeric or ctr.symbolic):
+        meta = FORMAT_CODES.get(ctr.format_code)
+    if meta is not None:
+        return meta
     try:
         if ctr.numeric:
             identifier = ('descriptor', ctr.numeric)
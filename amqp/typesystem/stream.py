@@ -1,4 +1,5 @@
 import io
+import struct
 
 from amqp.typesystem.datastructures import Constructor
 from amqp.typesystem.const import ULONG
@@ -15,6 +16,65 @@ from amqp.utils import compat
 
 ENDIAN = 'big'
 
+#: The unsigned integers used as size, count and length indicators, by
+#: width.
+UINT = {
+    1: struct.Struct('!B'),
+    2: struct.Struct('!H'),
+    4: struct.Struct('!I'),
+    8: struct.Struct('!Q'),
+}
+
+#: The constructors of the primitive format codes, shared by all values
+#: decoded with :func:`decode_constructor_at`.
+PRIMITIVE_CONSTRUCTORS = [Constructor(x) for x in range(256)]
+
+
+class SymbolTable(object):
+    """Interns decoded symbols, keyed by their encoded bytes, so that
+    every occurrence of a symbol decodes to the same :class:`str` object
+    and is only decoded once.
+
+    Symbols (capabilities, error conditions, annotation keys, descriptor
+    names) come from a small vocabulary. To keep the table bounded
+    regardless of the input, symbols longer than `max_length` octets are
+    not interned, and the table is cleared when it holds `max_size`
+    symbols.
+
+    Args:
+        max_size: the maximum number of interned symbols.
+        max_length: the maximum length of an interned symbol.
+    """
+
+    def __init__(self, max_size=4096, max_length=256):
+        self.max_size = max_size
+        self.max_length = max_length
+        self.symbols = {}
+
+    def decode(self, raw):
+        """Return the symbol encoded as the ASCII byte-sequence `raw`."""
+        if not isinstance(raw, bytes):
+            raw = compat.tobytes(raw)
+        try:
+            return self.symbols[raw]
+        except KeyError:
+            pass
+
+        #: Symbol is encoded as ASCII (OASIS 2012: 25).
+        symbol = raw.decode('ascii')
+        if len(raw) <= self.max_length:
+            if len(self.symbols) >= self.max_size:
+                self.symbols.clear()
+            self.symbols[raw] = symbol
+        return symbol
+
+    def __len__(self):
+        return len(self.symbols)
+
+
+#: The symbol table shared by all decoders.
+SYMBOLS = SymbolTable()
+
 
 def read_stream(format_code, read):
     """Read an AMQP-encoded value from a stream."""
@@ -56,6 +116,36 @@ def read_variable(format_code, read):
     return read(n)
 
 
+def skip_value(format_code, buf):
+    """Advance file-like object `buf` past an AMQP-encoded value of the
+    given `format_code`, without reading the value itself. The stream
+    must be positioned right after the constructor. Return the number of
+    octets skipped.
+
+    Collections and variable-width values are skipped using their size
+    indicator, so their members are never visited.
+    """
+    width = get_type_length(format_code)
+    if is_variable(format_code):
+        size = compat.from_bytes(buf.read(width), ENDIAN)
+        buf.seek(size, io.SEEK_CUR)
+        return width + size
+    buf.seek(width, io.SEEK_CUR)
+    return width
+
+
+def read_exact(read, n):
+    """Invoke `read` to read `n` octets and return them.
+
+    Raises:
+        EOFError: fewer than `n` octets were read.
+    """
+    data = read(n)
+    if len(data) != n:
+        raise EOFError("End of AMQP-encoded datastream")
+    return data
+
+
 def decode_constructor(read):
     """Decodes the constructor of an AMQP-encoded value at the beginning
     of the datastream in file-like object `buf`. Return a tuple indicating
@@ -70,35 +160,129 @@ def decode_constructor(read):
         Constructor
 
     Raises:
-        EOFError: may be raised by invoking `read()`.
+        EOFError: the datastream ends before the constructor.
     """
-    symbolic = None
-    numeric = None
     raw_format_code = read(1)
     if not raw_format_code:
         raise EOFError("End of AMQP-encoded datastream")
 
     # The first octet indicates the format code type; 0 for described
     # format codes, non-zero for codec.
-    format_code = compat.from_bytes(raw_format_code, ENDIAN)
-    if format_code == 0x00:
-        # If the value has a described format code, its descriptor is
-        # either an unsigned long integer, or a symbol.
-        format_code = compat.from_bytes(read(1), ENDIAN)
-        if format_code in (ULONG, SMALLULONG):
-            numeric =\
-                compat.from_bytes(read_stream(format_code, read), ENDIAN)
-        elif format_code in (SYM8, SYM32):
-            #: Symbol is encoded as ASCII (OASIS 2012: 25).
-            symbolic = read_stream(format_code, read)\
-                .decode('ascii')
-        else:
-            raise ValueError(
-                "Invalid format code for descriptor: " + str(format_code)
-            )
-
-        # Right after the descriptor comes the actual primitive type
-        # of the encoded value.
-        format_code = compat.from_bytes(read(1), ENDIAN)
-
-    return Constructor(format_code, symbolic, numeric)
+    format_code = compat.octet(raw_format_code)
+    if format_code != 0x00:
+        return Constructor(format_code)
+
+    # If the value has a described format code, its descriptor is
+    # either an unsigned long integer, or a symbol. The raw bytes of
+    # the descriptor are kept on the constructor so the type definition
+    # can be looked up directly (see registry.get_by_constructor()).
+    symbolic = None
+    numeric = None
+    raw_descriptor_code = read_exact(read, 1)
+    format_code = compat.octet(raw_descriptor_code)
+    if format_code == SMALLULONG:
+        raw = read_exact(read, 1)
+        numeric = compat.octet(raw)
+    elif format_code == ULONG:
+        raw = read_exact(read, 8)
+        numeric = compat.from_bytes(raw, ENDIAN)
+    elif format_code in (SYM8, SYM32):
+        raw = read_exact(read, get_type_length(format_code))
+        value = read_exact(read, compat.from_bytes(raw, ENDIAN))
+        symbolic = SYMBOLS.decode(value)
+        raw += value
+    else:
+        raise ValueError(
+            "Invalid format code for descriptor: " + str(format_code)
+        )
+
+    # Right after the descriptor comes the actual primitive type
+    # of the encoded value.
+    format_code = compat.octet(read_exact(read, 1))
+    return Constructor(format_code, symbolic, numeric,
+        b'\x00' + raw_descriptor_code + raw)
+
+
+def read_uint(buf, offset, width):
+    """Return the unsigned integer of `width` octets at `offset` in `buf`,
+    an object supporting the buffer protocol.
+
+    Raises:
+        EOFError: `buf` ends before the integer.
+    """
+    if width == 0:
+        return 0
+    try:
+        return UINT[width].unpack_from(buf, offset)[0]
+    except struct.error:
+        raise EOFError("End of AMQP-encoded datastream")
+
+
+def decode_constructor_at(buf, offset=0):
+    """Decode the constructor at `offset` in `buf`, an object supporting
+    the buffer protocol. Return a tuple holding the :class:`Constructor`
+    and the offset of the first octet following it.
+
+    Unlike :func:`decode_constructor`, no byte-sequences are created for
+    the format code and the descriptor code; only the raw descriptor of a
+    described type is copied.
+
+    Raises:
+        EOFError: `buf` ends before the constructor.
+    """
+    format_code = read_uint(buf, offset, 1)
+    if format_code != 0x00:
+        return PRIMITIVE_CONSTRUCTORS[format_code], offset + 1
+
+    start = offset
+    symbolic = None
+    numeric = None
+    format_code = read_uint(buf, offset + 1, 1)
+    offset += 2
+    if format_code == SMALLULONG:
+        numeric = read_uint(buf, offset, 1)
+        offset += 1
+    elif format_code == ULONG:
+        numeric = read_uint(buf, offset, 8)
+        offset += 8
+    elif format_code in (SYM8, SYM32):
+        width = get_type_length(format_code)
+        length = read_uint(buf, offset, width)
+        offset += width + length
+        if offset > len(buf):
+            raise EOFError("End of AMQP-encoded datastream")
+        symbolic = SYMBOLS.decode(buf[offset - length:offset])
+    else:
+        raise ValueError(
+            "Invalid format code for descriptor: " + str(format_code)
+        )
+
+    format_code = read_uint(buf, offset, 1)
+    return Constructor(format_code, symbolic, numeric,
+        compat.tobytes(buf[start:offset])), offset + 1
+
+
+def read_value_at(format_code, buf, offset):
+    """Read the value of the given `format_code` at `offset` in `buf`, an
+    object supporting the buffer protocol, right after its constructor.
+    Return a tuple holding the encoded value and the offset of the first
+    octet following it. Collections are returned with their size and
+    count indicators.
+
+    The encoded value is a slice of `buf`; pass a :class:`memoryview` to
+    read it without copying.
+
+    Raises:
+        EOFError: `buf` ends before the value.
+    """
+    width = get_type_length(format_code)
+    if is_collection(format_code):
+        end = offset + width + read_uint(buf, offset, width)
+    elif is_variable(format_code):
+        offset += width
+        end = offset + read_uint(buf, offset - width, width)
+    else:
+        end = offset + width
+    if end > len(buf):
+        raise EOFError("End of AMQP-encoded datastream")
+    return buf[offset:end], end
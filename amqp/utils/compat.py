@@ -1,5 +1,7 @@
+import operator
 import struct
 import sys
+import time
 
 
 PY3 = sys.version_info.major == 3
@@ -14,6 +16,11 @@ if PY3:
     integer_types = (int,)
     force_str = str
     unicode = str
+    monotonic = time.monotonic
+    octet = operator.itemgetter(0)
+    tobytes = bytes
+    join_bytes = b''.join
+    buffer_view = memoryview
 
 
 elif PY2:
@@ -44,6 +51,29 @@ elif PY2:
 
 
     integer_types = (int, long)
+    unicode = unicode
+    monotonic = time.time
+
+    def octet(value):
+        # Indexing a bytearray returns an integer, and a memoryview a
+        # string; both are rejected by ord().
+        return struct.unpack_from('B', value)[0]
+
+    def tobytes(buf):
+        # bytes() returns the representation of a memoryview.
+        return buf.tobytes() if isinstance(buf, memoryview) else bytes(buf)
+
+    def join_bytes(buffers):
+        # str.join() only accepts strings.
+        return b''.join([tobytes(x) for x in buffers])
+
+    def buffer_view(buf):
+        # mmap does not support the new buffer protocol; slices of the
+        # mmap itself are copies.
+        try:
+            return memoryview(buf)
+        except TypeError:
+            return buf
 
     def force_str(value, encoding):
         return unicode(value, encoding)
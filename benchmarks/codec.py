@@ -0,0 +1,187 @@
+"""The codec benchmarks. Every benchmark is a ``(name, setup)`` tuple;
+`setup` prepares the input of the benchmark and returns a callable that
+performs a single operation.
+
+Encoding benchmarks create the :class:`.Encodable` from Python values and
+encode it, as a sender would; encoded scalars are cached on their
+:class:`.Encodable`, so encoding a pre-built instance repeatedly would
+measure the cache. Decoding benchmarks parse and decode a pre-encoded
+byte-sequence. Dispatch benchmarks only decode the constructor of a
+performative and resolve its type definition, which is done for every
+received frame.
+"""
+import functools
+import io
+import os
+import subprocess
+import sys
+import uuid
+
+import amqp
+from amqp.dto import DataTransferObject
+from amqp.typesystem import SchemaDecoder
+from amqp.typesystem import SchemaEncoder
+from amqp.typesystem import SchemaLoader
+from amqp.typesystem import parse_buffer
+from amqp.typesystem import registry
+from amqp.typesystem.stream import decode_constructor
+
+from benchmarks.wire_size import SAMPLES
+
+
+#: The fixed-width types that may be members of an array, with a
+#: representative value. The decimal and char types are defined in
+#: ``types.xml`` but not implemented by the codec.
+FIXED_WIDTH = [
+    ('boolean', True),
+    ('ubyte', 200),
+    ('ushort', 60000),
+    ('uint', 4000000000),
+    ('ulong', 2 ** 63),
+    ('byte', -100),
+    ('short', -30000),
+    ('int', -2 ** 30),
+    ('long', -2 ** 62),
+    ('float', 1.5),
+    ('double', 2.25),
+    ('timestamp', 1451606400000),
+    ('uuid', uuid.UUID('a6b1c4a0-3b5e-4d0c-9f3a-6f0e1d2c3b4a')),
+]
+
+ARRAY_SIZES = [1, 100, 10000, 100000]
+
+VARIABLE_SIZES = [0, 1 << 10, 1 << 16, 1 << 20, 1 << 24]
+
+MAP_SIZES = [1, 100, 10000]
+
+SCHEMAS = ['types.xml', 'transport.xml', 'messaging.xml']
+
+#: The performatives whose dispatch is measured; the most frequent
+#: frames on a busy link.
+DISPATCHED = ['transfer', 'disposition']
+
+
+def encode(encodable):
+    return encodable.accept(SchemaEncoder())
+
+
+def decode(encoded):
+    buf = io.BytesIO(encoded)
+    return parse_buffer(buf).accept(SchemaDecoder(buf))
+
+
+def encoding(create):
+    return lambda: encode(create())
+
+
+def decoding(create):
+    encoded = encode(create())
+    return lambda: decode(encoded)
+
+
+def codec_benchmarks(name, create):
+    """Return the encode and decode benchmarks of the values produced by
+    `create`.
+    """
+    return [
+        (name + '.encode', functools.partial(encoding, create)),
+        (name + '.decode', functools.partial(decoding, create)),
+    ]
+
+
+def performatives():
+    for type_name, params in SAMPLES:
+        factory = amqp.create_factory(type_name)
+        create = lambda factory=factory, params=params: factory(**params)
+        for benchmark in codec_benchmarks('performative.' + type_name, create):
+            yield benchmark
+
+
+def arrays():
+    for type_name, value in FIXED_WIDTH:
+        for size in ARRAY_SIZES:
+            values = [value] * size
+            create = lambda type_name=type_name, values=values:\
+                amqp.encodable_factory(type_name, values)
+            name = 'array.{0}.{1}'.format(type_name, size)
+            for benchmark in codec_benchmarks(name, create):
+                yield benchmark
+
+
+def variables():
+    for type_name, char in [('string', u'x'), ('binary', b'x')]:
+        for size in VARIABLE_SIZES:
+            value = char * size
+            create = lambda type_name=type_name, value=value:\
+                amqp.encodable_factory(type_name, value)
+            name = '{0}.{1}'.format(type_name, size)
+            for benchmark in codec_benchmarks(name, create):
+                yield benchmark
+
+
+def maps():
+    for size in MAP_SIZES:
+        value = dict(('key-{0}'.format(i), i) for i in range(size))
+        create = lambda value=value: amqp.encodable_factory('map', value)
+        for benchmark in codec_benchmarks('map.{0}'.format(size), create):
+            yield benchmark
+
+
+def dispatch(encoded):
+    return registry.get_by_constructor(
+        decode_constructor(io.BytesIO(encoded).read))
+
+
+def dispatching():
+    samples = dict(SAMPLES)
+    for type_name in DISPATCHED:
+        encoded = encode(amqp.create_factory(type_name)(**samples[type_name]))
+        yield ('dispatch.' + type_name, lambda encoded=encoded:
+            functools.partial(dispatch, encoded))
+
+
+def dtos():
+    for type_name, params in SAMPLES:
+        create = lambda type_name=type_name, params=params:\
+            DataTransferObject(type_name, **params).as_encodable()
+        yield ('dto.' + type_name, lambda create=create: create)
+
+
+def schemas():
+    # Loading a schema again replaces the definitions in the registry
+    # with identical ones.
+    loader = SchemaLoader(registry)
+    dirname = os.path.dirname(amqp.typesystem.__file__)
+    for filename in SCHEMAS:
+        filepath = os.path.join(dirname, filename)
+        yield ('schema.' + filename, lambda filepath=filepath:
+            functools.partial(loader.load_file, filepath))
+    yield ('schema.import', lambda: import_amqp)
+
+
+def import_amqp():
+    """Import the :mod:`amqp` package in a new interpreter; return the
+    time spent, in seconds, excluding the start of the interpreter.
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [x for x in sys.path if x] + [env.get('PYTHONPATH', '')])
+    output = subprocess.check_output([sys.executable, '-c',
+        'import timeit; t = timeit.default_timer(); import amqp; '
+        'print(timeit.default_timer() - t)'], env=env)
+    return float(output.decode('ascii').strip().splitlines()[-1])
+
+
+#: Benchmarks that measure themselves; they return the elapsed time.
+SELF_TIMED = frozenset(['schema.import'])
+
+
+def get_benchmarks():
+    """Return a list of ``(name, callable)`` tuples holding all codec
+    benchmarks.
+    """
+    benchmarks = []
+    for group in (performatives, dispatching, arrays, variables, maps, dtos,
+            schemas):
+        benchmarks.extend(group())
+    return benchmarks
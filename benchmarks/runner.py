@@ -0,0 +1,147 @@
+"""Runs the codec benchmarks, writes the results as JSON and compares them
+against a stored baseline.
+
+Usage::
+
+    python -m benchmarks [-k PATTERN] [--threshold PERCENT]
+        [--output FILE] [--baseline FILE] [--update-baseline]
+
+The result of a benchmark is the best time per operation, in seconds, of
+a number of repetitions. The runner exits with a non-zero status if any
+benchmark is more than `threshold` percent slower than its baseline.
+Timings depend on the machine and the interpreter, which are recorded
+in the baseline; if either differs, the results are not compared.
+Regenerate the baseline with ``--update-baseline`` when switching
+machines or interpreters.
+"""
+import argparse
+import fnmatch
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import timeit
+
+from benchmarks import codec
+
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+#: The default regression threshold, in percent.
+THRESHOLD = float(os.environ.get('BENCHMARK_THRESHOLD', 25))
+
+
+def measure(func, min_time=0.1, repeat=3):
+    """Return the best time, in seconds, of a single invocation of `func`.
+    The number of invocations per repetition is doubled until a
+    repetition lasts at least `min_time` seconds.
+    """
+    timer = timeit.Timer(func)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time:
+            break
+        number *= 2
+    timings = [elapsed] + timer.repeat(repeat - 1, number)
+    return min(timings) / number
+
+
+def run(benchmarks, min_time=0.1, repeat=3, stream=None):
+    """Run `benchmarks`, a list of ``(name, setup)`` tuples. Return a
+    dictionary mapping the benchmark names to their results.
+    """
+    results = {}
+    for name, setup in benchmarks:
+        func = setup()
+        if name in codec.SELF_TIMED:
+            seconds = min(func() for _ in range(repeat))
+        else:
+            seconds = measure(func, min_time, repeat)
+        results[name] = seconds
+        if stream is not None:
+            stream.write("{0:<40} {1:>14.9f}\n".format(name, seconds))
+    return results
+
+
+def get_environment():
+    """Return a dictionary identifying the interpreter and the machine
+    that the benchmarks run on.
+    """
+    return {
+        'python': platform.python_implementation()
+            + ' ' + platform.python_version(),
+        'machine': '{0} {1}, {2} CPUs'.format(platform.system(),
+            platform.machine(), multiprocessing.cpu_count()),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Return a list of ``(name, seconds, baseline)`` tuples holding the
+    benchmarks in `results` that are more than `threshold` percent slower
+    than in `baseline`. Benchmarks that are not in the baseline are not
+    compared.
+    """
+    regressions = []
+    for name in sorted(results):
+        if name not in baseline:
+            continue
+        if results[name] > baseline[name] * (1 + threshold / 100.0):
+            regressions.append((name, results[name], baseline[name]))
+    return regressions
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks')
+    parser.add_argument('-k', dest='patterns', action='append',
+        help="only run the benchmarks matching this glob pattern")
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+        help="the allowed slowdown against the baseline, in percent")
+    parser.add_argument('--output', help="write the results to this file")
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--min-time', type=float, default=0.1)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    benchmarks = codec.get_benchmarks()
+    if args.patterns:
+        benchmarks = [(name, setup) for name, setup in benchmarks
+            if any(fnmatch.fnmatch(name, x) for x in args.patterns)]
+    results = run(benchmarks, args.min_time, args.repeat, sys.stderr)
+    document = get_environment()
+    document['results'] = results
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(document, f, indent=2, sort_keys=True)
+            f.write('\n')
+    else:
+        print(json.dumps(document, indent=2, sort_keys=True))
+
+    if args.update_baseline:
+        baseline = {'results': {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(get_environment())
+        baseline['results'].update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    environment = get_environment()
+    recorded = dict((k, baseline.get(k)) for k in environment)
+    if recorded != environment:
+        sys.stderr.write("The baseline was recorded with {0[python]} on "
+            "{0[machine]}; not comparing. Regenerate it with "
+            "--update-baseline.\n".format(recorded))
+        return 0
+    regressions = compare(results, baseline['results'], args.threshold)
+    for name, seconds, expected in regressions:
+        sys.stderr.write("{0}: {1:.9f}s, baseline {2:.9f}s (+{3:.0f}%)\n"
+            .format(name, seconds, expected, (seconds / expected - 1) * 100))
+    return 1 if regressions else 0
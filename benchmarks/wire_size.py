@@ -0,0 +1,118 @@
+"""Reports the encoded size of every performative defined in
+``transport.xml`` and compares it against a stored baseline.
+
+Usage::
+
+    python -m benchmarks.wire_size [--update]
+
+The script exits with a non-zero status if the compact encoding of any
+performative is larger than its baseline. Run with ``--update`` to
+store the current sizes as the new baseline.
+"""
+import json
+import os
+import sys
+
+import amqp
+from amqp.typesystem import SchemaEncoder
+
+
+#: The performatives defined in ``transport.xml``, with representative
+#: field values.
+SAMPLES = [
+    ('open', {
+        'container_id': 'a6b1c4a0-container',
+        'hostname': 'broker.example.com',
+        'max_frame_size': 65536,
+        'channel_max': 255,
+        'idle_time_out': 30000,
+        'offered_capabilities': ['ANONYMOUS-RELAY'],
+    }),
+    ('begin', {
+        'remote_channel': 0,
+        'next_outgoing_id': 1,
+        'incoming_window': 2048,
+        'outgoing_window': 2048,
+        'handle_max': 255,
+    }),
+    ('attach', {
+        'name': 'sender-link-1',
+        'handle': 0,
+        'role': 'sender',
+        'snd_settle_mode': 'mixed',
+        'rcv_settle_mode': 'first',
+        'initial_delivery_count': 0,
+        'max_message_size': 1048576,
+    }),
+    ('flow', {
+        'next_incoming_id': 100,
+        'incoming_window': 2048,
+        'next_outgoing_id': 1,
+        'outgoing_window': 2048,
+        'handle': 0,
+        'delivery_count': 100,
+        'link_credit': 1000,
+        'drain': False,
+    }),
+    ('transfer', {
+        'handle': 0,
+        'delivery_id': 100,
+        'delivery_tag': b'\x00\x00\x00\x64',
+        'message_format': 0,
+        'settled': True,
+        'more': False,
+    }),
+    ('disposition', {
+        'role': 'receiver',
+        'first': 100,
+        'last': 200,
+        'settled': True,
+    }),
+    ('detach', {
+        'handle': 0,
+        'closed': True,
+    }),
+    ('end', {}),
+    ('close', {}),
+]
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'wire_size.json')
+
+
+def measure(compact):
+    encoder = SchemaEncoder(compact=compact)
+    return dict(
+        (type_name, len(amqp.create_factory(type_name)(**params)
+            .accept(encoder)))
+        for type_name, params in SAMPLES
+    )
+
+
+def main(argv):
+    results = {}
+    compact = measure(True)
+    default = measure(False)
+    for type_name, _ in SAMPLES:
+        results[type_name] = {
+            'compact': compact[type_name],
+            'default': default[type_name]
+        }
+    print(json.dumps(results, indent=2, sort_keys=True))
+
+    if '--update' in argv:
+        with open(BASELINE, 'w') as f:
+            json.dump(compact, f, indent=2, sort_keys=True)
+            f.write('\n')
+        return 0
+
+    with open(BASELINE) as f:
+        baseline = json.load(f)
+    failed = [x for x in sorted(compact) if compact[x] > baseline.get(x, 0)]
+    for type_name in failed:
+        sys.stderr.write("{0}: {1} octets, baseline {2}\n".format(
+            type_name, compact[type_name], baseline.get(type_name)))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -109,7 +109,7 @@ setup(
     long_description=long_description,
     packages=packages,
     package_data={
-        'amqp.typesystem': ['types.xml','transport.xml']
+        'amqp.typesystem': ['types.xml','transport.xml','messaging.xml']
     },
     install_requires=install_requires,
     classifiers=[
@@ -0,0 +1,76 @@
+import unittest
+
+from amqp.messaging import BatchEncoder
+from amqp.messaging import Message
+from amqp.messaging import decode_batch
+from amqp.messaging import split_batch
+from amqp.messaging.batch import BATCH_MESSAGE_FORMAT
+from amqp.messaging.batch import is_batch
+from amqp.utils import compat
+
+
+class BatchEncoderTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.sent = []
+        self.encoder = BatchEncoder(self.send, 0, max_size=1024, max_count=4)
+
+    def send(self, transfer, chunks):
+        self.sent.append((transfer, b''.join(chunks)))
+
+    def test_flush_empty(self):
+        self.assertEqual(self.encoder.flush(), 0)
+        self.assertEqual(self.sent, [])
+
+    def test_flush(self):
+        self.encoder.add(Message(b'foo'))
+        self.encoder.add(Message(b'bar', properties={'subject': 's'}))
+        self.assertEqual(len(self.encoder), 2)
+        self.assertEqual(self.encoder.flush(delivery_id=7), 1)
+        self.assertEqual(len(self.encoder), 0)
+
+        transfer, payload = self.sent[0]
+        self.assertTrue(is_batch(transfer))
+        self.assertEqual(transfer.get('message_format'), BATCH_MESSAGE_FORMAT)
+        self.assertEqual(transfer.get('delivery_id'), 7)
+        messages = decode_batch(payload)
+        self.assertEqual([compat.tobytes(x.body) for x in messages], [b'foo', b'bar'])
+        self.assertEqual(messages[1].properties.subject, 's')
+
+    def test_max_count(self):
+        for i in range(5):
+            self.encoder.add(Message(b'x'))
+        self.assertEqual(len(self.sent), 1)
+        self.assertEqual(len(split_batch(self.sent[0][1])), 4)
+        self.assertEqual(len(self.encoder), 1)
+
+    def test_max_size(self):
+        self.encoder.add(Message(b'x' * 600))
+        self.encoder.add(Message(b'x' * 600))
+        self.assertEqual(len(self.sent), 1)
+        self.assertEqual(len(self.encoder), 1)
+
+    def test_message_too_large(self):
+        self.assertRaises(ValueError, self.encoder.add, Message(b'x' * 2048))
+
+    def test_encoded_messages(self):
+        encoded = Message(b'foo').encode()
+        self.encoder.add(encoded)
+        self.encoder.flush()
+        self.assertEqual(split_batch(self.sent[0][1])[0].tobytes(), encoded)
+
+
+class SplitBatchTestCase(unittest.TestCase):
+
+    def test_views_are_not_copied(self):
+        chunks = []
+        encoder = BatchEncoder(lambda t, c: chunks.extend(c), 0)
+        encoder.add(Message(b'\x00' * 300))
+        encoder.flush()
+        payload = bytearray(b''.join(chunks))
+        view, = split_batch(payload)
+        payload[-1] = 0xff
+        self.assertEqual(view[-1:].tobytes(), b'\xff')
+
+    def test_rejects_other_sections(self):
+        self.assertRaises(ValueError, split_batch, Message({'a': 1}).encode())
@@ -0,0 +1,84 @@
+import unittest
+
+from amqp.messaging import Message
+
+
+class MessageTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.message = Message(b'hello world',
+            header={'durable': True},
+            properties={'message_id': 'abc', 'to': 'queue'},
+            application_properties={'key': 1, 'str': 'value'},
+            message_annotations={'x-opt-partition-key': 'p1'},
+            footer={'x-opt-signature': b'sig'})
+        self.raw = self.message.encode()
+        self.decoded = Message.frombuf(self.raw)
+
+    def test_sections_are_decoded_lazily(self):
+        self.assertEqual(self.decoded.values, {})
+        self.decoded.properties
+        self.assertEqual(list(self.decoded.values), ['properties'])
+
+    def test_header(self):
+        self.assertTrue(self.decoded.header.durable)
+
+    def test_properties(self):
+        properties = self.decoded.properties
+        self.assertEqual((properties.message_id, properties.to),
+            ('abc', 'queue'))
+
+    def test_annotations(self):
+        self.assertEqual(self.decoded.message_annotations,
+            {'x-opt-partition-key': 'p1'})
+        self.assertEqual(self.decoded.footer, {'x-opt-signature': b'sig'})
+        self.assertEqual(self.decoded.delivery_annotations, None)
+
+    def test_application_properties(self):
+        self.assertEqual(self.decoded.application_properties,
+            {'key': 1, 'str': 'value'})
+
+    def test_data_body_is_view(self):
+        self.assertEqual(self.decoded.body_type, 'data')
+        self.assertIsInstance(self.decoded.body, memoryview)
+        self.assertEqual(self.decoded.body.tobytes(), b'hello world')
+
+    def test_unmodified_message_is_not_reencoded(self):
+        self.decoded.properties
+        self.assertEqual(self.decoded.encode(), self.raw)
+
+    def test_modified_section_is_reencoded(self):
+        self.decoded.properties = self.decoded.properties._replace(subject='s')
+        message = Message.frombuf(self.decoded.encode())
+        self.assertEqual(message.properties.subject, 's')
+        self.assertEqual(message.properties.message_id, 'abc')
+        self.assertEqual(message.body.tobytes(), b'hello world')
+
+    def test_multiple_data_sections(self):
+        message = Message.frombuf(Message([b'foo', b'bar']).encode())
+        self.assertEqual([bytes(x) for x in message.body], [b'foo', b'bar'])
+
+    def test_amqp_value(self):
+        message = Message.frombuf(Message({'a': [1, 2]}).encode())
+        self.assertEqual(message.body_type, 'amqp-value')
+        self.assertEqual(message.body, {'a': [1, 2]})
+
+    def test_amqp_sequence(self):
+        message = Message([1, 'x'], body_type='amqp-sequence')
+        message = Message.frombuf(message.encode())
+        self.assertEqual(message.body, [1, 'x'])
+
+    def test_message_id_types(self):
+        for message_id in (1, b'id'):
+            message = Message(b'', properties={'message_id': message_id})
+            message = Message.frombuf(message.encode())
+            self.assertEqual(message.properties.message_id, message_id)
+
+    def test_empty_message(self):
+        message = Message.frombuf(b'')
+        self.assertEqual(message.body, None)
+        self.assertEqual(message.encode(), b'')
+
+
+if __name__ == '__main__':
+    unittest.main()
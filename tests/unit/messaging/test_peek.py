@@ -0,0 +1,69 @@
+import unittest
+
+from amqp.messaging import Message
+from amqp.messaging import peek
+from amqp.messaging import peek_many
+
+
+class PeekTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.raw = Message(b'x' * 1024,
+            message_annotations={
+                'x-opt-foo': [1, 2],
+                'x-opt-partition-key': 'p1',
+                1: 'numeric'
+            },
+            application_properties={'key': 1, 'nested': {'a': 1}},
+            footer={'x-opt-footer': True}).encode()
+
+    def test_peek_annotation(self):
+        self.assertEqual(
+            peek(self.raw, 'message-annotations', 'x-opt-partition-key'),
+            'p1')
+
+    def test_peek_numeric_key(self):
+        self.assertEqual(peek(self.raw, 'message-annotations', 1), 'numeric')
+
+    def test_peek_collection_value(self):
+        self.assertEqual(peek(self.raw, 'application-properties', 'nested'),
+            {'a': 1})
+
+    def test_peek_footer_skips_body(self):
+        self.assertEqual(peek(self.raw, 'footer', 'x-opt-footer'), True)
+
+    def test_peek_missing_key(self):
+        self.assertEqual(peek(self.raw, 'application-properties', 'foo', 2), 2)
+
+    def test_peek_missing_section(self):
+        self.assertEqual(peek(self.raw, 'delivery-annotations', 'foo'), None)
+
+    def test_binary_key_does_not_match_string(self):
+        raw = Message(b'x', application_properties={u'k': 1}).encode()
+        self.assertEqual(peek(raw, 'application-properties', u'k'), 1)
+        if str is bytes:
+            # On Python 2, str keys also match text keys.
+            return
+        self.assertIsNone(peek(raw, 'application-properties', b'k'))
+        raw = Message(b'x', application_properties={b'k': 1}).encode()
+        self.assertIsNone(peek(raw, 'application-properties', u'k'))
+        self.assertEqual(peek(raw, 'application-properties', b'k'), 1)
+
+    def test_boolean_key_does_not_match_integer(self):
+        raw = Message(b'x',
+            application_properties={True: 'bool', 2: 'int'}).encode()
+        self.assertIsNone(peek(raw, 'application-properties', 1))
+        self.assertEqual(peek(raw, 'application-properties', True), 'bool')
+        self.assertIsNone(peek(raw, 'application-properties', False))
+        self.assertEqual(peek(raw, 'application-properties', 2), 'int')
+        self.assertIsNone(peek(raw, 'application-properties', 2.0))
+
+    def test_peek_many(self):
+        self.assertEqual(
+            peek_many(self.raw, 'message-annotations',
+                ['x-opt-foo', 'x-opt-partition-key', 'bar']),
+            {'x-opt-foo': [1, 2], 'x-opt-partition-key': 'p1'})
+
+
+if __name__ == '__main__':
+    unittest.main()
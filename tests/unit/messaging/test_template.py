@@ -0,0 +1,77 @@
+import unittest
+import uuid
+
+from amqp.messaging import Message
+from amqp.messaging import MessageTemplate
+from amqp.utils import compat
+
+
+class MessageTemplateTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.sections = {
+            'header': {'durable': True},
+            'message_annotations': {'x-opt-foo': 'bar'},
+            'properties': {'to': 'queue', 'content_type': 'application/json'},
+            'application_properties': {'key': 1},
+            'footer': {'x-opt-footer': True}
+        }
+
+    def test_fixed_width_slot_is_patched(self):
+        template = MessageTemplate(slots={'message_id': 'message-id-ulong'},
+            **self.sections)
+        self.assertIsNotNone(template.properties)
+        first = template.encode(b'foo', message_id=1)
+        second = template.encode(b'foo', message_id=2 ** 40)
+        self.assertEqual(len(first), len(second))
+        message = Message.frombuf(second)
+        self.assertEqual(message.properties.message_id, 2 ** 40)
+        self.assertEqual(message.properties.to, 'queue')
+
+    def test_matches_message_encoding(self):
+        template = MessageTemplate(slots=['subject'], **self.sections)
+        message = Message(b'foo', **self.sections)
+        message.properties = dict(self.sections['properties'], subject='s')
+        self.assertEqual(template.encode(b'foo', subject='s'),
+            message.encode())
+
+    def test_variable_width_slot(self):
+        template = MessageTemplate(slots=['message_id'], **self.sections)
+        self.assertIsNone(template.properties)
+        for value in ('abc' * 100, 5, uuid.uuid4(), b'id'):
+            message = Message.frombuf(template.encode(b'x', message_id=value))
+            self.assertEqual(message.properties.message_id, value)
+            self.assertEqual(message.properties.content_type,
+                'application/json')
+            self.assertEqual(message.application_properties, {'key': 1})
+            self.assertEqual(message.footer, {'x-opt-footer': True})
+
+    def test_unset_slot_is_null(self):
+        template = MessageTemplate(slots=['correlation_id'], **self.sections)
+        message = Message.frombuf(template.encode(b'x'))
+        self.assertEqual(message.properties.correlation_id, None)
+
+    def test_fixed_width_slot_requires_value(self):
+        template = MessageTemplate(slots=['creation_time'])
+        self.assertRaises(ValueError, template.encode, b'x')
+
+    def test_body_is_not_copied(self):
+        body = b'x' * 1024
+        template = MessageTemplate(slots={'message_id': 'message-id-uuid'})
+        chunks = template.render(body, message_id=uuid.uuid4())
+        self.assertIs(chunks[-1], body)
+
+    def test_multiple_data_sections(self):
+        template = MessageTemplate()
+        message = Message.frombuf(template.encode([b'foo', b'bar']))
+        self.assertEqual([compat.tobytes(x) for x in message.body], [b'foo', b'bar'])
+
+    def test_amqp_value_body(self):
+        template = MessageTemplate(body_type='amqp-value')
+        message = Message.frombuf(template.encode({'a': [1, 2]}))
+        self.assertEqual(message.body, {'a': [1, 2]})
+
+    def test_unknown_slot(self):
+        self.assertRaises(TypeError, MessageTemplate, slots=['foo'])
+        template = MessageTemplate(slots=['subject'])
+        self.assertRaises(TypeError, template.render, b'x', foo=1)
@@ -0,0 +1,68 @@
+import io
+import socket
+import unittest
+
+from amqp.transport.buffer import ReceiveBuffer
+from tests.unit.transport.test_frame import create_frame
+
+
+class ReceiveBufferTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.frames = [
+            create_frame('transfer', channel=1, payload=b'foo', handle=0,
+                delivery_id=i)
+            for i in range(3)
+        ]
+        self.stream = b'AMQP\x00\x01\x00\x00' + b''.join(self.frames)
+
+    def test_readinto(self):
+        buf = ReceiveBuffer()
+        self.assertEqual(buf.readinto(io.BytesIO(self.stream)),
+            len(self.stream))
+        frames = buf.frames()
+        self.assertEqual(len(frames), 3)
+        self.assertEqual(frames[2].payload.tobytes(), b'foo')
+        self.assertEqual(frames[2].performative.as_dto().delivery_id, 2)
+        self.assertEqual(len(buf), 0)
+
+    def test_partial_frames(self):
+        buf = ReceiveBuffer(size=len(self.frames[0]) + 10)
+        fp = io.BytesIO(self.stream)
+        received = []
+        while buf.readinto(fp):
+            received.extend(x.buf.tobytes() for x in buf.frames())
+        self.assertEqual(received, self.frames)
+
+    def test_recv_into(self):
+        a, b = socket.socketpair()
+        try:
+            a.sendall(self.stream[:20])
+            buf = ReceiveBuffer()
+            buf.recv_into(b)
+            self.assertEqual(buf.frames(), [])
+            a.sendall(self.stream[20:])
+            while len(buf) < len(self.stream) - 8:
+                buf.recv_into(b)
+            self.assertEqual(len(buf.frames()), 3)
+        finally:
+            a.close()
+            b.close()
+
+    def test_frame_exceeds_buffer(self):
+        buf = ReceiveBuffer(size=16)
+        buf.readinto(io.BytesIO(self.frames[0]))
+        self.assertRaises(ValueError, buf.frames)
+
+    def test_frames_before_oversized_header(self):
+        empty = b'\x00\x00\x00\x08\x02\x00\x00\x00'
+        buf = ReceiveBuffer(size=64)
+        buf.readinto(io.BytesIO(empty * 2 + b'\x00\x00\x10\x00'))
+        self.assertEqual(len(buf.frames()), 2)
+        self.assertEqual(buf.start, 16)
+        self.assertRaises(ValueError, buf.frames)
+
+    def test_full(self):
+        buf = ReceiveBuffer(size=4)
+        buf.readinto(io.BytesIO(b'\x00\x00\x00\x10'))
+        self.assertRaises(ValueError, buf.readinto, io.BytesIO(b'\x00'))
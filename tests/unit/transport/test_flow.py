@@ -0,0 +1,102 @@
+import io
+import unittest
+
+from amqp.transport.flow import LinkFlow
+from amqp.transport.flow import SessionFlow
+import amqp
+
+
+class LinkFlowTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.link = LinkFlow(0, max_credit=10, low_water=2)
+
+    def test_default_low_water(self):
+        self.assertEqual(LinkFlow(0, max_credit=10).low_water, 5)
+
+    def test_replenish_at_low_water(self):
+        self.link.replenish()
+        self.link.pending = False
+        results = [self.link.on_transfer() for _ in range(8)]
+        self.assertEqual(results, [False] * 7 + [True])
+        self.assertEqual(self.link.link_credit, 10)
+        self.assertEqual(self.link.delivery_count, 8)
+        self.assertTrue(self.link.pending)
+
+    def test_delivery_count_wraps(self):
+        self.link.delivery_count = 0xFFFFFFFF
+        self.link.on_transfer()
+        self.assertEqual(self.link.delivery_count, 0)
+
+    def test_on_send_without_credit(self):
+        self.assertFalse(self.link.on_send())
+
+    def test_on_flow_computes_credit(self):
+        self.link.delivery_count = 0xFFFFFFFE
+        self.link.on_flow(0xFFFFFFFC, 10)
+        self.assertEqual(self.link.link_credit, 8)
+        self.assertTrue(self.link.on_send())
+        self.assertEqual(self.link.delivery_count, 0xFFFFFFFF)
+        self.assertEqual(self.link.link_credit, 7)
+
+    def test_on_flow_without_delivery_count(self):
+        self.link.on_flow(None, 5, drain=True)
+        self.assertEqual(self.link.link_credit, 5)
+        self.assertTrue(self.link.drain)
+
+    def test_set_drain(self):
+        self.link.set_drain()
+        self.assertTrue(self.link.drain)
+        self.assertTrue(self.link.pending)
+
+
+class SessionFlowTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.frames = []
+        self.session = SessionFlow(incoming_window=100, low_water=10)
+        self.session.on_begin(0)
+        self.link = self.session.attach(LinkFlow(1, max_credit=50))
+        self.link.replenish()
+
+    def test_updates_are_merged(self):
+        for _ in range(25):
+            self.session.on_transfer(1)
+        self.assertEqual(self.session.flush(self.frames.append), 1)
+        self.assertEqual(self.frames[0].get('handle'), 1)
+        self.assertEqual(self.frames[0].get('link_credit'), 50)
+        self.assertEqual(self.frames[0].get('next_incoming_id'), 25)
+        self.assertFalse(self.session.has_pending())
+
+    def test_session_only_update(self):
+        self.session.flush(self.frames.append)
+        self.session.detach(1)
+        self.session.pending = True
+        self.assertEqual(self.session.flush(self.frames.append), 1)
+        self.assertEqual(self.frames[-1].get('handle'), None)
+
+    def test_incoming_window_replenished(self):
+        self.session.flush(self.frames.append)
+        self.link.low_water = 0
+        for _ in range(90):
+            self.session.on_transfer(1)
+        self.assertEqual(self.session.incoming_window, 100)
+        self.assertTrue(self.session.has_pending())
+
+    def test_on_send(self):
+        self.link.on_flow(0, 1)
+        self.assertTrue(self.session.on_send(1))
+        self.assertFalse(self.session.on_send(1))
+        self.assertEqual(self.session.next_outgoing_id, 1)
+
+    def test_flow_roundtrip(self):
+        self.session.flush(self.frames.append)
+        raw = self.frames[0].accept(amqp.SchemaEncoder())
+        buf = io.BytesIO(raw)
+        dto = amqp.parse_buffer(buf).accept(amqp.SchemaDecoder(buf)).as_dto()
+        self.assertEqual((dto.handle, dto.link_credit, dto.incoming_window),
+            (1, 50, 100))
+
+
+if __name__ == '__main__':
+    unittest.main()
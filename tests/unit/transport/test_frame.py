@@ -0,0 +1,61 @@
+import unittest
+
+from amqp.transport.frame import FRAME_HEADER
+from amqp.transport.frame import Frame
+from amqp.transport.frame import FrameSplitter
+from amqp.typesystem import SchemaEncoder
+import amqp
+
+
+def create_frame(type_name, channel=0, payload=b'', **params):
+    body = amqp.create_factory(type_name)(**params).accept(SchemaEncoder())\
+        + payload
+    return FRAME_HEADER.pack(8 + len(body), 2, 0, channel) + body
+
+
+class FrameTestCase(unittest.TestCase):
+
+    def test_header(self):
+        frame = Frame(create_frame('end', channel=3))
+        self.assertEqual(frame.channel, 3)
+        self.assertEqual(frame.type, 0)
+        self.assertEqual(len(frame), frame.size)
+
+    def test_performative_name(self):
+        frame = Frame(create_frame('transfer', handle=1))
+        self.assertEqual(frame.performative_name, 'transfer')
+
+    def test_performative(self):
+        frame = Frame(create_frame('transfer', handle=1))
+        self.assertEqual(frame.performative.as_dto().handle, 1)
+
+    def test_payload(self):
+        frame = Frame(create_frame('transfer', payload=b'foo', handle=1))
+        self.assertIsInstance(frame.payload, memoryview)
+        self.assertEqual(frame.payload.tobytes(), b'foo')
+
+    def test_empty_frame(self):
+        frame = Frame(b'\x00\x00\x00\x08\x02\x00\x00\x00')
+        self.assertIsNone(frame.performative_name)
+        self.assertIsNone(frame.performative)
+        self.assertEqual(frame.payload.tobytes(), b'')
+
+    def test_size_mismatch(self):
+        self.assertRaises(ValueError, Frame, create_frame('end') + b'\x00')
+
+
+class FrameSplitterTestCase(unittest.TestCase):
+
+    def test_split_chunks(self):
+        frames = [create_frame('end'), create_frame('close')]
+        stream = b'AMQP\x00\x01\x00\x00' + b''.join(frames)
+        splitter = FrameSplitter()
+        result = []
+        for i in range(0, len(stream), 5):
+            result.extend(splitter.feed(stream[i:i + 5]))
+        self.assertEqual(result, frames)
+        self.assertEqual(len(splitter), 0)
+
+    def test_malformed_size(self):
+        splitter = FrameSplitter()
+        self.assertRaises(ValueError, splitter.feed, b'\x00\x00\x00\x04')
@@ -0,0 +1,95 @@
+import functools
+import mmap
+import os
+import shutil
+import tempfile
+import unittest
+
+from amqp.transport import parallel
+from amqp.transport.parallel import FrameColumns
+from amqp.transport.parallel import FrameStats
+from amqp.transport.parallel import decode_parallel
+from amqp.transport.parallel import decode_shard
+from amqp.transport.parallel import index_frames
+from amqp.transport.parallel import split
+from amqp.transport.trace import TraceWriter
+from tests.unit.transport.test_frame import create_frame
+
+
+class ParallelDecodeTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.frames = [
+            create_frame('transfer', channel=1, payload=b'foo', handle=0,
+                delivery_id=i)
+            for i in range(10)
+        ] + [create_frame('end', channel=2)]
+        self.stream = b'AMQP\x00\x01\x00\x00' + b''.join(self.frames)
+        self.raw = os.path.join(self.tempdir, 'capture.amqp')
+        with open(self.raw, 'wb') as f:
+            f.write(self.stream)
+        self.trace = os.path.join(self.tempdir, 'capture.trace')
+        with TraceWriter(self.trace) as writer:
+            writer.feed(self.stream)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_index_frames(self):
+        offsets = index_frames(self.stream)
+        self.assertEqual(len(offsets), 11)
+        self.assertEqual(offsets[0], 8)
+        self.assertEqual(offsets[1], 8 + len(self.frames[0]))
+
+    def test_index_frames_ignores_incomplete(self):
+        self.assertEqual(len(index_frames(self.stream[:-1])), 10)
+
+    def test_split(self):
+        shards = split(list(range(10)), 4)
+        self.assertEqual([len(x) for x in shards], [3, 3, 3, 1])
+        self.assertEqual(sum(shards, []), list(range(10)))
+
+    def test_stats_in_process(self):
+        stats = decode_parallel(self.raw, raw=True, workers=0)
+        self.assertEqual(stats.frames['transfer'], 10)
+        self.assertEqual(stats.payload['transfer'], 30)
+        self.assertEqual(stats.channels[2], 1)
+        self.assertEqual(stats.errors, 0)
+
+    def test_shard_is_unmapped(self):
+        mapped = []
+
+        def map_file(*args, **kwargs):
+            mapped.append(original(*args, **kwargs))
+            return mapped[-1]
+
+        parallel.mmap.mmap, original = map_file, mmap.mmap
+        try:
+            stats = decode_shard(self.raw, index_frames(self.stream),
+                FrameStats())
+        finally:
+            parallel.mmap.mmap = original
+        self.assertEqual(stats.frames['transfer'], 10)
+        # Closed maps raise ValueError on access.
+        self.assertRaises(ValueError, len, mapped[0])
+
+    def test_stats_in_pool(self):
+        stats = decode_parallel(self.trace, FrameStats, workers=2, shards=3)
+        self.assertEqual(stats.frames['transfer'], 10)
+        self.assertEqual(stats.frames['end'], 1)
+
+    def test_columns_are_ordered(self):
+        columns = decode_parallel(self.raw,
+            functools.partial(FrameColumns, ['delivery_id']), raw=True,
+            workers=2, shards=4)
+        self.assertEqual(len(columns), 11)
+        self.assertEqual(columns.columns['delivery_id'],
+            list(range(10)) + [None])
+        self.assertEqual(columns.columns['performative'][-1], 'end')
+
+    def test_errors_are_counted(self):
+        with open(self.raw, 'wb') as f:
+            f.write(b'\x00\x00\x00\x0a\x02\x00\x00\x00\x00\xff')
+        stats = decode_parallel(self.raw, raw=True, workers=0)
+        self.assertEqual(stats.errors, 1)
@@ -0,0 +1,34 @@
+import unittest
+
+from amqp.transport.serial import serial_add
+from amqp.transport.serial import serial_diff
+from amqp.transport.serial import serial_le
+from amqp.transport.serial import serial_lt
+
+
+class SerialNumberTestCase(unittest.TestCase):
+
+    def test_add_wraps(self):
+        self.assertEqual(serial_add(0xFFFFFFFF, 2), 1)
+
+    def test_add_rejects_large_addend(self):
+        self.assertRaises(ValueError, serial_add, 0, 1 << 31)
+
+    def test_add_rejects_negative_addend(self):
+        self.assertRaises(ValueError, serial_add, 0, -1)
+
+    def test_diff_across_wrap(self):
+        self.assertEqual(serial_diff(1, 0xFFFFFFFF), 2)
+        self.assertEqual(serial_diff(0xFFFFFFFF, 1), -2)
+
+    def test_lt_across_wrap(self):
+        self.assertTrue(serial_lt(0xFFFFFFFF, 0))
+        self.assertFalse(serial_lt(0, 0xFFFFFFFF))
+
+    def test_le(self):
+        self.assertTrue(serial_le(5, 5))
+        self.assertFalse(serial_le(6, 5))
+
+
+if __name__ == '__main__':
+    unittest.main()
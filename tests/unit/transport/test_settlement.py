@@ -0,0 +1,131 @@
+import io
+import unittest
+
+from amqp.transport.settlement import IntervalSet
+from amqp.transport.settlement import SettlementTracker
+import amqp
+
+
+class IntervalSetTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.intervals = IntervalSet()
+
+    def test_add_merges_adjacent(self):
+        for n in (1, 2, 3, 5, 6, 4):
+            self.intervals.add(n)
+        self.assertEqual(self.intervals.ranges(), [(1, 6)])
+
+    def test_add_keeps_gaps(self):
+        for n in (10, 1, 5):
+            self.intervals.add(n)
+        self.assertEqual(self.intervals.ranges(), [(1, 1), (5, 5), (10, 10)])
+
+    def test_add_extends_right_range(self):
+        self.intervals.add(5)
+        self.intervals.add(4)
+        self.assertEqual(self.intervals.ranges(), [(4, 5)])
+
+    def test_add_duplicate_returns_false(self):
+        self.intervals.add(1)
+        self.assertFalse(self.intervals.add(1))
+        self.assertEqual(len(self.intervals), 1)
+
+    def test_contains(self):
+        for n in (1, 2, 3, 7):
+            self.intervals.add(n)
+        self.assertIn(2, self.intervals)
+        self.assertNotIn(5, self.intervals)
+        self.assertNotIn(0, self.intervals)
+
+    def test_add_merges_across_wrap(self):
+        for n in (4294967294, 4294967295, 0, 1):
+            self.intervals.add(n)
+        self.assertEqual(self.intervals.ranges(), [(4294967294, 1)])
+        self.assertIn(4294967295, self.intervals)
+        self.assertIn(0, self.intervals)
+        self.assertNotIn(2, self.intervals)
+
+    def test_serial_order(self):
+        for n in (1, 4294967290, 3):
+            self.intervals.add(n)
+        self.assertEqual(self.intervals.ranges(),
+            [(4294967290, 4294967290), (1, 1), (3, 3)])
+
+    def test_clear(self):
+        self.intervals.add(1)
+        self.intervals.clear()
+        self.assertEqual(len(self.intervals), 0)
+        self.assertEqual(self.intervals.ranges(), [])
+
+
+class SettlementTrackerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 0.0
+        self.frames = []
+        self.tracker = SettlementTracker(self.frames.append,
+            max_count=100, max_ranges=3, max_delay=1.0,
+            clock=lambda: self.now)
+
+    def test_contiguous_run_is_one_frame(self):
+        for n in range(10):
+            self.tracker.settle(n)
+        self.assertEqual(self.tracker.flush(), 1)
+        self.assertEqual(self.frames[0].get('first'), 0)
+        self.assertEqual(self.frames[0].get('last'), 9)
+
+    def test_wrapped_run_is_one_frame(self):
+        for n in (4294967294, 4294967295, 0, 1):
+            self.tracker.settle(n)
+        self.assertEqual(self.tracker.flush(), 1)
+        self.assertEqual(self.frames[0].get('first'), 4294967294)
+        self.assertEqual(self.frames[0].get('last'), 1)
+
+    def test_single_delivery_omits_last(self):
+        self.tracker.settle(5)
+        self.tracker.flush()
+        self.assertEqual(self.frames[0].get('first'), 5)
+        self.assertEqual(self.frames[0].get('last'), None)
+
+    def test_flush_on_max_count(self):
+        self.tracker.max_count = 5
+        sent = [self.tracker.settle(n) for n in range(5)]
+        self.assertEqual(sent, [0, 0, 0, 0, 1])
+        self.assertEqual(len(self.tracker), 0)
+
+    def test_flush_on_max_ranges(self):
+        sent = [self.tracker.settle(n) for n in (1, 3, 5)]
+        self.assertEqual(sent, [0, 0, 3])
+
+    def test_duplicate_is_ignored(self):
+        self.tracker.settle(1)
+        self.assertEqual(self.tracker.settle(1), 0)
+        self.assertEqual(len(self.tracker), 1)
+
+    def test_poll_flushes_after_max_delay(self):
+        self.tracker.settle(1)
+        self.assertEqual(self.tracker.poll(), 0)
+        self.now = 1.0
+        self.assertEqual(self.tracker.poll(), 1)
+        self.assertEqual(self.tracker.poll(), 0)
+
+    def test_poll_without_max_delay(self):
+        self.tracker.max_delay = None
+        self.tracker.settle(1)
+        self.now = 10.0
+        self.assertEqual(self.tracker.poll(), 0)
+
+    def test_disposition_roundtrip(self):
+        for n in range(3):
+            self.tracker.settle(n)
+        self.tracker.flush()
+        raw = self.frames[0].accept(amqp.SchemaEncoder())
+        buf = io.BytesIO(raw)
+        dto = amqp.parse_buffer(buf).accept(amqp.SchemaDecoder(buf)).as_dto()
+        self.assertEqual((dto.role, dto.first, dto.last, dto.settled),
+            (True, 0, 2, True))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import unittest
+
+from amqp.transport.table import FrameRouter
+from amqp.transport.table import NumberTable
+import amqp
+
+
+class NumberTableTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.table = NumberTable(7, capacity=2)
+
+    def test_allocate_is_dense(self):
+        numbers = [self.table.allocate(x) for x in 'abc']
+        self.assertEqual(numbers, [0, 1, 2])
+        self.assertEqual(self.table[1], 'b')
+
+    def test_allocate_reuses_released(self):
+        [self.table.allocate(x) for x in 'abc']
+        self.assertEqual(self.table.release(1), 'b')
+        self.assertEqual(self.table.allocate('d'), 1)
+        self.assertEqual(self.table.allocate('e'), 3)
+
+    def test_allocate_skips_bound(self):
+        self.table.bind(0, 'a')
+        self.table.release(0)
+        self.table.bind(0, 'b')
+        self.table.bind(1, 'c')
+        self.assertEqual(self.table.allocate('d'), 2)
+
+    def test_allocate_exhausted(self):
+        [self.table.allocate(x) for x in range(8)]
+        self.assertRaises(OverflowError, self.table.allocate, 'x')
+
+    def test_bind_grows(self):
+        self.table.bind(5, 'a')
+        self.assertEqual(len(self.table.slots), 8)
+        self.assertEqual(self.table.get(5), 'a')
+
+    def test_bind_out_of_range(self):
+        self.assertRaises(ValueError, self.table.bind, 8, 'a')
+
+    def test_bind_in_use(self):
+        self.table.bind(0, 'a')
+        self.assertRaises(KeyError, self.table.bind, 0, 'b')
+
+    def test_lookup(self):
+        self.table.bind(0, 'a')
+        self.assertIn(0, self.table)
+        self.assertNotIn(1, self.table)
+        self.assertEqual(self.table.get(100), None)
+        self.assertRaises(LookupError, self.table.__getitem__, 1)
+        self.assertEqual(len(self.table), 1)
+
+    def test_negative_numbers(self):
+        self.table.bind(0, 'a')
+        self.table.bind(7, 'b')
+        self.assertIsNone(self.table.get(-1))
+        self.assertNotIn(-1, self.table)
+        self.assertRaises(LookupError, self.table.__getitem__, -1)
+        self.assertRaises(LookupError, self.table.release, -1)
+        self.assertEqual(self.table[7], 'b')
+
+    def test_sparse_numbers(self):
+        table = NumberTable((1 << 32) - 1, capacity=2, dense_max=8)
+        table.bind(0xFFFFFF00, 'a')
+        table.bind(1, 'b')
+        self.assertEqual(len(table.slots), 2)
+        self.assertEqual(table[0xFFFFFF00], 'a')
+        self.assertEqual(table.values(), ['b', 'a'])
+        self.assertRaises(KeyError, table.bind, 0xFFFFFF00, 'c')
+        self.assertEqual(table.release(0xFFFFFF00), 'a')
+        self.assertNotIn(0xFFFFFF00, table)
+        self.assertEqual(len(table), 1)
+
+    def test_allocate_beyond_dense(self):
+        table = NumberTable(15, dense_max=2)
+        table.bind(3, 'x')
+        numbers = [table.allocate(x) for x in 'abc']
+        self.assertEqual(numbers, [0, 1, 2])
+        self.assertEqual(table.allocate('d'), 4)
+
+
+class FrameRouterTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.router = FrameRouter(channel_max=3, handle_capacity=1)
+        self.router.begin(2, 'session')
+        self.router.attach(2, 5, 'link')
+
+    def test_route_transfer(self):
+        frame = amqp.encodable('transfer', {'handle': 5})
+        self.assertEqual(self.router.route(2, frame), ('session', 'link'))
+
+    def test_route_session_performative(self):
+        frame = amqp.encodable('disposition',
+            {'role': 'receiver', 'first': 1})
+        self.assertEqual(self.router.route(2, frame), ('session', None))
+
+    def test_route_unknown_channel(self):
+        frame = amqp.encodable('transfer', {'handle': 5})
+        self.assertRaises(LookupError, self.router.route, 1, frame)
+
+    def test_negative_channel(self):
+        self.assertRaises(LookupError, self.router.end, -1)
+        self.assertRaises(LookupError, self.router.attach, -1, 0, 'link')
+        frame = amqp.encodable('transfer', {'handle': 5})
+        self.assertEqual(self.router.route(2, frame), ('session', 'link'))
+
+    def test_detach_and_end(self):
+        self.assertEqual(self.router.detach(2, 5), 'link')
+        self.assertEqual(self.router.end(2), 'session')
+        self.assertRaises(LookupError, self.router.attach, 2, 5, 'link')
+
+
+if __name__ == '__main__':
+    unittest.main()
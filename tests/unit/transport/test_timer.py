@@ -0,0 +1,111 @@
+import unittest
+
+from amqp.transport.heartbeat import EMPTY_FRAME
+from amqp.transport.heartbeat import HeartbeatMonitor
+from amqp.transport.timer import TimerWheel
+
+
+class Clock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TimerWheelTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+        self.wheel = TimerWheel(resolution=0.1, slots=8, clock=self.clock)
+        self.fired = []
+
+    def advance(self, now):
+        self.clock.now = now
+        return self.wheel.advance()
+
+    def test_timer_fires_after_deadline(self):
+        self.wheel.schedule(0.25, self.fired.append, 1)
+        self.assertEqual(self.advance(0.2), 0)
+        self.assertEqual(self.advance(0.35), 1)
+        self.assertEqual(self.fired, [1])
+        self.assertEqual(len(self.wheel), 0)
+
+    def test_timer_beyond_one_revolution(self):
+        self.wheel.schedule(2.0, self.fired.append, 1)
+        self.assertEqual(self.advance(1.0), 0)
+        self.assertEqual(self.advance(1.9), 0)
+        self.assertEqual(self.advance(2.0), 1)
+
+    def test_large_jump_fires_all(self):
+        for i in range(5):
+            self.wheel.schedule(i * 0.3, self.fired.append, i)
+        self.assertEqual(self.advance(10.0), 5)
+        self.assertEqual(sorted(self.fired), [0, 1, 2, 3, 4])
+
+    def test_cancelled_timer_does_not_fire(self):
+        timer = self.wheel.schedule(0.1, self.fired.append, 1)
+        timer.cancel()
+        self.assertEqual(self.advance(1.0), 0)
+        self.assertEqual(len(self.wheel), 0)
+
+
+class HeartbeatMonitorTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+        self.sent = []
+        self.idle = []
+        self.monitor = HeartbeatMonitor(
+            lambda c, f: self.sent.append((c, f)), self.idle.append,
+            wheel=TimerWheel(resolution=0.1, slots=16, clock=self.clock))
+
+    def advance(self, now):
+        self.clock.now = now
+        return self.monitor.advance()
+
+    def test_keepalive_sent_at_half_remote_timeout(self):
+        self.monitor.register('c1', idle_timeout=None,
+            remote_idle_timeout=2000)
+        self.advance(0.9)
+        self.assertEqual(self.sent, [])
+        self.advance(1.0)
+        self.assertEqual(self.sent, [('c1', EMPTY_FRAME)])
+
+    def test_keepalive_postponed_by_outgoing_frames(self):
+        heartbeat = self.monitor.register('c1', idle_timeout=None,
+            remote_idle_timeout=2000)
+        self.clock.now = 0.5
+        heartbeat.sent()
+        self.advance(1.0)
+        self.assertEqual(self.sent, [])
+        self.advance(1.5)
+        self.assertEqual(len(self.sent), 1)
+
+    def test_idle_peer_detected(self):
+        heartbeat = self.monitor.register('c1', idle_timeout=1000)
+        self.clock.now = 0.8
+        heartbeat.received()
+        self.advance(1.0)
+        self.assertEqual(self.idle, [])
+        self.advance(1.8)
+        self.assertEqual(self.idle, ['c1'])
+        self.assertEqual(len(self.monitor.wheel), 0)
+
+    def test_unregister_cancels_timers(self):
+        self.monitor.register('c1', idle_timeout=1000,
+            remote_idle_timeout=1000)
+        self.monitor.unregister('c1')
+        self.advance(5.0)
+        self.assertEqual((self.sent, self.idle), ([], []))
+        self.assertEqual(len(self.monitor), 0)
+
+    def test_default_idle_timeout(self):
+        heartbeat = self.monitor.register('c1')
+        self.assertEqual(heartbeat.idle_interval, 600.0)
+        self.assertEqual(heartbeat.keepalive_interval, None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import functools
+import os
+import shutil
+import tempfile
+import unittest
+
+from amqp.transport.trace import RECEIVED
+from amqp.transport.trace import SENT
+from amqp.transport.trace import TraceReader
+from amqp.transport.trace import TraceWriter
+from amqp.transport.trace import replay
+from tests.unit.transport.test_frame import create_frame
+
+
+class TraceTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.filepath = os.path.join(self.tempdir, 'test.trace')
+        self.frames = [
+            create_frame('begin', channel=1, next_outgoing_id=0,
+                incoming_window=1, outgoing_window=1),
+            create_frame('transfer', channel=1, payload=b'foo', handle=0),
+            create_frame('end', channel=2),
+        ]
+        clock = functools.partial(next, iter([10.0, 10.5, 11.0]))
+        with TraceWriter(self.filepath, clock=clock) as writer:
+            writer.feed(b'AMQP\x00\x01\x00\x00' + b''.join(self.frames[:2]))
+            writer.sent(self.frames[2])
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_read_frames(self):
+        with TraceReader(self.filepath) as reader:
+            self.assertEqual(len(reader), 3)
+            self.assertEqual([x.buf.tobytes() for x in reader], self.frames)
+
+    def test_keep_frames_after_close(self):
+        with TraceReader(self.filepath) as reader:
+            kept = list(reader)
+        self.assertEqual(kept[1].performative_name, 'transfer')
+        self.assertEqual(kept[1].payload.tobytes(), b'foo')
+
+    def test_index_entries(self):
+        with TraceReader(self.filepath) as reader:
+            frame = reader[2]
+            self.assertEqual(frame.timestamp, 11.0)
+            self.assertEqual(frame.direction, SENT)
+            self.assertEqual(frame.channel, 2)
+            del frame
+
+    def test_filter_channel(self):
+        with TraceReader(self.filepath) as reader:
+            names = [x.performative_name for x in reader.frames(channel=1)]
+        self.assertEqual(names, ['begin', 'transfer'])
+
+    def test_filter_performative(self):
+        with TraceReader(self.filepath) as reader:
+            frames = list(reader.frames(performatives=['transfer']))
+            self.assertEqual(len(frames), 1)
+            self.assertEqual(frames[0].payload.tobytes(), b'foo')
+            self.assertEqual(frames[0].performative.as_dto().handle, 0)
+            del frames
+
+    def test_filter_direction(self):
+        with TraceReader(self.filepath) as reader:
+            names = [x.performative_name
+                for x in reader.frames(direction=RECEIVED)]
+        self.assertEqual(names, ['begin', 'transfer'])
+
+    def test_not_a_trace(self):
+        with open(self.filepath, 'wb') as f:
+            f.write(b'\x00' * 16)
+        self.assertRaises(ValueError, TraceReader, self.filepath)
+
+    def test_replay_recorded_speed(self):
+        delays = []
+        with TraceReader(self.filepath) as reader:
+            count = replay(reader, lambda frame: None, speed=1.0,
+                clock=lambda: 0.0, sleep=delays.append)
+        self.assertEqual(count, 3)
+        self.assertEqual(delays, [0.5, 1.0])
+
+    def test_replay_maximum_speed(self):
+        delays = []
+        with TraceReader(self.filepath) as reader:
+            replay(reader, lambda frame: None, sleep=delays.append)
+        self.assertEqual(delays, [])
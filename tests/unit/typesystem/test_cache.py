@@ -0,0 +1,121 @@
+import unittest
+
+import amqp
+from amqp.typesystem import EncodingCache
+from amqp.typesystem import SchemaEncoder
+
+
+class EncodableKeyTestCase(unittest.TestCase):
+
+    def test_scalar_key(self):
+        a = amqp.encodable_factory('symbol', 'foo')
+        b = amqp.encodable_factory('symbol', 'foo')
+        self.assertEqual(a.get_key(), b.get_key())
+        self.assertNotEqual(a.get_key(),
+            amqp.encodable_factory('string', 'foo').get_key())
+
+    def test_signed_zero(self):
+        a = amqp.encodable_factory('double', 0.0)
+        b = amqp.encodable_factory('double', -0.0)
+        self.assertNotEqual(a.get_key(), b.get_key())
+
+    def test_restricted_key(self):
+        a = amqp.encodable('amqp-error', 'amqp:not-found')
+        b = amqp.encodable('amqp-error', 'amqp:not-found')
+        self.assertEqual(a.get_key(), b.get_key())
+
+    def test_identity_semantics(self):
+        a = amqp.encodable_factory('list', [amqp.encodable_factory('uint', 1)])
+        b = amqp.encodable_factory('list', [amqp.encodable_factory('uint', 1)])
+        self.assertNotEqual(a, b)
+        self.assertEqual(hash(a), hash(a))
+
+    def test_frozen_collection(self):
+        a = amqp.encodable_factory('map', {'foo': 1}).freeze()
+        b = amqp.encodable_factory('map', {'foo': 1}).freeze()
+        self.assertEqual(a.get_key(), b.get_key())
+        hash(a.get_key())
+
+    def test_frozen_composite_can_not_be_modified(self):
+        error = amqp.create_factory('error')(
+            condition='amqp:not-found').freeze()
+        self.assertRaises(TypeError, error.set, 'description', 'foo')
+
+
+class EncodingCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = EncodingCache(max_entries=4)
+        self.encoder = SchemaEncoder(cache=self.cache)
+
+    def create_error(self, description='foo'):
+        return amqp.create_factory('error')(condition='amqp:not-found',
+            description=description).freeze()
+
+    def test_hit(self):
+        encoded = self.create_error().accept(self.encoder)
+        self.assertEqual(self.cache.hits, 0)
+        # The error, its condition and its description are cached.
+        self.assertEqual(self.cache.misses, 3)
+        self.assertIs(self.create_error().accept(self.encoder), encoded)
+        self.assertEqual(self.cache.hits, 1)
+        self.assertEqual(encoded,
+            self.create_error().accept(SchemaEncoder()))
+
+    def test_mutable_values_are_not_cached(self):
+        amqp.create_factory('transfer')(handle=1).accept(self.encoder)
+        self.assertEqual(len(self.cache), 0)
+
+    def test_members_of_mutable_values_are_cached(self):
+        symbol = amqp.encodable_factory('symbol', 'foo')
+        amqp.encodable_factory('list', [symbol]).accept(self.encoder)
+        self.assertEqual(len(self.cache), 1)
+
+    def test_array_members(self):
+        array = amqp.encodable_factory('array', [
+            amqp.encodable_factory('symbol', 'foo')])
+        encoded = array.accept(self.encoder)
+        amqp.encodable_factory('symbol', 'foo').accept(self.encoder)
+        self.assertEqual(array.accept(self.encoder), encoded)
+        self.assertEqual(len(self.cache), 2)
+
+    def test_max_entries(self):
+        for i in range(10):
+            self.create_error(str(i)).accept(self.encoder)
+        self.assertEqual(len(self.cache), 4)
+        self.assertEqual(self.cache.evictions,
+            self.cache.misses - self.cache.stats()['entries'])
+
+    def test_max_bytes(self):
+        cache = EncodingCache(max_bytes=64)
+        encoder = SchemaEncoder(cache=cache)
+        for i in range(10):
+            amqp.encodable_factory('string', str(i) * 20).accept(encoder)
+            self.assertTrue(cache.size <= 64)
+        amqp.encodable_factory('string', 'x' * 100).accept(encoder)
+        self.assertTrue(cache.size <= 64)
+
+    def test_lru_order(self):
+        symbols = [amqp.encodable_factory('symbol', str(i)) for i in range(5)]
+        for symbol in symbols[:4]:
+            symbol.accept(self.encoder)
+        symbols[0].accept(self.encoder)
+        symbols[4].accept(self.encoder)
+        symbols[0].accept(self.encoder)
+        self.assertEqual(self.cache.stats()['hits'], 2)
+
+    def test_clear(self):
+        self.create_error().accept(self.encoder)
+        self.cache.clear()
+        self.assertEqual(self.cache.stats(), {'entries': 0, 'size': 0,
+            'hits': 0, 'misses': 0, 'evictions': 0})
+
+    def test_signed_zero(self):
+        encoded = amqp.encodable_factory('list',
+            [amqp.encodable_factory('double', 0.0)]).freeze()\
+            .accept(self.encoder)
+        negative = amqp.encodable_factory('list',
+            [amqp.encodable_factory('double', -0.0)]).freeze()
+        self.assertNotEqual(negative.accept(self.encoder), encoded)
+        self.assertEqual(negative.accept(self.encoder),
+            negative.accept(SchemaEncoder()))
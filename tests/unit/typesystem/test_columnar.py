@@ -0,0 +1,101 @@
+import array
+import unittest
+
+from amqp.exc import DecodeError
+from amqp.typesystem import ColumnDecoder
+from amqp.typesystem import SchemaEncoder
+from amqp.typesystem.columnar import get_typecode
+import amqp
+
+
+def encode(type_name, **params):
+    return amqp.create_factory(type_name)(**params).accept(SchemaEncoder())
+
+
+class ColumnDecoderTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.transfers = [
+            encode('transfer', handle=1, delivery_id=i, delivery_tag=b'x',
+                settled=bool(i % 2))
+            for i in range(3)
+        ]
+
+    def test_numeric_columns_are_arrays(self):
+        decoder = ColumnDecoder('transfer').decode_many(self.transfers)
+        self.assertEqual(len(decoder), 3)
+        self.assertIsInstance(decoder['delivery_id'].values, array.array)
+        self.assertEqual(list(decoder['delivery_id'].values), [0, 1, 2])
+        self.assertEqual(decoder['settled'].tolist(), [False, True, False])
+
+    def test_binary_columns_are_lists(self):
+        decoder = ColumnDecoder('transfer').decode_many(self.transfers)
+        self.assertEqual(decoder['delivery_tag'].values, [b'x'] * 3)
+
+    def test_omitted_fields_are_null(self):
+        decoder = ColumnDecoder('transfer').decode_many(self.transfers)
+        column = decoder['message_format']
+        self.assertEqual(list(column.nulls), [1, 1, 1])
+        self.assertEqual(column.tolist(), [None] * 3)
+
+    def test_selected_fields(self):
+        decoder = ColumnDecoder('transfer', ['handle'])\
+            .decode_many(self.transfers)
+        self.assertEqual([x.attname for x in decoder.columns], ['handle'])
+        self.assertEqual(list(decoder['handle'].values), [1, 1, 1])
+
+    def test_unknown_field(self):
+        self.assertRaises(TypeError, ColumnDecoder, 'transfer', ['foo'])
+
+    def test_not_composite(self):
+        self.assertRaises(TypeError, ColumnDecoder, 'uint')
+
+    def test_described_field(self):
+        decoder = ColumnDecoder('disposition')
+        decoder.decode(encode('disposition', role='receiver', first=1,
+            settled=True, state=amqp.create_factory('accepted')()))
+        self.assertEqual(decoder['role'].tolist(), [True])
+        self.assertEqual(type(decoder['state'].values[0]).__name__,
+            'accepted')
+
+    def test_other_type(self):
+        decoder = ColumnDecoder('flow')
+        self.assertRaises(DecodeError, decoder.decode, self.transfers[0])
+
+    def test_truncated_row_is_not_appended(self):
+        decoder = ColumnDecoder('transfer')
+        decoder.decode(self.transfers[0])
+        self.assertRaises(EOFError, decoder.decode, self.transfers[1][:-1])
+        self.assertEqual(len(decoder), 1)
+        self.assertEqual(set(len(x) for x in decoder.columns), set([1]))
+
+    def test_invalid_row_is_not_appended(self):
+        # The delivery-id is replaced by an empty string.
+        encoded = encode('transfer', handle=1, delivery_id=5)
+        self.assertIn(b'\x52\x05', encoded)
+        encoded = encoded.replace(b'\x52\x05', b'\xa1\x00')
+        decoder = ColumnDecoder('transfer')
+        self.assertRaises(DecodeError, decoder.decode, encoded)
+        self.assertEqual(len(decoder), 0)
+        self.assertEqual(set(len(x) for x in decoder.columns), set([0]))
+
+    def test_flow(self):
+        decoder = ColumnDecoder('flow')
+        decoder.decode(encode('flow', incoming_window=2048,
+            next_outgoing_id=1, outgoing_window=2048, link_credit=100))
+        self.assertEqual(decoder['link_credit'].tolist(), [100])
+        self.assertEqual(decoder['handle'].tolist(), [None])
+
+
+class TypecodeTestCase(unittest.TestCase):
+
+    def test_width(self):
+        for source in ('uint', 'long', 'ubyte'):
+            typecode = get_typecode(source)
+            width = {'uint': 4, 'long': 8, 'ubyte': 1}[source]
+            self.assertGreaterEqual(array.array(typecode).itemsize, width)
+
+    def test_non_numeric(self):
+        self.assertIsNone(get_typecode('string'))
+        self.assertIsNone(get_typecode(None))
+        self.assertEqual(get_typecode('double'), 'd')
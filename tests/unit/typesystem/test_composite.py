@@ -100,6 +100,24 @@ class CompositeTestCase(unittest.TestCase):
         encodable.set(field_name, value)
         self.assertEqual(value, encodable.get(field_name))
 
+    def test_encode_does_not_remove_trailing_null_fields(self):
+        encodable = self.factory(**self.get_fields(
+            exclude=['provider_by_tuple_multiple_null']))
+        length = len(encodable)
+        raw = encodable.accept(self.encoder)
+        self.assertEqual(len(encodable), length)
+        self.assertEqual(encodable.accept(self.encoder), raw)
+
+    def test_set_trailing_field_to_null(self):
+        encodable = amqp.create_factory('transfer')(handle=1, settled=True)
+        self.assertEqual(encodable.get_field_count(), 5)
+        encodable.set('settled', None)
+        self.assertEqual(encodable.get_field_count(), 1)
+        self.assertEqual(encodable.accept(self.encoder),
+            amqp.create_factory('transfer')(handle=1).accept(self.encoder))
+        encodable.set('more', True)
+        self.assertEqual(encodable.get_field_count(), 6)
+
     def test_as_dto(self):
         encodable = self.factory(**self.get_fields())
         dto = encodable.as_dto()
@@ -0,0 +1,66 @@
+import io
+import unittest
+
+import amqp
+from amqp.typesystem import SchemaDecoder
+from amqp.typesystem import SchemaEncoder
+from amqp.typesystem import parse_buffer
+
+
+class CompactEncodingTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.encoder = SchemaEncoder()
+        self.legacy = SchemaEncoder(compact=False)
+
+    def encode(self, encodable, encoder=None):
+        encoded = encodable.accept(encoder or self.encoder)
+        buf = io.BytesIO(encoded)
+        return encoded, parse_buffer(buf).accept(SchemaDecoder(buf)).as_dto()
+
+    def test_boolean(self):
+        self.assertEqual(self.encode(amqp.encodable_factory('boolean', True)),
+            (b'\x41', True))
+        self.assertEqual(self.encode(amqp.encodable_factory('boolean', False)),
+            (b'\x42', False))
+        self.assertEqual(
+            self.encode(amqp.encodable_factory('boolean', True), self.legacy),
+            (b'\x56\x01', True))
+
+    def test_empty_list(self):
+        self.assertEqual(self.encode(amqp.encodable_factory('list', [])),
+            (b'\x45', []))
+        self.assertEqual(
+            self.encode(amqp.encodable_factory('list', []), self.legacy),
+            (b'\xc0\x01\x00', []))
+
+    def test_empty_composite(self):
+        encoded, decoded = self.encode(amqp.create_factory('close')())
+        self.assertEqual(encoded, b'\x00\x53\x18\x45')
+        self.assertEqual(decoded.error, None)
+
+    def test_signed_small_range(self):
+        for value, size in [(0, 2), (-128, 2), (127, 2), (-129, 9), (128, 9)]:
+            encoded, decoded = self.encode(
+                amqp.encodable_factory('long', value))
+            self.assertEqual((len(encoded), decoded), (size, value))
+
+    def test_int_zero(self):
+        self.assertEqual(self.encode(amqp.encodable_factory('int', 0)),
+            (b'\x54\x00', 0))
+
+    def test_timestamp(self):
+        self.assertEqual(self.encode(amqp.encodable_factory('timestamp', 5)),
+            (b'\x83' + b'\x00' * 7 + b'\x05', 5))
+
+    def test_array_width_by_magnitude(self):
+        for type_name, values in [
+            ('uint', [5, 1024, 0]),
+            ('uint', [0, 0]),
+            ('ulong', [255, 2 ** 40]),
+            ('long', [-1, 5, -300]),
+            ('int', [-200, 3]),
+            ('string', ['a', 'b' * 300])]:
+            encodable = amqp.encodable_factory('array',
+                [amqp.encodable_factory(type_name, x) for x in values])
+            self.assertEqual(self.encode(encodable)[1], values)
@@ -0,0 +1,126 @@
+import io
+import unittest
+
+from amqp.typesystem import SchemaEncoder
+from amqp.typesystem.events import EventReader
+from amqp.typesystem.events import iter_events
+from amqp.typesystem.events import parse_events
+import amqp
+
+
+def encode(type_name, value, **kwargs):
+    return bytes(amqp.encodable_factory(type_name, value, **kwargs)
+        .accept(amqp.Encoder()))
+
+
+class Stream(object):
+    """A file-like object that does not support seeking."""
+
+    def __init__(self, data):
+        self.buf = io.BytesIO(data)
+
+    def read(self, n):
+        return self.buf.read(n)
+
+
+class EventReaderTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.transfer = bytes(amqp.create_factory('transfer')(handle=1,
+            delivery_id=2, delivery_tag=b'x').accept(SchemaEncoder()))
+
+    def test_composite(self):
+        events = list(iter_events(io.BytesIO(self.transfer)))
+        self.assertEqual(events[:3],
+            [('described', 0x14), ('start_list', 3), ('scalar', 'uint', 1)])
+        self.assertEqual(events[-1], ('end',))
+        self.assertEqual(len(events), 6)
+
+    def test_nested(self):
+        events = list(iter_events(io.BytesIO(
+            encode('map', {'foo': [[], [u'bar']]}))))
+        self.assertEqual([x[0] for x in events], ['start_map', 'scalar',
+            'start_list', 'start_list', 'end', 'start_list', 'scalar', 'end',
+            'end', 'end'])
+        self.assertEqual(events[6], ('scalar', 'string', 'bar'))
+
+    def test_map(self):
+        events = list(iter_events(io.BytesIO(encode('map', {'foo': 1}))))
+        self.assertEqual(events[0], ('start_map', 1))
+        self.assertEqual([x[0] for x in events[1:]],
+            ['scalar', 'scalar', 'end'])
+
+    def test_array(self):
+        events = list(iter_events(io.BytesIO(
+            encode('array', [amqp.encodable_factory('uint', x)
+                for x in (1, 2, 3)], sd='foo'))))
+        self.assertEqual(events[0], ('described', 'foo'))
+        self.assertEqual(events[1][:2], ('start_array', 3))
+        self.assertEqual([x[2] for x in events[2:5]], [1, 2, 3])
+        self.assertEqual(events[-1], ('end',))
+
+    def test_multiple_values(self):
+        events = list(iter_events(io.BytesIO(self.transfer * 3)))
+        self.assertEqual(len(events), 18)
+
+    def test_truncated(self):
+        buf = io.BytesIO(self.transfer[:-1])
+        self.assertRaises(EOFError, list, iter_events(buf))
+
+    def test_skip(self):
+        for buf in (io.BytesIO(self.transfer * 2), Stream(self.transfer * 2)):
+            reader = EventReader(buf)
+            events = []
+            for event in reader:
+                events.append(event)
+                if event[0] == 'start_list':
+                    reader.skip()
+            self.assertEqual(events, [('described', 0x14), ('start_list', 3)]
+                * 2)
+
+    def test_skip_truncated(self):
+        for buf in (io.BytesIO(self.transfer[:-1]),
+                Stream(self.transfer[:-1])):
+            reader = EventReader(buf)
+            events = iter(reader)
+            self.assertEqual(next(events), ('described', 0x14))
+            self.assertEqual(next(events), ('start_list', 3))
+            reader.skip()
+            self.assertRaises(EOFError, next, events)
+
+    def test_skip_nested(self):
+        reader = EventReader(io.BytesIO(encode('map', {'foo': [1, 2]})))
+        events = []
+        for event in reader:
+            events.append(event)
+            if event[0] == 'start_list':
+                reader.skip()
+        self.assertEqual([x[0] for x in events],
+            ['start_map', 'scalar', 'start_list', 'end'])
+
+    def test_skip_requires_collection(self):
+        reader = EventReader(io.BytesIO(encode('uint', 1)))
+        for event in reader:
+            self.assertRaises(RuntimeError, reader.skip)
+
+    def test_parse_events(self):
+        handler = Handler()
+        parse_events(io.BytesIO(self.transfer), handler)
+        self.assertEqual(handler.scalars, [1, 2, b'x'])
+        self.assertEqual(handler.depth, 0)
+
+
+class Handler(object):
+
+    def __init__(self):
+        self.scalars = []
+        self.depth = 0
+
+    def start_list(self, count):
+        self.depth += 1
+
+    def end(self):
+        self.depth -= 1
+
+    def scalar(self, type_name, value):
+        self.scalars.append(value)
@@ -0,0 +1,103 @@
+import io
+import unittest
+
+import amqp
+from amqp.typesystem import CallbackInstrumentation
+from amqp.typesystem import CodecStats
+from amqp.typesystem import RawDecoder
+from amqp.typesystem import ScatterEncoder
+from amqp.typesystem import SchemaDecoder
+from amqp.typesystem import SchemaEncoder
+from amqp.typesystem import instrument
+from amqp.typesystem.instrument import Histogram
+
+
+class CodecStatsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.stats = CodecStats()
+        self.transfer = amqp.create_factory('transfer')(handle=1,
+            delivery_id=2, settled=True)
+
+    def encode(self, encodable, encoder=None):
+        return encodable.accept(encoder or SchemaEncoder(
+            instrumentation=self.stats))
+
+    def decode(self, encoded, decoder_class=SchemaDecoder):
+        buf = io.BytesIO(encoded)
+        node = amqp.parse_buffer(buf, instrumentation=self.stats)
+        return node.accept(decoder_class(buf, instrumentation=self.stats))
+
+    def test_encode_counts_values_and_octets(self):
+        encoded = self.encode(self.transfer)
+        snapshot = self.stats.snapshot()['encode']
+        self.assertEqual(snapshot['values']['transfer'], 1)
+        self.assertEqual(snapshot['octets']['transfer'], len(encoded))
+        self.assertEqual(snapshot['values']['handle'], 1)
+        self.assertEqual(snapshot['histograms']['transfer']['count'], 1)
+        self.assertNotIn('handle', snapshot['histograms'])
+
+    def test_decode_counts_values_and_octets(self):
+        encoded = SchemaEncoder().visit(self.transfer)
+        self.decode(encoded)
+        snapshot = self.stats.snapshot()
+        self.assertEqual(snapshot['decode']['values']['transfer'], 1)
+        self.assertEqual(snapshot['decode']['octets']['transfer'],
+            len(encoded))
+        self.assertEqual(snapshot['parse']['values']['transfer'], 1)
+        self.assertEqual(snapshot['parse']['octets']['transfer'], len(encoded))
+        self.assertEqual(snapshot['parse']['histograms']['transfer']['count'],
+            1)
+
+    def test_raw_decoder_reports_definition_name(self):
+        self.decode(SchemaEncoder().visit(self.transfer), RawDecoder)
+        snapshot = self.stats.snapshot()['decode']
+        self.assertEqual(snapshot['values']['transfer'], 1)
+        self.assertEqual(snapshot['histograms']['transfer']['count'], 1)
+
+    def test_scatter_encoder_reports_octets(self):
+        encoder = ScatterEncoder(threshold=4, instrumentation=self.stats)
+        encodable = amqp.encodable_factory('binary', b'x' * 16)
+        self.encode(encodable, encoder)
+        self.assertEqual(self.stats.snapshot()['encode']['octets']['binary'],
+            18)
+
+    def test_reset(self):
+        self.encode(self.transfer)
+        self.stats.reset()
+        self.assertEqual(self.stats.snapshot()['encode']['values'], {})
+
+    def test_install(self):
+        instrument.install(self.stats)
+        try:
+            self.transfer.accept(SchemaEncoder())
+        finally:
+            instrument.install(None)
+        self.transfer.accept(SchemaEncoder())
+        snapshot = self.stats.snapshot()['encode']
+        self.assertEqual(snapshot['values']['transfer'], 1)
+
+
+class CallbackInstrumentationTestCase(unittest.TestCase):
+
+    def test_callback_is_invoked(self):
+        events = []
+        instrumentation = CallbackInstrumentation(
+            lambda *args: events.append(args))
+        encoded = amqp.encodable_factory('uint', 1)\
+            .accept(SchemaEncoder(instrumentation=instrumentation))
+        operation, key, size, elapsed = events[0]
+        self.assertEqual((operation, key, size), ('encode', 'uint', 2))
+        self.assertEqual(len(encoded), 2)
+
+
+class HistogramTestCase(unittest.TestCase):
+
+    def test_buckets_are_cumulative(self):
+        histogram = Histogram([1, 2])
+        for value in (0.5, 1.5, 1.5, 3):
+            histogram.observe(value)
+        self.assertEqual(histogram.as_dict()['buckets'],
+            [(1, 1), (2, 3), ('+Inf', 4)])
+        self.assertEqual(histogram.count, 4)
+        self.assertEqual(histogram.sum, 6.5)
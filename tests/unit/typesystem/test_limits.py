@@ -0,0 +1,109 @@
+import io
+import struct
+import unittest
+
+from amqp.exc import DecodeError
+from amqp.exc import LimitExceeded
+from amqp.typesystem import DecodeLimits
+from amqp.typesystem import RawDecoder
+from amqp.typesystem import parse_buffer
+from amqp.typesystem.node import Node
+from tests.unit.typesystem.test_nesting import nest
+import amqp
+
+
+def decode(encoded, limits=None):
+    buf = io.BytesIO(encoded)
+    return parse_buffer(buf, limits=limits).accept(RawDecoder(buf))
+
+
+class DecodeLimitsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.encoded = amqp.encodable_factory('map',
+            {'foo': 'bar' * 10, 'baz': [1, 2, 3]}).accept(amqp.Encoder())
+
+    def test_within_limits(self):
+        limits = DecodeLimits(max_size=len(self.encoded), max_count=4,
+            max_depth=2, max_length=30)
+        self.assertEqual(decode(self.encoded, limits).as_dto()['baz'],
+            [1, 2, 3])
+
+    def test_max_size(self):
+        limits = DecodeLimits(max_size=len(self.encoded) - 1)
+        self.assertRaises(LimitExceeded, decode, self.encoded, limits)
+
+    def test_max_count(self):
+        limits = DecodeLimits(max_count=3)
+        self.assertRaises(LimitExceeded, decode, self.encoded, limits)
+
+    def test_max_depth(self):
+        encoded = nest(4).accept(amqp.Encoder())
+        decode(encoded, DecodeLimits(max_depth=6))
+        self.assertRaises(LimitExceeded, decode, encoded,
+            DecodeLimits(max_depth=5))
+
+    def test_max_length(self):
+        limits = DecodeLimits(max_length=29)
+        self.assertRaises(LimitExceeded, decode, self.encoded, limits)
+
+    def test_default_limits(self):
+        Node.limits = DecodeLimits(max_depth=1)
+        try:
+            self.assertRaises(LimitExceeded, decode,
+                nest(4).accept(amqp.Encoder()))
+        finally:
+            Node.limits = None
+
+
+class MalformedInputTestCase(unittest.TestCase):
+
+    def test_size_exceeds_buffer(self):
+        # A list32 declaring 4GB of members.
+        encoded = b'\xd0\xff\xff\xff\xff\x00\x00\x00\x01\x40'
+        self.assertRaises(DecodeError, decode, encoded)
+
+    def test_length_exceeds_buffer(self):
+        self.assertRaises(DecodeError, decode, b'\xb0\xff\xff\xff\xffabc')
+
+    def test_member_exceeds_collection(self):
+        # A list8 of 3 octets holding a string of 5 octets.
+        encoded = b'\xc0\x03\x01\xa1\x05foobar'
+        self.assertRaises(DecodeError, decode, encoded)
+
+    def test_count_exceeds_size(self):
+        encoded = b'\xc0\x02\xff\x40'
+        self.assertRaises(DecodeError, decode, encoded)
+
+    def test_array_of_zero_width_members(self):
+        # An array32 declaring a million null members in 6 octets.
+        encoded = b'\xf0' + struct.pack('>II', 6, 10**6) + b'\x40\x00'
+        self.assertRaises(DecodeError, decode, encoded)
+        encoded = b'\xf0' + struct.pack('>II', 6, 0xFFFFFFFF) + b'\x40\x00'
+        self.assertRaises(DecodeError, decode, encoded)
+
+    def test_array_count_exceeds_size(self):
+        # An array8 of uint members declaring 3 members in 8 octets.
+        self.assertRaises(DecodeError, decode,
+            b'\xe0\x0a\x03\x70' + b'\x00' * 8)
+        # An array8 of string members declaring 4 members in 3 octets.
+        self.assertRaises(DecodeError, decode,
+            b'\xe0\x05\x04\xa1\x00\x00\x00')
+
+    def test_array_members(self):
+        encoded = amqp.encodable_factory('array', [
+            amqp.encodable_factory('uint', x) for x in (1, 2, 3)])\
+            .accept(amqp.Encoder())
+        self.assertEqual(decode(encoded).as_dto(), [1, 2, 3])
+
+    def test_more_members_than_count(self):
+        encoded = b'\xc0\x03\x01\x40\x40'
+        self.assertRaises(DecodeError, decode, encoded)
+
+    def test_truncated_header(self):
+        self.assertRaises(DecodeError, decode, b'\xd0\x00\x00')
+
+    def test_trailing_data_is_ignored(self):
+        buf = io.BytesIO(b'\xc0\x02\x01\x40\xff\xff')
+        node = parse_buffer(buf)
+        self.assertEqual(node.end, 4)
@@ -51,6 +51,7 @@ class MixedListTestCase(ListBaseTestCase, unittest.TestCase):
         amqp.encodable_factory('null', None), # zero
         amqp.encodable_factory('boolean', True), # fixed-one
         amqp.encodable_factory('uint', 0), # fixed-zero
+        amqp.encodable_factory('uint', 2048), # fixed-four
         amqp.encodable_factory('float', 1.0),
         amqp.encodable_factory('double', 1.0),
         amqp.encodable_factory('uuid', uuid.uuid4()), # fixed-sixteen
@@ -60,3 +61,12 @@ class MixedListTestCase(ListBaseTestCase, unittest.TestCase):
         amqp.encodable_factory('string', 'f' * 256), # variable-four
     ]
     type_name = 'list'
+
+
+class SizeBoundaryListTestCase(ListBaseTestCase, unittest.TestCase):
+    # The encoded members are 253 octets long, which is the largest
+    # body whose size still fits in a single octet.
+    values = [
+        amqp.encodable_factory('string', 'f' * 251),
+    ]
+    type_name = 'list'
@@ -1,3 +1,4 @@
+import io
 import unittest
 
 import amqp
@@ -9,3 +10,16 @@ class MapTestCase(unittest.TestCase):
     def test_is_empty_is_true_for_empty(self):
         encodable = amqp.encodable_factory(self.type_name, {})
         self.assertTrue(encodable.is_empty())
+
+    def test_encode_decode(self):
+        value = {'foo': 1, 'bar': [True, None], 'baz': {'qux': 1.5}}
+        encoded = amqp.encodable_factory(self.type_name, value)\
+            .accept(amqp.Encoder())
+        buf = io.BytesIO(encoded)
+        decoded = amqp.parse_buffer(buf).accept(amqp.RawDecoder(buf))
+        self.assertEqual(decoded.as_dto(), value)
+        self.assertEqual(decoded.accept(amqp.Encoder()), encoded)
+
+    def test_infer_raises_on_unknown_type(self):
+        encodable = amqp.encodable_factory(self.type_name, {'foo': object()})
+        self.assertRaises(TypeError, encodable.accept, amqp.Encoder())
@@ -0,0 +1,96 @@
+import io
+import sys
+import unittest
+
+from amqp.exc import LimitExceeded
+from amqp.typesystem import CodecStats
+from amqp.typesystem import DecodeLimits
+from amqp.typesystem import EncodingCache
+from amqp.typesystem import RawDecoder
+from amqp.typesystem import ScatterEncoder
+from amqp.typesystem import SchemaEncoder
+from amqp.typesystem import encoded_size
+from amqp.typesystem import parse_buffer
+import amqp
+
+
+def nest(depth):
+    encodable = amqp.encodable_factory('uint', 1)
+    for i in range(depth):
+        encodable = amqp.encodable_factory('list', [encodable])
+        if i % 2:
+            encodable = amqp.encodable_factory('map', {u'foo': encodable})
+    return encodable
+
+
+class DeepNestingTestCase(unittest.TestCase):
+    depth = sys.getrecursionlimit() * 2
+
+    def decode(self, encoded):
+        buf = io.BytesIO(encoded)
+        return parse_buffer(buf).accept(RawDecoder(buf))
+
+    def test_encode_decode(self):
+        encoded = nest(self.depth).accept(amqp.Encoder())
+        decoded = self.decode(encoded)
+        self.assertEqual(decoded.accept(amqp.Encoder()), encoded)
+
+    def test_tree(self):
+        encoded = nest(self.depth).accept(amqp.Encoder())
+        node = parse_buffer(io.BytesIO(encoded))
+        self.assertEqual(node.end, len(encoded))
+        while node.children:
+            self.assertEqual(node.children[-1].parent, node)
+            self.assertEqual(node.children[-1].depth, node.depth + 1)
+            node = node.children[-1]
+        self.assertEqual(node.depth, self.depth * 3 // 2)
+
+    def test_scatter_encoder(self):
+        encodable = nest(self.depth)
+        self.assertEqual(
+            encodable.accept(ScatterEncoder()).tobytes(),
+            encodable.accept(amqp.Encoder()))
+
+    def test_instrumented_encoder(self):
+        encodable = nest(self.depth)
+        stats = CodecStats()
+        encoded = encodable.accept(SchemaEncoder(instrumentation=stats))
+        self.assertEqual(encoded, encodable.accept(amqp.Encoder()))
+        snapshot = stats.snapshot()['encode']
+        self.assertEqual(snapshot['values']['list'], self.depth)
+        self.assertEqual(snapshot['values']['map'], self.depth // 2)
+        self.assertGreater(snapshot['octets']['map'], len(encoded))
+
+    def test_encoded_size(self):
+        encodable = nest(self.depth)
+        self.assertEqual(encoded_size(encodable, amqp.Encoder()),
+            len(encodable.accept(amqp.Encoder())))
+
+    def test_as_dto(self):
+        dto = nest(self.depth).as_dto()
+        depth = 0
+        while dto != 1:
+            dto = dto[0] if isinstance(dto, list) else dto['foo']
+            depth += 1
+        self.assertEqual(depth, self.depth * 3 // 2)
+
+    def test_freeze(self):
+        encodable = nest(self.depth).freeze()
+        self.assertEqual(encodable.depth, self.depth * 3 // 2)
+        self.assertEqual(encodable.get_key()[0], encodable.type_identifier)
+        cache = EncodingCache(max_depth=4)
+        self.assertEqual(encodable.accept(amqp.Encoder(cache=cache)),
+            encodable.accept(amqp.Encoder()))
+        # The four innermost collections and the 'foo' key.
+        self.assertEqual(len(cache), 5)
+
+    def test_max_depth(self):
+        buf = io.BytesIO(nest(self.depth).accept(amqp.Encoder()))
+        self.assertRaises(LimitExceeded, parse_buffer, buf,
+            limits=DecodeLimits(max_depth=self.depth))
+
+    def test_same_as_shallow(self):
+        value = {'foo': [1, [], {'bar': [None, True]}], 'baz': b'qux'}
+        encoded = amqp.encodable_factory('map', value)\
+            .accept(amqp.Encoder())
+        self.assertEqual(self.decode(encoded).as_dto(), value)
@@ -0,0 +1,78 @@
+import io
+import os
+import signal
+import sys
+import tempfile
+import unittest
+
+import amqp
+from amqp.typesystem import SchemaEncoder
+from amqp.typesystem.profiler import SamplingProfiler
+
+
+class SamplingProfilerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.profiler = SamplingProfiler(interval=2)
+        self.transfer = amqp.create_factory('transfer')(handle=1,
+            delivery_id=2, settled=True)
+
+    def test_one_in_interval_calls_is_sampled(self):
+        for _ in range(5):
+            self.profiler.encode(self.transfer)
+        self.assertEqual(self.profiler.calls, 5)
+        self.assertEqual(self.profiler.samples, 2)
+
+    def test_call_returns_result(self):
+        encoded = self.transfer.accept(SchemaEncoder())
+        for _ in range(2):
+            self.assertEqual(self.profiler.encode(self.transfer), encoded)
+
+    def test_decode_stacks(self):
+        encoded = self.transfer.accept(SchemaEncoder())
+        for _ in range(2):
+            decoded = self.profiler.decode(io.BytesIO(encoded))
+        self.assertEqual(decoded.as_dto().handle, 1)
+        stacks = set(self.profiler.stacks)
+        self.assertIn('decode;Node.frombuf', stacks)
+        self.assertIn('decode;SchemaDecoder.encodable_factory;Meta.create',
+            stacks)
+
+    def test_encode_stacks(self):
+        for _ in range(2):
+            self.profiler.call(lambda: amqp.create_factory('transfer')(
+                handle=1).accept(SchemaEncoder()))
+        self.assertIn('<lambda>;Encoder.visit_collection',
+            set(self.profiler.stacks))
+
+    def test_profile_function_is_restored(self):
+        for _ in range(2):
+            self.profiler.encode(self.transfer)
+        self.assertIsNone(sys.getprofile())
+
+    def test_collapse(self):
+        self.profiler.stacks['a;b'] = 0.0000125
+        self.profiler.stacks['a'] = 0.0000001
+        self.assertEqual(self.profiler.collapse(), ['a;b 13'])
+
+    def test_reset(self):
+        for _ in range(2):
+            self.profiler.encode(self.transfer)
+        self.profiler.reset()
+        self.assertEqual(self.profiler.calls, 0)
+        self.assertEqual(len(self.profiler.stacks), 0)
+
+    @unittest.skipUnless(hasattr(signal, 'SIGUSR1'), "requires SIGUSR1")
+    def test_dump_on_signal(self):
+        fd, filepath = tempfile.mkstemp()
+        os.close(fd)
+        previous = signal.getsignal(signal.SIGUSR1)
+        try:
+            self.profiler.stacks['a;b'] = 0.001
+            self.profiler.dump_on_signal(filepath)
+            os.kill(os.getpid(), signal.SIGUSR1)
+            with open(filepath) as f:
+                self.assertEqual(f.read(), 'a;b 1000\n')
+        finally:
+            signal.signal(signal.SIGUSR1, previous)
+            os.unlink(filepath)
@@ -0,0 +1,46 @@
+import io
+import unittest
+
+from amqp.exc import DecodeError
+from amqp.typesystem.datastructures import Constructor
+from amqp.typesystem.registry import get_by_constructor
+from amqp.typesystem.registry import get_by_type_name
+from amqp.typesystem.stream import decode_constructor
+
+
+class GetByConstructorTestCase(unittest.TestCase):
+
+    def get_meta(self, raw):
+        return get_by_constructor(decode_constructor(io.BytesIO(raw).read))
+
+    def test_smallulong_descriptor(self):
+        meta = self.get_meta(b'\x00\x53\x14\xc0')
+        self.assertIs(meta, get_by_type_name('transfer'))
+
+    def test_ulong_descriptor(self):
+        meta = self.get_meta(b'\x00\x80' + b'\x00' * 7 + b'\x10\xc0')
+        self.assertIs(meta, get_by_type_name('open'))
+
+    def test_symbolic_descriptor(self):
+        meta = self.get_meta(b'\x00\xa3\x0famqp:close:list\xc0')
+        self.assertIs(meta, get_by_type_name('close'))
+
+    def test_format_code(self):
+        meta = self.get_meta(b'\x52')
+        self.assertIs(meta, get_by_type_name('uint'))
+
+    def test_descriptor_bytes_on_constructor(self):
+        ctr = decode_constructor(io.BytesIO(b'\x00\x53\x14\xc0').read)
+        self.assertEqual(ctr.descriptor, b'\x00\x53\x14')
+        self.assertEqual((ctr.numeric, ctr.format_code), (0x14, 0xc0))
+
+    def test_fallback_without_descriptor_bytes(self):
+        meta = get_by_constructor(Constructor(0xc0, None, 0x15))
+        self.assertIs(meta, get_by_type_name('disposition'))
+
+    def test_unknown_descriptor_raises(self):
+        self.assertRaises(DecodeError, self.get_meta, b'\x00\x53\xff\xc0')
+
+
+if __name__ == '__main__':
+    unittest.main()
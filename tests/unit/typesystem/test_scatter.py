@@ -0,0 +1,53 @@
+import unittest
+
+import amqp
+from amqp.messaging import Message
+from amqp.typesystem import ScatterEncoder
+from amqp.typesystem import SchemaEncoder
+from amqp.utils import compat
+
+
+class ScatterEncoderTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.encoder = ScatterEncoder(threshold=256)
+        self.transfer = amqp.create_factory('transfer')
+
+    def encode(self, encodable):
+        buffers = encodable.accept(self.encoder)
+        self.assertEqual(buffers.size, sum(len(x) for x in buffers))
+        self.assertEqual(buffers.tobytes(), encodable.accept(SchemaEncoder()))
+        return buffers
+
+    def test_small_values_are_packed(self):
+        buffers = self.encode(self.transfer(handle=1, delivery_id=2,
+            delivery_tag=b'tag'))
+        self.assertEqual(len(buffers), 1)
+
+    def test_large_binary_is_referenced(self):
+        payload = b'x' * 1024
+        buffers = self.encode(amqp.encodable_factory('list', [
+            amqp.encodable_factory('binary', payload),
+            amqp.encodable_factory('string', 'foo'),
+        ]))
+        self.assertEqual(len(buffers), 3)
+        self.assertIs(buffers[1], payload)
+
+    def test_large_string(self):
+        buffers = self.encode(amqp.encodable_factory('list', [
+            amqp.encodable_factory('string', 'f' * 300),
+            amqp.encodable_factory('string', 'b' * 300),
+        ]))
+        self.assertEqual(len(buffers), 4)
+
+    def test_array(self):
+        self.encode(amqp.encodable_factory('array',
+            [amqp.encodable_factory('binary', b'x' * 300)]))
+
+    def test_message(self):
+        payload = b'x' * 1024
+        message = Message(payload, properties={'subject': 'foo'},
+            application_properties={'key': 'value'})
+        chunks = message.encode_sections(self.encoder)
+        self.assertIs(chunks[-1], payload)
+        self.assertEqual(compat.join_bytes(chunks), message.encode())
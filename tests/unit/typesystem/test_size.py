@@ -0,0 +1,76 @@
+import unittest
+import uuid
+
+import amqp
+from amqp.messaging import Message
+from amqp.typesystem import ScatterEncoder
+from amqp.typesystem import SchemaEncoder
+from amqp.typesystem import encoded_size
+
+
+class EncodedSizeTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.encoder = SchemaEncoder()
+
+    def assertSize(self, encodable):
+        size = encoded_size(encodable)
+        self.assertEqual(size, len(encodable.accept(self.encoder)))
+
+    def test_scalars(self):
+        for type_name, value in [
+            ('null', None),
+            ('boolean', True),
+            ('uint', 0),
+            ('uint', 255),
+            ('uint', 256),
+            ('ulong', 2 ** 40),
+            ('long', -1),
+            ('double', 1.0),
+            ('uuid', uuid.uuid4()),
+            ('binary', b'x' * 254),
+            ('binary', b'x' * 255),
+            ('string', u'\u20ac' * 100),
+            ('symbol', 's' * 300)]:
+            self.assertSize(amqp.encodable_factory(type_name, value))
+
+    def test_list_size_boundaries(self):
+        for n in (0, 250, 251, 252, 253, 300):
+            self.assertSize(amqp.encodable_factory('list', [
+                amqp.encodable_factory('binary', b'x' * n)]))
+
+    def test_array(self):
+        self.assertSize(amqp.encodable_factory('array', [
+            amqp.encodable_factory('uint', 1),
+            amqp.encodable_factory('uint', 1024)]))
+
+    def test_composite(self):
+        transfer = amqp.create_factory('transfer')(handle=1, delivery_id=2,
+            delivery_tag=b'tag', settled=True)
+        self.assertSize(transfer)
+
+    def test_sections(self):
+        message = Message(b'x' * 1024, properties={'subject': 's'},
+            application_properties={'key': [1, 2]})
+        for name in ('properties', 'application-properties', 'body'):
+            section, = message.create_sections(name, message.values[name])
+            self.assertSize(section)
+
+    def test_scalar_encoding_is_cached(self):
+        encodable = amqp.encodable_factory('string', 'foo')
+        encoded_size(encodable)
+        self.assertIsNotNone(encodable.encoded)
+        self.assertIs(encodable.accept(self.encoder), encodable.encoded[1])
+
+    def test_scatter_encoder(self):
+        encodable = amqp.encodable_factory('list', [
+            amqp.encodable_factory('string', u'abcdef'),
+            amqp.encodable_factory('array', [
+                amqp.encodable_factory('uint', x) for x in (1, 2)])])
+        encoded = encodable.accept(self.encoder)
+        self.assertEqual(encoded_size(encodable[0], ScatterEncoder()), 8)
+        self.assertEqual(encoded_size(encodable, ScatterEncoder()),
+            len(encoded))
+        self.assertEqual(encodable.accept(self.encoder), encoded)
+        self.assertEqual(encodable.accept(ScatterEncoder()).tobytes(),
+            encoded)
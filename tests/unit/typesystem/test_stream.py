@@ -2,6 +2,10 @@ import io
 import unittest
 
 import amqp
+from amqp.typesystem.stream import SymbolTable
+from amqp.typesystem.stream import decode_constructor
+from amqp.typesystem.stream import decode_constructor_at
+from amqp.typesystem.stream import read_value_at
 
 
 class StreamTestCase(unittest.TestCase):
@@ -10,10 +14,99 @@ class StreamTestCase(unittest.TestCase):
         buf = io.BytesIO()
         self.assertRaises(EOFError, amqp.parse_buffer, buf)
 
+    def test_truncated_constructor_raises_eof(self):
+        for raw in (b'\x00', b'\x00\x53', b'\x00\x80\x00', b'\x00\x53\x14',
+        b'\x00\xa3\x07foo'):
+            self.assertRaises(EOFError, decode_constructor,
+                io.BytesIO(raw).read)
+        self.assertRaises(EOFError, amqp.parse_buffer, io.BytesIO(b'\x00'))
+
     def test_parse_buffer_raises_valueerror_on_unknown_format_code(self):
         buf = io.BytesIO(b'\x00\xAA')
         self.assertRaises(ValueError, amqp.parse_buffer, buf)
 
 
+
+class SymbolTableTestCase(unittest.TestCase):
+
+    def test_decode_returns_same_object(self):
+        symbols = SymbolTable()
+        first = symbols.decode(b'amqp:not-found')
+        self.assertEqual(first, 'amqp:not-found')
+        self.assertIs(symbols.decode(bytes(bytearray(b'amqp:not-found'))),
+            first)
+
+    def test_decode_memoryview(self):
+        symbols = SymbolTable()
+        self.assertEqual(symbols.decode(memoryview(b'foo')), 'foo')
+        self.assertIs(symbols.decode(memoryview(b'foo')),
+            symbols.decode(b'foo'))
+
+    def test_bounded(self):
+        symbols = SymbolTable(max_size=10, max_length=8)
+        for i in range(100):
+            symbols.decode('sym{0}'.format(i).encode('ascii'))
+            self.assertTrue(len(symbols) <= 10)
+        symbols.decode(b'x' * 9)
+        self.assertNotIn(b'x' * 9, symbols.symbols)
+
+    def test_decoded_symbols_are_interned(self):
+        encoded = amqp.encodable_factory('symbol', 'x-opt-foo')\
+            .accept(amqp.SchemaEncoder())
+        values = []
+        for _ in range(2):
+            buf = io.BytesIO(encoded)
+            values.append(amqp.parse_buffer(buf)
+                .accept(amqp.RawDecoder(buf)).value)
+        self.assertIs(values[0], values[1])
+
+    def test_symbolic_descriptor_is_interned(self):
+        raw = b'\x00\xa3\x07foo:bar\x45'
+        first = decode_constructor(io.BytesIO(raw).read)
+        second = decode_constructor(io.BytesIO(raw).read)
+        self.assertEqual(first.symbolic, 'foo:bar')
+        self.assertIs(first.symbolic, second.symbolic)
+
+
+class BufferStreamTestCase(unittest.TestCase):
+
+    def test_primitive_constructor(self):
+        ctr, offset = decode_constructor_at(b'\x40\x52\x01', 1)
+        self.assertEqual(ctr.format_code, 0x52)
+        self.assertEqual(offset, 2)
+        self.assertIs(ctr, decode_constructor_at(b'\x52')[0])
+
+    def test_described_constructor(self):
+        for raw in (b'\x00\xa3\x07foo:bar\x45', b'\x00\x53\x14\x45',
+        b'\x00\x80\x00\x00\x00\x00\x00\x00\x00\x14\x45'):
+            ctr, offset = decode_constructor_at(memoryview(raw))
+            self.assertEqual(ctr, decode_constructor(io.BytesIO(raw).read))
+            self.assertEqual(offset, len(raw))
+
+    def test_truncated_constructor(self):
+        self.assertRaises(EOFError, decode_constructor_at, b'')
+        self.assertRaises(EOFError, decode_constructor_at, b'\x00\xa3\x07foo')
+
+    def test_read_value(self):
+        encoded = memoryview(b'\xa1\x03foo\x52\x01')
+        ctr, offset = decode_constructor_at(encoded)
+        value, offset = read_value_at(ctr.format_code, encoded, offset)
+        self.assertIsInstance(value, memoryview)
+        self.assertEqual(value.tobytes(), b'foo')
+        ctr, offset = decode_constructor_at(encoded, offset)
+        value, offset = read_value_at(ctr.format_code, encoded, offset)
+        self.assertEqual(value.tobytes(), b'\x01')
+        self.assertEqual(offset, len(encoded))
+
+    def test_read_collection(self):
+        encoded = b'\xc0\x03\x02\x40\x40'
+        value, offset = read_value_at(0xc0, encoded, 1)
+        self.assertEqual(value, b'\x03\x02\x40\x40')
+        self.assertEqual(offset, 5)
+
+    def test_truncated_value(self):
+        self.assertRaises(EOFError, read_value_at, 0xa1, b'\xa1\x03fo', 1)
+
+
 if __name__ == '__main__':
     unittest.main()